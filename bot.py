@@ -1,8 +1,11 @@
+import asyncio
 import os
+import time
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-from cogs.state_machine.config import init as state_init
+from cogs.state_machine.config import init as state_init, StateConfigError
+from cogs.telemetry.loop_monitor import monitor as loop_monitor
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,39 +23,113 @@ intents.dm_messages = True  # needed to send messages from DM's'
 # Initialize the bot with command prefix and intents
 bot = commands.Bot(command_prefix=PREFIX, intents=intents)
 
+# on_ready fires again after every reconnect that could not resume the session, the boot sequence must only run once
+_booted = False
+_booting = False  # the boot sequence is running, a reconnect meanwhile is covered by it
+_started_at = time.perf_counter()
+_logged_in_at = None
+
+
+def _log_phase(phase: str, started: float) -> float:
+    """Log how long a startup phase took and return the current time, the start of the next phase."""
+    now = time.perf_counter()
+    print(f'[boot] {phase}: {(now - started) * 1000:.0f}ms')
+    return now
+
+
+async def _load_extension(name: str) -> None:
+    started = time.perf_counter()
+    try:
+        await bot.load_extension(f'cogs.{name}')
+        print(f'Loaded extension: {name} ({(time.perf_counter() - started) * 1000:.0f}ms)')
+    except Exception as e:
+        print(f'Failed to load extension {name}: {e}')
+
 
 # Function to load all cogs
 async def load_cogs():
-    """Load all cogs from the cogs directory."""
-    for filename in os.listdir('./cogs'):
-        if filename.endswith('.py') and not filename.startswith('_'):
-            try:
-                await bot.load_extension(f'cogs.{filename[:-3]}')
-                print(f'Loaded extension: {filename[:-3]}')
-            except Exception as e:
-                print(f'Failed to load extension {filename[:-3]}: {e}')
+    """Load all cogs from the cogs directory, concurrently since they don't depend on each other at load time."""
+    names = [filename[:-3] for filename in sorted(os.listdir('./cogs'))
+             if filename.endswith('.py') and not filename.startswith('_')]
+    await asyncio.gather(*(_load_extension(name) for name in names))
+
+
+async def _run_cog_hook(hook: str) -> None:
+    """Run a startup hook (``reconcile`` or ``resync``) of every cog defining it, concurrently."""
+    async def run(cog_name, method):
+        started = time.perf_counter()
+        try:
+            await method()
+        except Exception as e:
+            print(f'{cog_name}.{hook} failed: {e}')
+        _log_phase(f'{hook} {cog_name}', started)
+
+    await asyncio.gather(*(run(name, getattr(cog, hook)) for name, cog in bot.cogs.items() if hasattr(cog, hook)))
+
+
+@bot.event
+async def setup_hook():
+    """Called once after login, before connecting to the gateway."""
+    global _logged_in_at
+    _logged_in_at = _log_phase('login', _started_at)
 
 
 @bot.event
 async def on_ready():
     """Event triggered when the bot is ready and connected to Discord."""
+    global _booted, _booting
+    if _booted:
+        # reconnected with a new session: cogs and states are in place, only catch up on what was missed
+        started = time.perf_counter()
+        print(f'{bot.user.name} has reconnected to Discord, resyncing...')
+        await _run_cog_hook('resync')
+        _log_phase('reconnect resync', started)
+        return
+
     print(f'{bot.user.name} has connected to Discord!')
     print(f'Bot ID: {bot.user.id}')
     print(f'Command prefix: {PREFIX}')
+    phase = _log_phase('gateway connect and guild chunking', _logged_in_at or _started_at)
+
+    # Start measuring event loop lag
+    loop_monitor.start()
 
     # setup role management
     guild = await findGuild()
     if guild is None:
       print('GuildId could not be found')
       return
-
-    # setup role management states
-    state_init(guild)
-    # Load all cogs
-    await load_cogs()
+    if _booting:
+        return
+    _booting = True
+    try:
+        if not guild.chunked:
+            await guild.chunk()
+            phase = _log_phase('guild chunking', phase)
+
+        # setup role management states
+        try:
+            state_init(guild)
+        except StateConfigError as e:
+            # stay unbooted so the next on_ready retries the whole boot sequence rather than resyncing
+            print(f'Could not load the state machine configuration: {e}')
+            return
+        phase = _log_phase('state config', phase)
+
+        # Load all cogs
+        await load_cogs()
+        phase = _log_phase('cog load', phase)
+    finally:
+        _booting = False
+    _booted = True
+
+    # Match every member to a state, once all cogs are listening for state changes
+    await _run_cog_hook('reconcile')
+    phase = _log_phase('reconciliation', phase)
 
     # Set the bot's status
     await bot.change_presence(activity=discord.Game(name=f"Type {PREFIX}help"))
+    _log_phase('total', _started_at)
 
 
 async def findGuild():
@@ -64,11 +141,23 @@ async def findGuild():
     return guild
 
 
-@bot.command(name='ping', help='Responds with the bot\'s latency')
-async def ping(ctx):
+@bot.command(name='ping', help='Responds with the bot\'s latency and event loop lag (use "!ping slow" for blocking stacks)')
+async def ping(ctx, detail: str = None):
     """Simple command to check if the bot is responsive."""
     latency = round(bot.latency * 1000)  # Convert to milliseconds
-    await ctx.send(f'Pong! Latency: {latency}ms')
+    lag = loop_monitor.stats()
+    await ctx.send(f'Pong! Latency: {latency}ms\n'
+                   f'Loop lag: p50 {lag["p50"]:.1f}ms, p99 {lag["p99"]:.1f}ms, max {lag["max"]:.1f}ms\n'
+                   f'Slow callbacks recorded: {lag["slow_callbacks"]}')
+
+    if detail == 'slow':
+        if not loop_monitor.slow_callbacks:
+            await ctx.send('No slow callbacks recorded.')
+            return
+        for record in list(loop_monitor.slow_callbacks)[-3:]:
+            # only show the innermost frames, they point at the blocking code
+            stack = ''.join(record.stack[-4:])[-1500:]
+            await ctx.send(f'Blocked {record.duration * 1000:.0f}ms in task `{record.task or "none"}`:\n```\n{stack}```')
 
 
 @bot.command(name='hello', help='Says hello to the user')
@@ -84,6 +173,8 @@ async def on_command_error(ctx, error):
         await ctx.send(f"Command not found. Type `{PREFIX}help` for a list of commands.")
     elif isinstance(error, commands.MissingRequiredArgument):
         await ctx.send(f"Missing required argument. Type `{PREFIX}help {ctx.command}` for proper usage.")
+    elif isinstance(error, commands.CommandOnCooldown):
+        await ctx.send(f"This command is on cooldown, try again in {error.retry_after:.1f}s.")
     else:
         await ctx.send(f"An error occurred: {str(error)}")
         # Log the error for debugging
@@ -0,0 +1,3 @@
+# API package for the bot
+# This package contains the optional read-only HTTP/JSON API over the bot's in-memory
+# game state, and a load test for it.
@@ -0,0 +1,191 @@
+"""
+Load test for the state API.
+
+Serves a synthetic game state from this process and requests it from separate client processes, then
+reports throughput, latency, and the event loop lag of the serving loop while idle and under load.
+State changes can be injected while the test runs to measure the cost of rebuilding snapshots.
+
+Usage:
+    python -m cogs.api.loadtest --members 10000 --duration 10 --clients 2 --concurrency 64
+    python -m cogs.api.loadtest --rate 2000 --churn 20 --no-conditional
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .server import StateAPI
+from ..telemetry.loop_monitor import LoopMonitor
+
+
+STATES = ['Default', 'New Member', 'Active Member', 'Eliminated']
+COOLDOWNS = {'New Member': 30.0, 'Eliminated': 1700.0}
+
+
+class _SyntheticState:
+    def __init__(self, name: str, duration: Optional[float]):
+        self.name = name
+        self._duration = duration
+        if duration is not None:
+            self.start_times: Dict[int, float] = {}
+
+    def duration(self) -> Optional[float]:
+        return self._duration
+
+
+class _SyntheticGame:
+    """Just the attributes of RoleManager and ContractBroker that the state API reads."""
+
+    def __init__(self, members: int, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.states = {name: _SyntheticState(name, COOLDOWNS.get(name)) for name in STATES}
+        self.member_states: Dict[int, str] = {}
+        self.last_photos: Dict[int, str] = {}
+        self.version = 0
+        self.photos_version = 0
+        now = time.time()
+        for i in range(members):
+            member_id = 10 ** 17 + i
+            self.move(member_id, self.rng.choice(STATES), now - self.rng.uniform(0, 1700))
+            if self.rng.random() < 0.8:
+                self.last_photos[member_id] = f'https://cdn.discordapp.com/attachments/1/{member_id}/photo.jpg'
+
+    def move(self, member_id: int, state: str, at: Optional[float] = None) -> None:
+        previous = self.member_states.get(member_id)
+        if previous is not None and hasattr(self.states[previous], 'start_times'):
+            self.states[previous].start_times.pop(member_id, None)
+        if hasattr(self.states[state], 'start_times'):
+            self.states[state].start_times[member_id] = time.time() if at is None else at
+        self.member_states[member_id] = state
+        self.version += 1
+
+
+def _urls(member_ids: List[int]) -> List[str]:
+    urls = ['/api/status', '/api/members', '/api/members?limit=1000', '/api/cooldowns',
+            '/api/cooldowns?state=Eliminated&limit=50', '/api/photos?offset=100&limit=100']
+    urls += [f'/api/members?state={state}&offset={offset}' for state in STATES for offset in (0, 100, 500)]
+    urls += [f'/api/members/{member_id}' for member_id in member_ids]
+    return urls
+
+
+def _client(port: int, urls: List[str], duration: float, concurrency: int, rate: float, conditional: bool,
+            seed: int) -> Tuple[Counter, List[float]]:
+    """
+    Body of a client process: request random URLs from ``concurrency`` connections until the deadline.
+
+    With a ``rate`` (requests per second for this client) requests are paced on a fixed schedule,
+    otherwise every connection sends its next request as soon as the previous one is answered.
+    """
+    return asyncio.run(_hammer(port, urls, duration, concurrency, rate, conditional, seed))
+
+
+async def _hammer(port: int, urls: List[str], duration: float, concurrency: int, rate: float, conditional: bool,
+                  seed: int) -> Tuple[Counter, List[float]]:
+    statuses = Counter()
+    latencies = []
+    deadline = time.monotonic() + duration
+
+    async def worker(session, rng):
+        etags = {}
+        interval = concurrency / rate if rate else 0.0
+        scheduled = time.monotonic() + rng.uniform(0, interval)
+        while time.monotonic() < deadline:
+            if interval:
+                await asyncio.sleep(max(0.0, scheduled - time.monotonic()))
+                scheduled += interval
+            url = rng.choice(urls)
+            headers = {'If-None-Match': etags[url]} if conditional and url in etags else {}
+            started = time.perf_counter()
+            async with session.get(f'http://127.0.0.1:{port}{url}', headers=headers) as response:
+                await response.read()
+                if 'ETag' in response.headers:
+                    etags[url] = response.headers['ETag']
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status] += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(worker(session, random.Random(seed * 1000 + i)) for i in range(concurrency)))
+    return statuses, latencies
+
+
+async def _measure_lag(seconds: float, interval: float) -> Dict[str, float]:
+    monitor = LoopMonitor(interval=interval, threshold=0.1)
+    monitor.start()
+    await asyncio.sleep(seconds)
+    monitor.stop()
+    return monitor.stats()
+
+
+async def _churn(game: _SyntheticGame, per_second: float) -> None:
+    member_ids = list(game.member_states)
+    while True:
+        await asyncio.sleep(1 / per_second)
+        game.move(game.rng.choice(member_ids), game.rng.choice(STATES))
+
+
+async def run(args) -> None:
+    started = time.perf_counter()
+    game = _SyntheticGame(args.members)
+    print(f'Synthetic state: {args.members} members, {len(game.last_photos)} photos '
+          f'({(time.perf_counter() - started) * 1000:.0f}ms)')
+    api = StateAPI(role_manager=lambda: game, broker=lambda: game)
+    port = await api.start('127.0.0.1', 0)
+
+    idle = await _measure_lag(args.idle, args.lag_interval)
+
+    urls = _urls(random.Random(1).sample(list(game.member_states), min(200, args.members)))
+    loop = asyncio.get_running_loop()
+    churn = loop.create_task(_churn(game, args.churn)) if args.churn else None
+    with ProcessPoolExecutor(args.clients) as pool:
+        clients = [loop.run_in_executor(pool, _client, port, urls, args.duration, args.concurrency,
+                                        args.rate / args.clients, not args.no_conditional, seed)
+                   for seed in range(args.clients)]
+        # clients need a moment to start, measure the lag over the middle of the run
+        await asyncio.sleep(min(1.0, args.duration / 4))
+        loaded = await _measure_lag(args.duration / 2, args.lag_interval)
+        results = await asyncio.gather(*clients)
+    if churn is not None:
+        churn.cancel()
+    await api.stop()
+
+    statuses = Counter()
+    latencies = []
+    for client_statuses, client_latencies in results:
+        statuses.update(client_statuses)
+        latencies.extend(client_latencies)
+    latencies.sort()
+    total = sum(statuses.values())
+    print(f'\n{total} requests in {args.duration:.0f}s from {args.clients} x {args.concurrency} connections: '
+          f'{total / args.duration:.0f} req/s')
+    print(f'statuses: {dict(sorted(statuses.items()))}')
+    print(f'latency: p50 {statistics.median(latencies) * 1000:.2f}ms, '
+          f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms, max {latencies[-1] * 1000:.2f}ms')
+    print(f'server: {api.stats()}')
+    print(f'\n{"loop lag (ms)":<16}{"p50":>8}{"p99":>8}{"max":>8}')
+    for name, lag in (('idle', idle), ('under load', loaded)):
+        print(f'{name:<16}{lag["p50"]:>8.2f}{lag["p99"]:>8.2f}{lag["max"]:>8.2f}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load test the state API against a synthetic game state.')
+    parser.add_argument('--members', type=int, default=10000)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load')
+    parser.add_argument('--clients', type=int, default=2, help='client processes')
+    parser.add_argument('--concurrency', type=int, default=32, help='connections per client process')
+    parser.add_argument('--rate', type=float, default=0.0, help='total requests per second, 0 for as fast as possible')
+    parser.add_argument('--churn', type=float, default=0.0, help='state changes per second during the test')
+    parser.add_argument('--no-conditional', action='store_true', help='never send If-None-Match')
+    parser.add_argument('--idle', type=float, default=2.0, help='seconds of idle lag measurement')
+    parser.add_argument('--lag-interval', type=float, default=0.01, help='loop lag sampling interval in seconds')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+
+STATE_API_HOST = os.getenv('STATE_API_HOST', '127.0.0.1')  # interface the state API listens on
+STATE_API_PORT = int(os.getenv('STATE_API_PORT', 0))  # 0 disables the state API
+STATE_API_REFRESH = float(os.getenv('STATE_API_REFRESH', 1.0))  # seconds the served state may lag behind the game
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+RESPONSE_CACHE_SIZE = 512  # rendered response bodies kept until the state changes
+
+
+def _name(state) -> str:
+    """JSON name of a state, states are keyed by PlayerState members."""
+    return getattr(state, 'value', state)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag, or is ``*``. Comparison is weak, a W/ prefix is ignored."""
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
+
+
+class StateAPI:
+    """
+    Read-only HTTP/JSON API over the bot's in-memory game state.
+
+    Handlers only read ``RoleManager.member_states``, the start times of elapsed-time states and
+    ``ContractBroker.last_photos``; they never call Discord. The version counters of those structures
+    form a generation: sorted snapshots and rendered response bodies are built once per generation and
+    reused by every request until the state changes, and responses carry an ETag for the generation so
+    pollers that already have it get a bodiless 304. A new generation starts at most every ``refresh``
+    seconds, so a burst of transitions costs one rebuild rather than one per transition.
+
+    Endpoints:
+        GET /api/status                      member counts per state
+        GET /api/members?state=&offset=&limit=
+        GET /api/members/{member_id}
+        GET /api/cooldowns?state=&offset=&limit=   members in elapsed-time states, soonest return first
+        GET /api/photos?offset=&limit=
+    """
+
+    def __init__(self, role_manager: Callable[[], Optional[Any]], broker: Callable[[], Optional[Any]],
+                 refresh: float = STATE_API_REFRESH):
+        """
+        Args:
+            role_manager: Returns the RoleManager to serve, or None while it is not loaded
+            broker: Returns the ContractBroker whose photos to serve, or None while it is not loaded
+            refresh: Minimum seconds between two generations
+        """
+        self._role_manager = role_manager
+        self._broker = broker
+        self.refresh = refresh
+        self._refreshed_at = 0.0
+        self._epoch = f'{int(time.time()):x}'  # keeps ETags of different bot runs apart
+        self._source: Optional[Tuple] = None
+        self._generation = 0
+        self._snapshots: Dict[str, Any] = {}
+        self._responses: Dict[Tuple[str, str], bytes] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.requests = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get('/api/status', self._status),
+            web.get('/api/members', self._members),
+            web.get('/api/members/{member_id}', self._member),
+            web.get('/api/cooldowns', self._cooldowns),
+            web.get('/api/photos', self._photos),
+        ])
+
+    async def start(self, host: str = STATE_API_HOST, port: int = STATE_API_PORT) -> int:
+        """Start serving, and return the port listened on (useful with port 0)."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        port = self._runner.addresses[0][1]
+        print(f'[state_api] Serving game state on http://{host}:{port}/api/')
+        return port
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'requests': self.requests,
+            'not_modified': self.not_modified,
+            'cache_hits': self.cache_hits,
+            'cache_hit_rate': self.cache_hits / self.requests if self.requests else 0.0,
+            'generation': self._generation,
+        }
+
+    def _sync(self) -> Tuple[Any, Any]:
+        """Start a new generation if the served state changed since the last request."""
+        manager, broker = self._role_manager(), self._broker()
+        source = (id(manager), getattr(manager, 'version', None), id(broker), getattr(broker, 'photos_version', None))
+        now = time.monotonic()
+        if source != self._source and (now - self._refreshed_at >= self.refresh or self._source is None
+                                       or source[0] != self._source[0] or source[2] != self._source[2]):
+            self._source = source
+            self._refreshed_at = now
+            self._generation += 1
+            self._snapshots.clear()
+            self._responses.clear()
+        return manager, broker
+
+    def _respond(self, request: web.Request, render: Callable[[web.Request, Any, Any], Any]) -> web.Response:
+        self.requests += 1
+        manager, broker = self._sync()
+        if manager is None:
+            raise web.HTTPServiceUnavailable(text='Game state is not loaded yet')
+
+        etag = f'"{self._epoch}-{self._generation}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if _etag_matches(request.headers.get('If-None-Match', ''), etag):
+            self.not_modified += 1
+            return web.Response(status=304, headers=headers)
+
+        key = (request.path, request.query_string)
+        body = self._responses.get(key)
+        if body is None:
+            body = json.dumps(render(request, manager, broker), separators=(',', ':')).encode()
+            if len(self._responses) >= RESPONSE_CACHE_SIZE:
+                self._responses.clear()
+            self._responses[key] = body
+        else:
+            self.cache_hits += 1
+        return web.Response(body=body, content_type='application/json', headers=headers)
+
+    def _snapshot(self, name: str, build: Callable[[], Any]) -> Any:
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            snapshot = self._snapshots[name] = build()
+        return snapshot
+
+    @staticmethod
+    def _page(request: web.Request, rows: List[Dict]) -> Dict[str, Any]:
+        try:
+            offset = int(request.query.get('offset', 0))
+            limit = int(request.query.get('limit', PAGE_SIZE))
+        except ValueError:
+            raise web.HTTPBadRequest(text='offset and limit must be integers')
+        if offset < 0 or not 0 < limit <= MAX_PAGE_SIZE:
+            raise web.HTTPBadRequest(text=f'offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}')
+        return {'total': len(rows), 'offset': offset, 'limit': limit, 'items': rows[offset:offset + limit]}
+
+    @staticmethod
+    def _filter(request: web.Request, rows_by_state: Dict[Optional[str], List[Dict]]) -> List[Dict]:
+        """Rows of the state named by the ``state`` query parameter, every row without one."""
+        state = request.query.get('state')
+        return rows_by_state.get(state, []) if state else rows_by_state[None]
+
+    def _member_rows(self, manager) -> Dict[Optional[str], List[Dict]]:
+        """Members sorted by ID, overall (under None) and per state."""
+        rows_by_state: Dict[Optional[str], List[Dict]] = {None: []}
+        for member_id, state in sorted(manager.member_states.items()):
+            row = {'id': str(member_id), 'state': _name(state)}
+            rows_by_state[None].append(row)
+            rows_by_state.setdefault(row['state'], []).append(row)
+        return rows_by_state
+
+    def _cooldown_rows(self, manager) -> Dict[Optional[str], List[Dict]]:
+        """Members of elapsed-time states, soonest return first, overall (under None) and per state."""
+        rows = []
+        for state in manager.states.values():
+            start_times = getattr(state, 'start_times', None)
+            if start_times is None:
+                continue
+            duration = state.duration()
+            for member_id, since in start_times.items():
+                rows.append({
+                    'id': str(member_id),
+                    'state': _name(state.name),
+                    'since': since,
+                    'returns_at': since + duration if duration is not None else None,
+                })
+        rows.sort(key=lambda row: (row['returns_at'] is None, row['returns_at'] or 0, row['id']))
+        rows_by_state: Dict[Optional[str], List[Dict]] = {None: rows}
+        for row in rows:
+            rows_by_state.setdefault(row['state'], []).append(row)
+        return rows_by_state
+
+    def _cooldowns_by_member(self, manager) -> Dict[str, Dict]:
+        return {row['id']: row for row in self._snapshot('cooldowns', lambda: self._cooldown_rows(manager))[None]}
+
+    async def _status(self, request: web.Request) -> web.Response:
+        def render(request, manager, broker):
+            rows_by_state = self._snapshot('members', lambda: self._member_rows(manager))
+            return {
+                'members': len(rows_by_state[None]),
+                'states': {state: len(rows) for state, rows in rows_by_state.items() if state is not None},
+                'photos': len(broker.last_photos) if broker is not None else 0,
+            }
+        return self._respond(request, render)
+
+    async def _members(self, request: web.Request) -> web.Response:
+        def render(request, manager, broker):
+            return self._page(request, self._filter(request, self._snapshot('members', lambda: self._member_rows(manager))))
+        return self._respond(request, render)
+
+    async def _member(self, request: web.Request) -> web.Response:
+        def render(request, manager, broker):
+            try:
+                member_id = int(request.match_info['member_id'])
+            except ValueError:
+                raise web.HTTPBadRequest(text='member_id must be an integer')
+            state = manager.member_states.get(member_id)
+            if state is None:
+                raise web.HTTPNotFound(text=f'No state recorded for member {member_id}')
+            cooldown = self._snapshot('cooldowns_by_member', lambda: self._cooldowns_by_member(manager)).get(str(member_id))
+            return {
+                'id': str(member_id),
+                'state': _name(state),
+                'since': cooldown['since'] if cooldown else None,
+                'returns_at': cooldown['returns_at'] if cooldown else None,
+                'photo_url': broker.last_photos.get(member_id) if broker is not None else None,
+            }
+        return self._respond(request, render)
+
+    async def _cooldowns(self, request: web.Request) -> web.Response:
+        def render(request, manager, broker):
+            return self._page(request, self._filter(request, self._snapshot('cooldowns', lambda: self._cooldown_rows(manager))))
+        return self._respond(request, render)
+
+    async def _photos(self, request: web.Request) -> web.Response:
+        def render(request, manager, broker):
+            rows = self._snapshot('photos', lambda: [
+                {'id': str(member_id), 'url': url}
+                for member_id, url in sorted(broker.last_photos.items())
+            ] if broker is not None else [])
+            return self._page(request, rows)
+        return self._respond(request, render)
@@ -0,0 +1,3 @@
+# Caching package for the bot
+# This package contains caches of rendered command responses, kept per guild and
+# invalidated by the gateway events that change them.
@@ -0,0 +1,51 @@
+import os
+from typing import Any, Callable, Dict, Optional
+
+
+INFO_COOLDOWN_SECONDS = float(os.getenv('INFO_COOLDOWN_SECONDS', 10))  # per user, for cached info commands
+
+
+class GuildEmbedCache:
+    """
+    Command responses rendered once per guild and served from memory until something they show changes.
+
+    The owning cog calls ``invalidate`` from the listeners of the events that affect the response (role,
+    channel or guild updates, state reconfiguration), so repeated invocations never rebuild the embed.
+    """
+
+    def __init__(self):
+        self.embeds: Dict[int, Any] = {}  # Maps guild IDs to their rendered embed
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self.embeds)
+
+    def get(self, guild_id: int, build: Callable[[], Any]) -> Any:
+        embed = self.embeds.get(guild_id)
+        if embed is None:
+            embed = self.embeds[guild_id] = build()
+            self.misses += 1
+        else:
+            self.hits += 1
+        return embed
+
+    def invalidate(self, guild_id: Optional[int] = None) -> None:
+        """Drop the embed of a guild, or of every guild when no guild is given."""
+        if guild_id is None:
+            dropped = len(self.embeds)
+            self.embeds.clear()
+        else:
+            dropped = 1 if self.embeds.pop(guild_id, None) is not None else 0
+        self.invalidations += dropped
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'embeds': len(self.embeds),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -1,18 +1,39 @@
 import os
 
+import aiohttp
 import discord
 from discord.ext import commands, tasks
 import random
 import asyncio
-from typing import Dict, List, Optional, Tuple
+import json
+import time
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
 import datetime
 
 from discord.types.member import Member
-from .state_machine.states import RoleTypes, PlayerState
-from .role_management import RoleManagement
-
-
-CONTRACT_FREQ = os.getenv('CONTRACT_FREQUENCY', 120)  # minutes
+from .state_machine.states import PlayerState
+from .contracts.assignment import assign_contracts
+from .contracts.cards import ContractCardCache
+from .contracts.embeds import build_contract_embed, CONTRACT_PHOTO_FILENAME
+from .contracts.history import ContractHistory
+from .contracts.scheduling import DistributionRun, DistributionScheduler
+from .contracts.worker import ContractWorker, TargetCard, CONTRACT_WORKER
+from .media.phash import DuplicatePhotoDetector, PhotoRecord
+from .media.photo_cache import PhotoCache
+from .media.workers import shutdown_executor
+from .telemetry import tracing
+from .rest.scheduler import scheduler as rest_scheduler, Priority
+
+
+CONTRACT_FREQ = int(os.getenv('CONTRACT_FREQUENCY', 120))  # minutes
+EXCLUDE_NEW_PLAYER_TARGETS = os.getenv('CONTRACT_EXCLUDE_NEW_TARGETS', '0') == '1'  # keep active players off new players' targets
+DRY_RUN = os.getenv('CONTRACT_DRY_RUN', '0') == '1'  # assign and log contracts without sending any DMs
+SNAPSHOT_FILE = os.getenv('CONTRACT_SNAPSHOT_FILE', 'contract_snapshot.json')
+PLEDGE_CHANNEL = "pledge-and-surety"
+DUPLICATE_ALERT_CHANNEL = os.getenv('DUPLICATE_PHOTO_ALERT_CHANNEL', 'admin-alerts')
+PHOTO_CHECK_CONCURRENCY = 4  # pledge photos downloaded for hashing and caching at the same time
+REASSIGN_ATTEMPTS = 8  # random draws before falling back to a scan of the target pool
 
 
 class ContractBroker(commands.Cog):
@@ -22,41 +43,292 @@ class ContractBroker(commands.Cog):
         self.bot = bot
         self.contract_distribution.start()
         self.last_photos = {}  # Maps member IDs to their last photo URL in pledge-and-surety channel
-
-    def cog_unload(self):
+        self.photos_version = 0  # incremented whenever last_photos changes
+        self.history = ContractHistory()  # Recent targets of every player, across cycles
+        self.cards = ContractCardCache()  # Contract embeds of the current cycle, built once per target
+        # Optionally assign and deliver contracts in a separate process, away from the gateway's event loop
+        self.worker = ContractWorker(bot.http.token) if CONTRACT_WORKER == 'process' else None
+
+        # Pledge photos are hashed in a process pool to spot reused or shared photos, and each member's
+        # latest photo is cached on disk at contract card size
+        self.duplicate_detector = DuplicatePhotoDetector()
+        self.photo_cache = PhotoCache()
+        self._photo_semaphore = asyncio.Semaphore(PHOTO_CHECK_CONCURRENCY)
+        self._photo_tasks: Set[asyncio.Task] = set()
+
+        # Single-flight distribution state, per guild ID
+        self._in_flight: Dict[int, asyncio.Task] = {}
+        self.current_runs: Dict[int, DistributionRun] = {}
+        self.last_runs: Dict[int, DistributionRun] = {}
+        self.schedulers: Dict[int, DistributionScheduler] = {}
+
+        # Contracts of the current cycle, indexed both ways so a target's hunters can be found in O(1)
+        self.contracts: Dict[int, int] = {}  # Maps hunter IDs to target IDs
+        self.hunters: Dict[int, Set[int]] = {}  # Maps target IDs to the IDs of the players hunting them
+        self.new_player_ids: Set[int] = set()  # New players of the current cycle, they need unique targets
+        self.new_player_targets: Dict[int, int] = {}  # Maps targets held by new players to that new player's ID
+        self.target_pool: List[int] = []  # IDs of players that can currently be targeted
+        self._pool_positions: Dict[int, int] = {}  # Maps target IDs to their position in target_pool
+        self.cycle = 0  # incremented whenever a new contract cycle starts
+
+    async def cog_unload(self):
         """Clean up when the cog is unloaded."""
         self.contract_distribution.cancel()
+        for task in self._photo_tasks:
+            task.cancel()
+        await self.photo_cache.close()
+        shutdown_executor()
+        if self.worker is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.worker.stop)
+
+    def tracked_structures(self):
+        """In-memory structures reported by the memory diagnostics."""
+        return {
+            'last_photos': self.last_photos,
+            'contracts': self.contracts,
+            'hunters': self.hunters,
+            'photo_cache': self.photo_cache.entries,
+        }
+
+    def metrics(self):
+        """Counters reported by the !metrics command."""
+        metrics = {f'photo_cache.{name}': value for name, value in self.photo_cache.stats().items()}
+        metrics.update({f'contract_cards.{name}': value for name, value in self.cards.stats().items()})
+        return metrics
+
+    def _reset_contracts(self, target_pool: List[int], new_player_ids: Set[int]) -> None:
+        """Start a new contract cycle with the given targetable players."""
+        self.cycle += 1
+        self.contracts.clear()
+        self.hunters.clear()
+        self.new_player_targets.clear()
+        self.new_player_ids = set(new_player_ids)
+        self.target_pool = list(target_pool)
+        self._pool_positions = {target_id: position for position, target_id in enumerate(self.target_pool)}
+
+    def _record_contract(self, hunter_id: int, target_id: int) -> None:
+        """Record that a hunter holds a contract on a target, replacing any previous contract."""
+        self._drop_contract(hunter_id)
+        self.contracts[hunter_id] = target_id
+        self.hunters.setdefault(target_id, set()).add(hunter_id)
+        if hunter_id in self.new_player_ids:
+            self.new_player_targets[target_id] = hunter_id
+
+    def _drop_contract(self, hunter_id: int) -> None:
+        target_id = self.contracts.pop(hunter_id, None)
+        if target_id is None:
+            return
+        if self.new_player_targets.get(target_id) == hunter_id:
+            del self.new_player_targets[target_id]
+        hunters = self.hunters.get(target_id)
+        if hunters is not None:
+            hunters.discard(hunter_id)
+            if not hunters:
+                del self.hunters[target_id]
+
+    def _remove_from_pool(self, target_id: int) -> None:
+        """Remove a target from the pool in O(1) by swapping it with the last entry."""
+        position = self._pool_positions.pop(target_id, None)
+        if position is None:
+            return
+        last = self.target_pool.pop()
+        if last != target_id:
+            self.target_pool[position] = last
+            self._pool_positions[last] = position
+
+    def _is_valid_target(self, hunter_id: int, target_id: int, allow_repeat: bool = False) -> bool:
+        if target_id == hunter_id:
+            return False
+        if not allow_repeat and self.history.was_recent(self.history.dense(hunter_id), self.history.dense(target_id)):
+            return False
+        if hunter_id in self.new_player_ids:
+            # new players must not share a target with another new player
+            return target_id not in self.new_player_targets
+        return True
+
+    def _pick_replacement_target(self, hunter_id: int) -> Optional[int]:
+        """Pick a new target for a hunter, in expected O(1) while the pool is not saturated."""
+        if not self.target_pool:
+            return None
+        for _ in range(REASSIGN_ATTEMPTS):
+            target_id = random.choice(self.target_pool)
+            if self._is_valid_target(hunter_id, target_id):
+                return target_id
+        candidates = [t for t in self.target_pool if self._is_valid_target(hunter_id, t)]
+        if not candidates:
+            # settle for one of the hunter's recent targets rather than leaving them without a contract
+            candidates = [t for t in self.target_pool if self._is_valid_target(hunter_id, t, allow_repeat=True)]
+        return random.choice(candidates) if candidates else None
+
+    def _scheduler(self, guild_id: int) -> DistributionScheduler:
+        scheduler = self.schedulers.get(guild_id)
+        if scheduler is None:
+            scheduler = self.schedulers[guild_id] = DistributionScheduler(CONTRACT_FREQ)
+        return scheduler
+
+    @staticmethod
+    def _pool_category(state: Optional[PlayerState]) -> Optional[str]:
+        """The part of the contract pool a player in the given state belongs to, if any."""
+        if state == PlayerState.ACTIVE_MEMBER:
+            return 'active'
+        if state == PlayerState.NEW_MEMBER:
+            return 'new'
+        return None
+
+    @commands.Cog.listener()
+    async def on_member_state_change(self, member, before, after):
+        """
+        Track pool churn for the scheduler and reassign the hunters of a player who can no longer be
+        targeted (e.g. was eliminated).
+
+        Only the affected hunters are reassigned and messaged, the rest of the cycle's contracts are untouched.
+        Reassignment waits for a distribution in flight, whose contracts would otherwise replace it.
+        """
+        if before is not None:
+            # members without a previous state are being loaded at startup, not changing
+            self._scheduler(member.guild.id).record_change(member.id, self._pool_category(before),
+                                                           self._pool_category(after))
+
+        if before != PlayerState.ACTIVE_MEMBER or after == PlayerState.ACTIVE_MEMBER:
+            return
+        in_flight = self._in_flight.get(member.guild.id)
+        if in_flight is not None:
+            # the run may have handed out contracts on this member, reassign them once it has recorded them
+            await asyncio.shield(in_flight)
+        if not self.contracts:
+            return
+
+        self._remove_from_pool(member.id)
+        if after not in (PlayerState.ACTIVE_MEMBER, PlayerState.NEW_MEMBER):
+            # players out of the game don't hunt either
+            self._drop_contract(member.id)
+            self.new_player_ids.discard(member.id)
 
-    @tasks.loop(minutes=CONTRACT_FREQ)
+        affected = list(self.hunters.get(member.id, ()))
+        if not affected:
+            return
+
+        with tracing.start_trace('reassign_contracts', target_id=member.id, hunters=len(affected)):
+            print(f"Reassigning {len(affected)} contracts on {member.display_name} ({after.value})")
+            cycle = self.cycle
+            for hunter_id in affected:
+                if self.cycle != cycle:
+                    # a new distribution started while contracts were being sent, it replaces them all
+                    break
+                self._drop_contract(hunter_id)
+                hunter = member.guild.get_member(hunter_id)
+                if hunter is None:
+                    continue
+                target_id = self._pick_replacement_target(hunter_id)
+                target = member.guild.get_member(target_id) if target_id is not None else None
+                if target is None:
+                    print(f"No replacement target for {hunter.display_name}")
+                    continue
+                self._record_contract(hunter_id, target_id)
+                self.history.record(self.history.dense(hunter_id), self.history.dense(target_id))
+                # the cycle's cards carry the distribution time, a reassigned contract is issued now
+                await self.send_contract(hunter, target, reuse_card=False)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Re-render a target's contract card when their name changes."""
+        if before.display_name != after.display_name:
+            self.cards.invalidate(after.id)
+
+    @tasks.loop(minutes=1)
     async def contract_distribution(self):
         """
-        Every two hours, collect all members with 'Active Player' role,
-        generate hit contracts, and distribute them to players.
+        Ask the scheduler whether a distribution is due. Runs are scheduled CONTRACT_FREQ minutes after the
+        last completed run, start early when the player pool churned and are deferred when nothing changed.
         """
-        print("Starting contract distribution...")
-
-        # Get the guild
+        if not self.bot.guilds:
+            return
         guild = self.bot.guilds[0]  # Assuming the bot is only in one guild
-        if not guild:
-            print("No guild found")
+        if guild.id in self._in_flight:
             return
+        scheduler = self._scheduler(guild.id)
+        previous_decision = scheduler.last_decision
+        should_run, reason = scheduler.decide()
+        if should_run:
+            print(f"Contract distribution due: {reason}")
+            await self.distribute(guild, f'timer: {reason}')
+        elif reason.startswith('no change') and reason != previous_decision:
+            print(f"Contract distribution skipped: {reason}")
+
+    async def distribute(self, guild: discord.Guild, trigger: str) -> DistributionRun:
+        """
+        Run a contract distribution for a guild, or join the one already in flight.
+
+        Distribution is single-flight per guild: concurrent callers all wait on the same run,
+        so players never receive two conflicting contracts.
+
+        Args:
+            guild: The guild to distribute contracts in
+            trigger: What asked for the distribution, e.g. 'timer' or 'manual'
+
+        Returns:
+            The completed run
+        """
+        task = self._in_flight.get(guild.id)
+        if task is None:
+            run = DistributionRun(guild.id, [trigger])
+            self.current_runs[guild.id] = run
+            task = asyncio.create_task(self._run_distribution(guild, run), name=f'contract-distribution-{guild.id}')
+            self._in_flight[guild.id] = task
+        else:
+            self.current_runs[guild.id].triggers.append(trigger)
+            print(f"Contract distribution already in progress, {trigger} trigger joins it")
+        # shield the run so a cancelled caller doesn't abort it for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    async def _run_distribution(self, guild: discord.Guild, run: DistributionRun) -> DistributionRun:
+        try:
+            with tracing.start_trace('contract_distribution', guild_id=guild.id, triggers=','.join(run.triggers)):
+                run.outcome = await self._distribute_contracts(guild, run)
+        except Exception as e:
+            run.outcome = f"failed: {e}"
+            print(f"Contract distribution failed: {e}")
+        finally:
+            run.finished_at = time.time()
+            run.phase = 'done'
+            # the next scheduled run is relative to this one's completion
+            self._scheduler(guild.id).completed(run.players, run.finished_at)
+            self.last_runs[guild.id] = run
+            self.current_runs.pop(guild.id, None)
+            self._in_flight.pop(guild.id, None)
+        return run
+
+    async def _distribute_contracts(self, guild: discord.Guild, run: DistributionRun) -> str:
+        """
+        Collect all members with 'Active Player' or 'New Player' role,
+        generate hit contracts, and distribute them to players.
+
+        Returns:
+            A short description of the outcome
+        """
+        print("Starting contract distribution...")
 
         # Get the role management cog to access the role manager
         role_management_cog = self.bot.get_cog("RoleManagement")
         if not role_management_cog:
             print("RoleManagement cog not found")
-            return
+            return "RoleManagement cog not found"
 
         # Get the pledge-and-surety channel
-        pledge_channel = discord.utils.get(guild.channels, name="pledge-and-surety")
+        pledge_channel = discord.utils.get(guild.channels, name=PLEDGE_CHANNEL)
         if not pledge_channel:
             print("pledge-and-surety channel not found")
-            return
+            return "pledge-and-surety channel not found"
 
         # Update the last photos dictionary
-        await self.update_last_photos(pledge_channel)
+        run.phase = 'updating photos'
+        with tracing.span('update_last_photos'):
+            await self.update_last_photos(pledge_channel)
 
         # Get all active players
+        run.phase = 'collecting players'
+        scheduler = self._scheduler(guild.id)
+        scheduler.started()
         active_players = []
         new_players = []
 
@@ -70,13 +342,16 @@ class ContractBroker(commands.Cog):
                 if member and not member.bot and member_id in self.last_photos:
                     new_players.append(member)
 
+        run.players = len(active_players) + len(new_players)
+
         # If there are not enough players, don't distribute contracts
-        if len(active_players) + len(new_players) < 2:
+        if run.players < 2:
             print("Not enough players for contract distribution")
-            return
+            return "not enough players"
 
         # Generate and distribute contracts
-        await self.generate_and_distribute_contracts(active_players, new_players)
+        await self.generate_and_distribute_contracts(active_players, new_players, run)
+        return "completed"
 
     async def update_last_photos(self, channel):
         """
@@ -86,111 +361,318 @@ class ContractBroker(commands.Cog):
 
         # Create a temporary dictionary to track the most recent photo for each member
         member_photos = {}
+        unchecked = []  # (message, attachment, cache) of photos to hash or cache, newest first
 
-        # Get the most recent messages with attachments
-        async for message in channel.history(limit=1000):
+        # Get the most recent messages with attachments, one page at a time through the REST scheduler
+        # so a long backfill never holds up role changes or confirmations
+        async for message in self._history(channel, limit=1000):
             if message.attachments:
                 for attachment in message.attachments:
                     if attachment.content_type and attachment.content_type.startswith('image/'):
                         # Always store the most recent photo (messages are retrieved newest first)
-                        if message.author.id not in member_photos:
+                        latest = message.author.id not in member_photos
+                        if latest:
                             member_photos[message.author.id] = attachment.url
                             print(f"Found photo for {message.author.display_name}")
+                        # hash every pledge photo once so later photos can be checked against it,
+                        # and cache each member's latest photo, from a single download
+                        cache = latest and not self.photo_cache.has(message.author.id, attachment.url)
+                        if cache or attachment.id not in self.duplicate_detector.hashed:
+                            unchecked.append((message, attachment, cache))
                         break
+        if unchecked:
+            unchecked.reverse()
+            task = asyncio.create_task(self._backfill_pledge_photos(unchecked))
+            self._photo_tasks.add(task)
+            task.add_done_callback(self._photo_tasks.discard)
 
         # Update the last_photos dictionary with the new data
         self.last_photos.update(member_photos)
+        self.photos_version += 1
         print(f"Updated photos for {len(member_photos)} members")
 
-    async def generate_and_distribute_contracts(self, active_players: Member, new_players: Member):
-        """
-        Generate hit contracts and distribute them to players.
+    @staticmethod
+    async def _history(channel, limit: int, page_size: int = 100):
+        """Iterate over a channel's messages, newest first, fetching each page as a backfill request."""
+        before = None
+        remaining = limit
+        while remaining > 0:
+            page = await rest_scheduler.submit(
+                Priority.BACKFILL, f'history:{channel.id}',
+                partial(_fetch_page, channel, min(page_size, remaining), before))
+            for message in page:
+                yield message
+            if len(page) < min(page_size, remaining):
+                return
+            remaining -= len(page)
+            before = page[-1]
 
-        Rules:
-        1. Members should not receive themselves as targets
-        2. Contracts can be shared by more than one player
-        3. New players should have unique hit contract targets
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Index new pledge photos as they are posted."""
+        if message.author.bot or not message.guild or message.channel.name != PLEDGE_CHANNEL:
+            return
+        for attachment in message.attachments:
+            if attachment.content_type and attachment.content_type.startswith('image/'):
+                self.last_photos[message.author.id] = attachment.url
+                self.photos_version += 1
+                self.cards.invalidate(message.author.id)
+                self._schedule_photo_check(message, attachment, cache=True)
+                break
+
+    def _schedule_photo_check(self, message, attachment, cache: bool = False) -> None:
+        task = asyncio.create_task(self._check_pledge_photo(message, attachment, cache))
+        self._photo_tasks.add(task)
+        task.add_done_callback(self._photo_tasks.discard)
+
+    async def _check_pledge_photo(self, message, attachment, cache: bool = False) -> None:
         """
-        print(f"Generating contracts for {len(active_players)} active players and {len(new_players)} new players...")
+        Hash a pledge photo off the event loop and alert the admins if it matches an earlier one.
 
-        # Create a pool of all potential targets
-        target_pool = active_players
-
-        # Shuffle the players to randomize targets
-        random.shuffle(target_pool)
+        Args:
+            cache: Also store the photo in the photo cache, as the author's current contract photo
+        """
+        value = await self._hash_pledge_photo(message, attachment, cache)
+        if value is not None:
+            await self._index_pledge_photo(message, attachment, value)
 
-        # Assign unique targets to new players first
-        new_player_targets = {}
-        available_targets = target_pool.copy()
+    async def _backfill_pledge_photos(self, photos: List[tuple]) -> None:
+        """
+        Hash and cache photos found in the channel history, oldest first.
 
-        for new_player in new_players:
-            if not available_targets:
-                print("Not enough targets for new players")
-                return
+        Downloads and hashing run concurrently, but photos are indexed in the order they were posted so a
+        duplicate alert always names the earlier photo as the original.
+        """
+        hashing = [asyncio.create_task(self._hash_pledge_photo(message, attachment, cache))
+                   for message, attachment, cache in photos]
+        try:
+            for (message, attachment, _), task in zip(photos, hashing):
+                value = await task
+                if value is not None:
+                    await self._index_pledge_photo(message, attachment, value)
+        finally:
+            for task in hashing:
+                task.cancel()
+
+    async def _hash_pledge_photo(self, message, attachment, cache: bool) -> Optional[int]:
+        """
+        Download a pledge photo, cache it if asked and hash it unless it was hashed before.
 
-            # Assign a random target
-            target = random.choice(available_targets)
-            new_player_targets[new_player.id] = target
+        Returns:
+            The photo's hash, or None if it was already hashed or could not be processed
+        """
+        try:
+            async with self._photo_semaphore:
+                data = await attachment.read()
+                value = None
+                if attachment.id not in self.duplicate_detector.hashed:
+                    value = await self.duplicate_detector.hash(data)
+                if cache:
+                    try:
+                        await self.photo_cache.store(message.author.id, attachment.url, data)
+                        self.cards.invalidate(message.author.id)
+                    except asyncio.CancelledError:
+                        if asyncio.current_task().cancelling():
+                            raise
+                        # the store was superseded by a newer photo of the member, the hash still counts
+        except (discord.HTTPException, OSError, ValueError) as e:
+            print(f"Could not process pledge photo of {message.author.display_name}: {e}")
+            return None
+        return value
+
+    async def _index_pledge_photo(self, message, attachment, value: int) -> None:
+        record = PhotoRecord(message.author.id, message.id, message.channel.id, attachment.url)
+        matches = self.duplicate_detector.add(attachment.id, value, record)
+        if matches:
+            await self._alert_duplicate_photo(message, matches)
+
+    def _schedule_photo_download(self, member, url: str) -> None:
+        """Download a photo that is missing from the photo cache, e.g. after it was evicted."""
+        task = asyncio.create_task(self._download_photo(member, url))
+        self._photo_tasks.add(task)
+        task.add_done_callback(self._photo_tasks.discard)
+
+    async def _download_photo(self, member, url: str) -> None:
+        try:
+            async with self._photo_semaphore:
+                await self.photo_cache.store(member.id, url)
+            # the card was rendered with the photo URL, switch it to the cached file
+            self.cards.invalidate(member.id)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as e:
+            print(f"Could not cache photo of {member.display_name}: {e}")
+
+    async def _alert_duplicate_photo(self, message, matches: List[Tuple[int, PhotoRecord]]) -> None:
+        lines = []
+        for distance, match in matches[:5]:
+            owner = message.guild.get_member(match.owner_id)
+            owner_name = owner.mention if owner else f"a former member ({match.owner_id})"
+            kind = "reused" if match.owner_id == message.author.id else "shared with"
+            link = f"https://discord.com/channels/{message.guild.id}/{match.channel_id}/{match.message_id}"
+            lines.append(f"{kind} {owner_name}: {link} ({distance} bits apart)")
+        text = f"⚠️ Pledge photo by {message.author.mention} ({message.jump_url}) matches earlier photos:\n" + '\n'.join(lines)
+        print(text)
+
+        channel = discord.utils.get(message.guild.text_channels, name=DUPLICATE_ALERT_CHANNEL)
+        if channel is None:
+            print(f"{DUPLICATE_ALERT_CHANNEL} channel not found, duplicate photo alert only logged")
+            return
+        try:
+            await rest_scheduler.submit(Priority.DM, f'channel:{channel.id}',
+                                        partial(channel.send, text, allowed_mentions=discord.AllowedMentions.none()))
+        except discord.HTTPException as e:
+            print(f"Could not send duplicate photo alert: {e}")
 
-            # Remove the target from available targets to ensure uniqueness
-            available_targets.remove(target)
+    async def generate_and_distribute_contracts(self, active_players: List[Member], new_players: List[Member],
+                                                run: Optional[DistributionRun] = None):
+        """
+        Generate hit contracts and distribute them to players.
 
-        # Assign targets to active players (can be shared)
-        active_player_targets = {}
+        Targets are assigned by assign_contracts, which keeps new players' targets unique, avoids each
+        hunter's recent targets and balances how often players are targeted.
+        """
+        print(f"Generating contracts for {len(active_players)} active players and {len(new_players)} new players...")
+        if self.worker is not None:
+            await self._distribute_in_worker(active_players, new_players, run)
+            return
 
-        for active_player in active_players:
-            # Create a list of potential targets (excluding self)
-            potential_targets = [p for p in target_pool if p.id != active_player.id]
+        players = {player.id: player for player in active_players + new_players}
+
+        # Shuffle the players to randomize the order in which hunters pick
+        random.shuffle(active_players)
+        random.shuffle(new_players)
+
+        if run:
+            run.phase = 'assigning targets'
+        with tracing.span('assign_contracts', players=len(players)):
+            result = assign_contracts(self.history,
+                                      [p.id for p in active_players],
+                                      [p.id for p in new_players],
+                                      exclude_new_player_targets=EXCLUDE_NEW_PLAYER_TARGETS)
+        if result.repeats:
+            print(f"{result.repeats} players had to get one of their recent targets again")
+        for player_id in result.unassigned:
+            print(f"No potential targets for {players[player_id].display_name}")
+
+        # Distribute contracts, every hunter of a target receives the same card
+        self._reset_contracts([p.id for p in active_players], {p.id for p in new_players})
+        self.cards.start_cycle()
+        builds = self.cards.builds
+        if run:
+            run.phase = 'sending contracts'
+            run.total = len(result.contracts)
+        for player_id, target_id in result.contracts.items():
+            self._record_contract(player_id, target_id)
+            await self.send_contract(players[player_id], players[target_id])
+            if run:
+                run.sent += 1
+        await self.photo_cache.save_index()
+        print(f"Rendered {self.cards.builds - builds} contract cards for {len(result.contracts)} contracts")
+
+    async def _distribute_in_worker(self, active_players: List[Member], new_players: List[Member],
+                                    run: Optional[DistributionRun] = None):
+        """
+        Hand the player pool to the contract worker process, which assigns the targets and sends the DMs.
 
-# TODO: remove targets given to new players
-            if not potential_targets:
-                print(f"No potential targets for {active_player.display_name}")
-                continue
+        Only the snapshot of the pool and the bookkeeping of the assigned contracts run on the event loop.
+        """
+        players = {player.id: player for player in active_players + new_players}
+        self.cards.start_cycle()
+        cards = {}
+        for target in active_players:
+            url, photo_path = self._contract_photo(target)
+            cards[target.id] = TargetCard(target.display_name, target.mention, url, photo_path)
+
+        def on_assigned(contracts: Dict[int, int]) -> None:
+            # mirror the contracts so reassignments and the contract history stay in sync with the worker
+            self._reset_contracts([p.id for p in active_players], {p.id for p in new_players})
+            for hunter_id, target_id in contracts.items():
+                self._record_contract(hunter_id, target_id)
+                self.history.record(self.history.dense(hunter_id), self.history.dense(target_id))
+            if run:
+                run.phase = 'sending contracts'
+                run.total = len(contracts)
+
+        def on_progress(sent: int) -> None:
+            if run:
+                run.sent = sent
+
+        if run:
+            run.phase = 'assigning targets'
+        with tracing.span('contract_worker', players=len(players)):
+            result = await self.worker.distribute([p.id for p in active_players], [p.id for p in new_players], cards,
+                                                  self.cards.issued_at, self.history, EXCLUDE_NEW_PLAYER_TARGETS,
+                                                  DRY_RUN, on_assigned, on_progress)
+        if run:
+            run.sent = result.sent
+        if result.repeats:
+            print(f"{result.repeats} players had to get one of their recent targets again")
+        for player_id in result.unassigned:
+            print(f"No potential targets for {players[player_id].display_name}")
+        for player_id in result.failed:
+            print(f"Could not send DM to {players[player_id].display_name}")
+        # the cards looked up cached photos, keep their LRU order
+        await self.photo_cache.save_index()
+        print(f"Contract worker sent {result.sent - len(result.failed)}/{len(result.contracts)} contracts")
+
+    def _build_card(self, target, issued_at: datetime.datetime) -> Tuple[discord.Embed, Optional[str]]:
+        """
+        Render the contract card for a target.
 
-            # Assign a random target
-            target = random.choice(potential_targets)
-            active_player_targets[active_player.id] = target
+        Returns:
+            The embed, and the path of the cached photo to attach to it, if any
+        """
+        url, photo_path = self._contract_photo(target)
+        embed = build_contract_embed(target.display_name, target.mention, issued_at, url, photo_path is not None)
+        return embed, photo_path
 
-        # Distribute contracts
-        for player in target_pool:
-            target = None
-            if player.id in [p.id for p in new_players]:
-                target = new_player_targets.get(player.id)
-            else:
-                target = active_player_targets.get(player.id)
+    def _contract_photo(self, target) -> Tuple[Optional[str], Optional[str]]:
+        """
+        The target's photo for a contract. It is attached from the photo cache so it does not depend on an
+        attachment URL that may expire; the URL is the fallback while the photo is not cached yet.
 
-            if target:
-                await self.send_contract(player, target)
+        Returns:
+            The photo URL and the path of the cached photo, either may be None
+        """
+        url = self.last_photos.get(target.id)
+        if not url:
+            return None, None
+        photo_path = self.photo_cache.get(target.id, url)
+        if photo_path is None:
+            self._schedule_photo_download(target, url)
+        return url, photo_path
+
+    async def send_contract(self, player, target, reuse_card: bool = True):
+        """
+        Send a hit contract to a player.
 
-    async def send_contract(self, player, target):
-        """Send a hit contract to a player."""
-        try:
-            # Create an embed for the contract
-            embed = discord.Embed(
-                title="🎯 New Hit Contract",
-                description=f"Your new target has been assigned.",
-                color=discord.Color.red()
-            )
-
-            # Add target information
-            embed.add_field(name="Target Name", value=target.display_name, inline=True)
-            embed.add_field(name="Discord Tag", value=target.mention, inline=True)
-
-            # Add the target's photo
-            if target.id in self.last_photos:
-                embed.set_image(url=self.last_photos[target.id])
-
-            # Add timestamp
-            embed.set_footer(text=f"Contract issued at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-            # Send the contract via DM
-            await player.send(embed=embed)
-            print(f"Sent contract to {player.display_name} targeting {target.display_name}")
-
-        except discord.Forbidden:
-            print(f"Could not send DM to {player.display_name}")
-        except Exception as e:
-            print(f"Error sending contract to {player.display_name}: {str(e)}")
+        Args:
+            player: The hunter
+            target: The hunter's target
+            reuse_card: Use the target's card of the current cycle, rendering it on first use
+        """
+        with tracing.span('send_contract', player_id=player.id, target_id=target.id):
+            try:
+                if reuse_card:
+                    embed, photo_path = self.cards.get(target.id, lambda: self._build_card(target, self.cards.issued_at))
+                else:
+                    embed, photo_path = self._build_card(target, datetime.datetime.now())
+
+                if DRY_RUN:
+                    print(f"[dry run] Contract for {player.display_name} targeting {target.display_name}")
+                    return
+
+                # Send the contract via DM, a discord.File can only be sent once so it is opened per hunter
+                if photo_path:
+                    send = partial(player.send, embed=embed, file=discord.File(photo_path, filename=CONTRACT_PHOTO_FILENAME))
+                else:
+                    send = partial(player.send, embed=embed)
+                await rest_scheduler.submit(Priority.DM, 'dm', send)
+                print(f"Sent contract to {player.display_name} targeting {target.display_name}")
+
+            except discord.Forbidden:
+                print(f"Could not send DM to {player.display_name}")
+            except Exception as e:
+                print(f"Error sending contract to {player.display_name}: {str(e)}")
 
     @contract_distribution.before_loop
     async def before_contract_distribution(self):
@@ -203,9 +685,48 @@ class ContractBroker(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def distribute_contracts_command(self, ctx):
         """Manually trigger contract distribution for testing purposes."""
-        await ctx.send("Manually triggering contract distribution...")
-        await self.contract_distribution()
-        await ctx.send("Contract distribution completed.")
+        if ctx.guild.id in self._in_flight:
+            await ctx.send("A contract distribution is already in progress, waiting for it to finish...")
+        else:
+            await ctx.send("Manually triggering contract distribution...")
+        run = await self.distribute(ctx.guild, 'manual')
+        await ctx.send(f"Contract distribution finished: {run.describe()}")
+
+    @commands.command(name='contract_status', help='Show the progress of the current or last contract distribution')
+    @commands.has_permissions(administrator=True)
+    async def contract_status_command(self, ctx):
+        """Show the progress of the in-flight distribution, or a summary of the last one."""
+        run = self.current_runs.get(ctx.guild.id)
+        if run:
+            await ctx.send(f"Contract distribution in progress: {run.describe()}")
+            return
+        last_run = self.last_runs.get(ctx.guild.id)
+        if last_run is None:
+            await ctx.send("No contract distribution has run yet.")
+            return
+        scheduler = self._scheduler(ctx.guild.id)
+        await ctx.send(f"Last contract distribution: {last_run.describe()}\n"
+                       f"Player pool changes since then: {scheduler.churn}/{scheduler.churn_needed} needed to distribute early\n"
+                       f"Scheduler: {scheduler.last_decision}")
+
+    @commands.command(name='contract_snapshot', help='Save the player pool for the offline contract simulator')
+    @commands.has_permissions(administrator=True)
+    async def contract_snapshot_command(self, ctx):
+        """Write the member states and photo availability to a file for ``python -m cogs.contracts.simulate``."""
+        role_management_cog = self.bot.get_cog("RoleManagement")
+        if not role_management_cog:
+            await ctx.send("RoleManagement cog not found")
+            return
+
+        players = [{'id': member_id, 'state': state.value, 'has_photo': member_id in self.last_photos}
+                   for member_id, state in role_management_cog.role_manager.member_states.items()]
+        with open(SNAPSHOT_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'guild_id': ctx.guild.id, 'players': players}, f)
+        await ctx.send(f"Saved {len(players)} players to `{SNAPSHOT_FILE}`")
+
+
+async def _fetch_page(channel, limit: int, before) -> list:
+    return [message async for message in channel.history(limit=limit, before=before)]
 
 
 async def setup(bot):
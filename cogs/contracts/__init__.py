@@ -0,0 +1,3 @@
+# Contracts package for the contract broker
+# This package contains the discord independent parts of contract distribution:
+# target assignment and per-player contract history.
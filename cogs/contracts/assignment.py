@@ -0,0 +1,141 @@
+import random
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .history import ContractHistory
+
+
+SAMPLE_ATTEMPTS = 16  # random draws per hunter before settling for a repeated target
+BALANCE_CHOICES = 2  # valid candidates compared per hunter, the least targeted one wins
+
+
+@dataclass
+class AssignmentResult:
+    """Outcome of one contract assignment round."""
+    contracts: Dict[int, int] = field(default_factory=dict)  # Maps hunter IDs to target IDs
+    repeats: int = 0  # contracts that had to reuse one of the hunter's recent targets
+    unassigned: List[int] = field(default_factory=list)  # hunters left without a target
+
+
+class _SwapPool:
+    """Dense target indices supporting O(1) random draws and O(1) removal."""
+
+    def __init__(self, members: Sequence[int], size: int):
+        self.members = array('i', members)
+        self.positions = array('i', [-1]) * size
+        for position, member in enumerate(self.members):
+            self.positions[member] = position
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, member: int) -> bool:
+        return self.positions[member] >= 0
+
+    def draw(self, rng) -> int:
+        return self.members[rng.randrange(len(self.members))]
+
+    def remove(self, member: int) -> None:
+        position = self.positions[member]
+        last = self.members.pop()
+        self.positions[member] = -1
+        if last != member:
+            self.members[position] = last
+            self.positions[last] = position
+
+
+def _choose(history: ContractHistory, hunter: int, pool: _SwapPool, load: array, rng) -> Tuple[Optional[int], bool]:
+    """
+    Draw a target for a hunter from the pool.
+
+    Up to SAMPLE_ATTEMPTS random candidates are drawn. Candidates among the hunter's recent targets are
+    skipped, and of the first BALANCE_CHOICES acceptable ones the least targeted wins (power of choices),
+    which evens out how often players are targeted without sorting anything. If every draw missed,
+    e.g. in a pool of the hunter and one other player, the pool is scanned instead.
+
+    Returns:
+        The chosen dense target index (None if the pool holds no one but the hunter) and whether it is a repeat
+    """
+    best = None
+    fallback = None
+    found = 0
+    for _ in range(SAMPLE_ATTEMPTS):
+        if not len(pool):
+            break
+        target = pool.draw(rng)
+        if target == hunter:
+            if len(pool) == 1:
+                break
+            continue
+        if history.was_recent(hunter, target):
+            if fallback is None:
+                fallback = target
+            continue
+        if best is None or (load[target], history.times_targeted[target]) < (load[best], history.times_targeted[best]):
+            best = target
+        found += 1
+        if found >= BALANCE_CHOICES:
+            break
+    if best is not None:
+        return best, False
+    if fallback is None:
+        # unlucky draws, rare enough that a linear scan doesn't change the cost of a round
+        candidates = [target for target in pool.members if target != hunter]
+        if not candidates:
+            return None, False
+        fresh = [target for target in candidates if not history.was_recent(hunter, target)]
+        best = min(fresh or candidates, key=lambda target: (load[target], history.times_targeted[target]))
+        return best, not fresh
+    return fallback, True
+
+
+def assign_contracts(history: ContractHistory, active_ids: Sequence[int], new_ids: Sequence[int],
+                     exclude_new_player_targets: bool = False, rng=random) -> AssignmentResult:
+    """
+    Assign a target to every player.
+
+    Rules:
+    1. Members should not receive themselves as targets
+    2. Contracts can be shared by more than one player
+    3. New players should have unique hit contract targets
+    4. Hunters should not get one of their last ``history.depth`` targets again, unless nothing else is left
+    5. Players should be targeted about equally often
+
+    Only active players can be targeted. Each hunter costs O(SAMPLE_ATTEMPTS * history.depth), so a round
+    is linear in the number of players.
+
+    Args:
+        history: Contract history, updated with the new contracts
+        active_ids: Member IDs of active players, they hunt and can be targeted
+        new_ids: Member IDs of new players, they hunt with unique targets
+        exclude_new_player_targets: Keep active players off the targets given to new players
+        rng: Random number generator
+
+    Returns:
+        AssignmentResult with the contracts by member ID
+    """
+    result = AssignmentResult()
+    active = [history.dense(member_id) for member_id in active_ids]
+    new = [history.dense(member_id) for member_id in new_ids]
+    size = len(history)
+    load = array('I', [0]) * size  # contracts on each player in this round
+
+    all_targets = _SwapPool(active, size)
+    free_targets = _SwapPool(active, size)  # targets not yet given to a new player
+
+    hunters = [(hunter, True) for hunter in new] + [(hunter, False) for hunter in active]
+    for hunter, is_new in hunters:
+        pool = free_targets if is_new or exclude_new_player_targets else all_targets
+        target, repeat = _choose(history, hunter, pool, load, rng)
+        if target is None:
+            result.unassigned.append(history.ids[hunter])
+            continue
+        if is_new:
+            free_targets.remove(target)
+        if repeat:
+            result.repeats += 1
+        load[target] += 1
+        history.record(hunter, target)
+        result.contracts[history.ids[hunter]] = history.ids[target]
+    return result
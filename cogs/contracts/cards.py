@@ -0,0 +1,47 @@
+import datetime
+from typing import Any, Callable, Dict, Optional
+
+
+class ContractCardCache:
+    """
+    Contract cards rendered once per target and reused for every hunter of that target.
+
+    A card is whatever the builder returns for a target, e.g. an embed and the path of the photo to attach.
+    The cache is cleared when a distribution starts, and a target's card is invalidated when the target's
+    name or photo changes, so a distribution builds O(targets) cards instead of O(hunters).
+    """
+
+    def __init__(self):
+        self.cards: Dict[int, Any] = {}  # Maps target IDs to their rendered card
+        self.issued_at = datetime.datetime.now()  # time shown on every card of the current distribution
+        self.builds = 0
+        self.reuses = 0
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def start_cycle(self, issued_at: Optional[datetime.datetime] = None) -> None:
+        """Drop every card, contracts of a new distribution carry its own issue time."""
+        self.cards.clear()
+        self.issued_at = issued_at or datetime.datetime.now()
+
+    def get(self, target_id: int, build: Callable[[], Any]) -> Any:
+        card = self.cards.get(target_id)
+        if card is None:
+            card = self.cards[target_id] = build()
+            self.builds += 1
+        else:
+            self.reuses += 1
+        return card
+
+    def invalidate(self, target_id: int) -> None:
+        self.cards.pop(target_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        renders = self.builds + self.reuses
+        return {
+            'cards': len(self.cards),
+            'builds': self.builds,
+            'reuses': self.reuses,
+            'reuse_rate': self.reuses / renders if renders else 0.0,
+        }
@@ -0,0 +1,40 @@
+import datetime
+from typing import Optional
+
+import discord
+
+
+CONTRACT_PHOTO_FILENAME = 'target.jpg'
+
+
+def build_contract_embed(target_name: str, target_mention: str, issued_at: datetime.datetime,
+                         photo_url: Optional[str] = None, attach_photo: bool = False) -> discord.Embed:
+    """
+    Render the embed of a hit contract.
+
+    Args:
+        target_name: Display name of the target
+        target_mention: Mention of the target
+        issued_at: Time shown as the contract's issue time
+        photo_url: URL of the target's photo, used when the photo is not attached
+        attach_photo: Show the photo attached to the message as CONTRACT_PHOTO_FILENAME instead of the URL
+    """
+    embed = discord.Embed(
+        title="🎯 New Hit Contract",
+        description=f"Your new target has been assigned.",
+        color=discord.Color.red()
+    )
+
+    # Add target information
+    embed.add_field(name="Target Name", value=target_name, inline=True)
+    embed.add_field(name="Discord Tag", value=target_mention, inline=True)
+
+    # Add the target's photo
+    if attach_photo:
+        embed.set_image(url=f'attachment://{CONTRACT_PHOTO_FILENAME}')
+    elif photo_url:
+        embed.set_image(url=photo_url)
+
+    # Add timestamp
+    embed.set_footer(text=f"Contract issued at {issued_at.strftime('%Y-%m-%d %H:%M:%S')}")
+    return embed
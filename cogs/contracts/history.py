@@ -0,0 +1,67 @@
+import os
+from array import array
+from typing import Dict, List
+
+
+CONTRACT_HISTORY = int(os.getenv('CONTRACT_HISTORY', 3))  # number of previous targets a hunter should not get again
+
+
+class ContractHistory:
+    """
+    Compact record of who hunted whom, over dense player indices.
+
+    Every member ID is mapped once to a dense index. Each player owns a fixed-size ring buffer of the
+    indices of its last ``depth`` targets inside one flat array, so a repeat check is O(depth) with no
+    per-player objects, and a per-player counter tracks how often each player has been targeted.
+    """
+
+    def __init__(self, depth: int = CONTRACT_HISTORY):
+        self.depth = min(max(depth, 0), 255)  # cursors are stored in single bytes
+        self.index: Dict[int, int] = {}  # Maps member IDs to dense indices
+        self.ids: List[int] = []  # Maps dense indices back to member IDs
+        self.recent = array('i')  # depth slots per player holding dense target indices, -1 when empty
+        self.cursor = array('B')  # next ring buffer slot to overwrite, per player
+        self.times_targeted = array('I')  # lifetime number of contracts on each player
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> 'ContractHistory':
+        """Independent copy, e.g. to hand to the contract worker while this one keeps being updated."""
+        other = ContractHistory(self.depth)
+        other.index = dict(self.index)
+        other.ids = list(self.ids)
+        other.recent = array('i', self.recent)
+        other.cursor = array('B', self.cursor)
+        other.times_targeted = array('I', self.times_targeted)
+        return other
+
+    def dense(self, member_id: int) -> int:
+        """Return the dense index of a member, allocating one on first sight."""
+        idx = self.index.get(member_id)
+        if idx is None:
+            idx = len(self.ids)
+            self.index[member_id] = idx
+            self.ids.append(member_id)
+            self.recent.extend([-1] * self.depth)
+            self.cursor.append(0)
+            self.times_targeted.append(0)
+        return idx
+
+    def was_recent(self, hunter: int, target: int) -> bool:
+        """Check if a target (dense index) is among the hunter's (dense index) last ``depth`` targets."""
+        start = hunter * self.depth
+        recent = self.recent
+        for slot in range(start, start + self.depth):
+            if recent[slot] == target:
+                return True
+        return False
+
+    def record(self, hunter: int, target: int) -> None:
+        """Record a contract between dense indices, evicting the hunter's oldest remembered target."""
+        self.times_targeted[target] += 1
+        if not self.depth:
+            return
+        position = self.cursor[hunter]
+        self.recent[hunter * self.depth + position] = target
+        self.cursor[hunter] = (position + 1) % self.depth
@@ -0,0 +1,125 @@
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+CONTRACT_CHURN_THRESHOLD = float(os.getenv('CONTRACT_CHURN_THRESHOLD', 0.1))  # fraction of the player pool that must change to distribute early
+CONTRACT_MIN_CHURN = int(os.getenv('CONTRACT_MIN_CHURN', 3))  # players that must change to distribute early, whatever the pool size
+CONTRACT_MIN_INTERVAL = int(os.getenv('CONTRACT_MIN_INTERVAL', 15))  # minutes between distributions, even under churn
+CONTRACT_MAX_DEFER = int(os.getenv('CONTRACT_MAX_DEFER', 3))  # scheduled cycles that may be skipped in a row when nothing changed
+
+
+@dataclass
+class DistributionRun:
+    """Progress of one contract distribution run, queryable while it is in flight."""
+    guild_id: int
+    triggers: List[str] = field(default_factory=list)  # what asked for this run, e.g. 'timer' or 'manual'
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    phase: str = 'starting'
+    players: int = 0  # players in the pool when contracts were assigned
+    sent: int = 0  # contracts delivered so far
+    total: int = 0  # contracts to deliver in this run
+    outcome: Optional[str] = None  # short description of how the run ended
+
+    @property
+    def in_flight(self) -> bool:
+        return self.finished_at is None
+
+    def describe(self) -> str:
+        end = self.finished_at if self.finished_at is not None else time.time()
+        text = f"{self.phase}, {self.sent}/{self.total} contracts sent, {end - self.started_at:.1f}s"
+        if self.outcome:
+            text += f" ({self.outcome})"
+        return f"{text}, triggered by {', '.join(self.triggers)}"
+
+
+class DistributionScheduler:
+    """
+    Decides when the next contract distribution should run, based on how much the player pool changed.
+
+    Changes are tracked per member against the pool category ('active', 'new' or None) the member had at
+    the last distribution, so a member who leaves and comes back counts as no change. A distribution runs
+    early once enough of the pool changed, and scheduled cycles are deferred while nothing changed.
+    """
+
+    def __init__(self, frequency: int, churn_threshold: float = CONTRACT_CHURN_THRESHOLD,
+                 min_churn: int = CONTRACT_MIN_CHURN, min_interval: int = CONTRACT_MIN_INTERVAL,
+                 max_defer: int = CONTRACT_MAX_DEFER):
+        self.frequency = frequency * 60
+        self.churn_threshold = churn_threshold
+        self.min_churn = min_churn
+        self.min_interval = min_interval * 60
+        self.max_defer = max_defer
+        self.last_completed: Optional[float] = None
+        self.next_due: Optional[float] = None
+        self.pool_size = 0
+        self.deferred = 0
+        self.changed: Dict[int, Optional[str]] = {}  # Maps changed member IDs to their category at the last distribution
+        self.last_decision = 'no distribution yet'
+
+    @property
+    def churn(self) -> int:
+        return len(self.changed)
+
+    @property
+    def churn_needed(self) -> int:
+        return max(self.min_churn, math.ceil(self.pool_size * self.churn_threshold))
+
+    def record_change(self, member_id: int, before: Optional[str], after: Optional[str]) -> None:
+        """Record a member moving between pool categories."""
+        if before == after:
+            return
+        original = self.changed.setdefault(member_id, before)
+        if original == after:
+            # back where it was at the last distribution
+            del self.changed[member_id]
+
+    def started(self) -> None:
+        """A distribution took its snapshot of the pool; changes from here on count towards the next one."""
+        self.changed.clear()
+
+    def completed(self, pool_size: int, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self.last_completed = now
+        self.next_due = now + self.frequency
+        self.pool_size = pool_size
+        self.deferred = 0
+
+    def decide(self, now: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        Decide whether a distribution should start now.
+
+        Returns:
+            Whether to distribute, and the reason for the decision
+        """
+        now = time.time() if now is None else now
+        if self.last_completed is None:
+            return self._decision(True, 'first distribution')
+
+        since_last = now - self.last_completed
+        if since_last < self.min_interval:
+            return self._decision(False, f'last distribution {since_last / 60:.0f}m ago, below the minimum interval')
+
+        if self.churn >= self.churn_needed:
+            return self._decision(True, f'{self.churn} players changed, threshold {self.churn_needed}')
+
+        if now < self.next_due:
+            return self._decision(False, f'{self.churn}/{self.churn_needed} players changed, '
+                                         f'next scheduled in {(self.next_due - now) / 60:.0f}m')
+
+        if self.churn == 0 and self.deferred < self.max_defer:
+            self.deferred += 1
+            self.next_due = now + self.frequency
+            return self._decision(False, f'no change in the player pool, deferred '
+                                         f'({self.deferred}/{self.max_defer})')
+
+        if self.churn == 0:
+            return self._decision(True, f'scheduled, maximum of {self.max_defer} deferrals reached')
+        return self._decision(True, f'scheduled, {self.churn} players changed')
+
+    def _decision(self, run: bool, reason: str) -> Tuple[bool, str]:
+        self.last_decision = reason
+        return run, reason
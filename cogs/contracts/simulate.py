@@ -0,0 +1,217 @@
+"""
+Offline contract distribution simulator.
+
+Runs many distribution rounds over a player pool without touching Discord and reports how each
+assignment policy performs. The pool is either synthetic or loaded from a snapshot written by
+the ``!contract_snapshot`` command.
+
+Usage:
+    python -m cogs.contracts.simulate --players 5000 --new-fraction 0.2 --rounds 20
+    python -m cogs.contracts.simulate --snapshot contract_snapshot.json --policies balanced balanced-exclusive
+"""
+import argparse
+import datetime
+import json
+import random
+import statistics
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .assignment import assign_contracts
+from .cards import ContractCardCache
+from .history import ContractHistory, CONTRACT_HISTORY
+
+
+ACTIVE = 'Active Member'
+NEW = 'New Member'
+
+
+@dataclass
+class Pool:
+    active: List[int]
+    new: List[int]
+
+
+@dataclass
+class PolicyReport:
+    """Metrics gathered over all rounds of one policy."""
+    name: str
+    times: List[float] = field(default_factory=list)  # seconds per assignment round
+    self_targets: int = 0
+    repeats: int = 0  # contracts on one of the hunter's last K targets
+    shared_new_targets: int = 0  # new players sharing a target with another new player
+    uncovered: List[float] = field(default_factory=list)  # fraction of targets with zero hunters, per round
+    max_hunters: List[int] = field(default_factory=list)  # most hunters on a single target, per round
+    starved_active: List[int] = field(default_factory=list)  # active hunters without a contract, per round
+    starved_new: List[int] = field(default_factory=list)  # new hunters without a contract, per round
+    times_targeted: Counter = field(default_factory=Counter)
+    contracts: List[int] = field(default_factory=list)  # contracts sent, per round
+    card_builds: List[int] = field(default_factory=list)  # contract cards rendered, per round
+    card_times: List[float] = field(default_factory=list)  # seconds spent rendering cards, per round
+
+
+def load_snapshot(path: str) -> Pool:
+    """Load a pool from a snapshot: {"players": [{"id": ..., "state": ..., "has_photo": ...}, ...]}."""
+    with open(path, encoding='utf-8') as f:
+        players = json.load(f)['players']
+    eligible = [p for p in players if p.get('has_photo', True)]
+    return Pool(active=[p['id'] for p in eligible if p['state'] == ACTIVE],
+                new=[p['id'] for p in eligible if p['state'] == NEW])
+
+
+def synthetic_pool(players: int, new_fraction: float, rng: random.Random) -> Pool:
+    ids = list(range(1, players + 1))
+    rng.shuffle(ids)
+    new_count = int(players * new_fraction)
+    return Pool(active=ids[new_count:], new=ids[:new_count])
+
+
+def legacy_policy(exclude_new_player_targets: bool) -> Callable:
+    """The original random.choice assignment, kept as the baseline to compare against."""
+
+    def assign(pool: Pool, rng: random.Random) -> Dict[int, int]:
+        target_pool = list(pool.active)
+        rng.shuffle(target_pool)
+        contracts = {}
+        available_targets = target_pool.copy()
+        for new_player in pool.new:
+            if not available_targets:
+                # the original gives up on the whole distribution here
+                return {}
+            target = rng.choice(available_targets)
+            contracts[new_player] = target
+            available_targets.remove(target)
+        taken = set(contracts.values()) if exclude_new_player_targets else set()
+        for active_player in pool.active:
+            potential_targets = [p for p in target_pool if p != active_player and p not in taken]
+            if potential_targets:
+                contracts[active_player] = rng.choice(potential_targets)
+        return contracts
+
+    return assign
+
+
+def balanced_policy(exclude_new_player_targets: bool, depth: int) -> Callable:
+    """The history-aware assignment used by the contract broker."""
+    history = ContractHistory(depth)
+
+    def assign(pool: Pool, rng: random.Random) -> Dict[int, int]:
+        active = list(pool.active)
+        new = list(pool.new)
+        rng.shuffle(active)
+        rng.shuffle(new)
+        return assign_contracts(history, active, new, exclude_new_player_targets, rng).contracts
+
+    return assign
+
+
+POLICIES: Dict[str, Callable[[int], Callable]] = {
+    'legacy': lambda depth: legacy_policy(False),
+    'legacy-exclusive': lambda depth: legacy_policy(True),
+    'balanced': lambda depth: balanced_policy(False, depth),
+    'balanced-exclusive': lambda depth: balanced_policy(True, depth),
+}
+
+
+def render_card(target: int, issued_at: datetime.datetime) -> dict:
+    """Stand-in for the contract embed, built the way discord.Embed.to_dict() lays it out."""
+    return {
+        'title': "🎯 New Hit Contract",
+        'description': "Your new target has been assigned.",
+        'fields': [{'name': "Target Name", 'value': f"Player {target}", 'inline': True},
+                   {'name': "Discord Tag", 'value': f"<@{target}>", 'inline': True}],
+        'image': {'url': "attachment://target.jpg"},
+        'footer': {'text': f"Contract issued at {issued_at.strftime('%Y-%m-%d %H:%M:%S')}"},
+    }
+
+
+def simulate(name: str, assign: Callable, pool: Pool, rounds: int, depth: int, seed: int) -> PolicyReport:
+    rng = random.Random(seed)
+    report = PolicyReport(name)
+    recent: Dict[int, deque] = {hunter: deque(maxlen=depth) for hunter in pool.active + pool.new}
+    new_players = set(pool.new)
+    cards = ContractCardCache()
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        contracts = assign(pool, rng)
+        report.times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        cards.start_cycle()
+        builds = cards.builds
+        for target in contracts.values():
+            cards.get(target, lambda: render_card(target, cards.issued_at))
+        report.card_times.append(time.perf_counter() - start)
+        report.card_builds.append(cards.builds - builds)
+        report.contracts.append(len(contracts))
+
+        hunters_per_target = Counter(contracts.values())
+        new_targets = Counter(target for hunter, target in contracts.items() if hunter in new_players)
+        report.shared_new_targets += sum(count - 1 for count in new_targets.values() if count > 1)
+        for hunter, target in contracts.items():
+            if hunter == target:
+                report.self_targets += 1
+            if target in recent[hunter]:
+                report.repeats += 1
+            recent[hunter].append(target)
+        report.times_targeted.update(contracts.values())
+
+        report.uncovered.append(sum(1 for t in pool.active if t not in hunters_per_target) / max(len(pool.active), 1))
+        report.max_hunters.append(max(hunters_per_target.values(), default=0))
+        report.starved_active.append(sum(1 for h in pool.active if h not in contracts))
+        report.starved_new.append(sum(1 for h in pool.new if h not in contracts))
+    return report
+
+
+def gini(values: List[int]) -> float:
+    """Gini coefficient: 0 when every player is targeted equally often, approaching 1 when a few take all."""
+    values = sorted(values)
+    total = sum(values)
+    if not values or total == 0:
+        return 0.0
+    weighted = sum((i + 1) * v for i, v in enumerate(values))
+    return (2 * weighted) / (len(values) * total) - (len(values) + 1) / len(values)
+
+
+def print_report(reports: List[PolicyReport], pool: Pool, rounds: int) -> None:
+    print(f"{len(pool.active)} active and {len(pool.new)} new players, {rounds} rounds\n")
+    header = (f"{'policy':<20}{'mean ms':>9}{'p95 ms':>9}{'self':>6}{'repeats':>9}{'shared new':>11}"
+              f"{'uncovered':>10}{'max hunters':>12}{'gini':>6}{'starved active':>15}{'starved new':>12}"
+              f"{'contracts':>10}{'cards':>7}{'card ms':>9}")
+    print(header)
+    print('-' * len(header))
+    for report in reports:
+        times = sorted(report.times)
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        targeted = [report.times_targeted[t] for t in pool.active]
+        print(f"{report.name:<20}{statistics.mean(times) * 1000:>9.1f}{p95 * 1000:>9.1f}"
+              f"{report.self_targets:>6}{report.repeats:>9}{report.shared_new_targets:>11}"
+              f"{statistics.mean(report.uncovered):>10.1%}{max(report.max_hunters):>12}{gini(targeted):>6.2f}"
+              f"{statistics.mean(report.starved_active):>15.1f}{statistics.mean(report.starved_new):>12.1f}"
+              f"{statistics.mean(report.contracts):>10.0f}{statistics.mean(report.card_builds):>7.0f}"
+              f"{statistics.mean(report.card_times) * 1000:>9.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate contract distribution rounds without sending any DMs.")
+    parser.add_argument('--snapshot', help="player snapshot written by !contract_snapshot")
+    parser.add_argument('--players', type=int, default=1000, help="size of the synthetic player pool")
+    parser.add_argument('--new-fraction', type=float, default=0.2, help="fraction of new players in the synthetic pool")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--history', type=int, default=CONTRACT_HISTORY, help="recent targets a hunter should not get again")
+    parser.add_argument('--policies', nargs='+', choices=sorted(POLICIES), default=['legacy', 'balanced', 'balanced-exclusive'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    pool = load_snapshot(args.snapshot) if args.snapshot else synthetic_pool(args.players, args.new_fraction, rng)
+    reports = [simulate(name, POLICIES[name](args.history), pool, args.rounds, args.history, args.seed)
+               for name in args.policies]
+    print_report(reports, pool, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
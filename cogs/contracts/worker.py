@@ -0,0 +1,252 @@
+"""
+Out-of-process contract assignment and delivery.
+
+With ``CONTRACT_WORKER=process`` the contract broker hands a snapshot of the eligible players and of its
+contract history to a worker process. The worker assigns targets against that history, which the broker
+updates with the assigned contracts as they are reported, and sends the DMs through a REST-only
+discord.py client (logged in with the bot token, without a gateway connection), so a large distribution
+no longer competes with gateway heartbeats and listeners for the bot's event loop. Assignments, progress
+and results are reported back over a queue.
+"""
+import asyncio
+import datetime
+import multiprocessing
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+import discord
+
+from .assignment import assign_contracts
+from .embeds import build_contract_embed, CONTRACT_PHOTO_FILENAME
+from .history import ContractHistory
+from ..rest.scheduler import scheduler as rest_scheduler, Priority
+
+
+CONTRACT_WORKER = os.getenv('CONTRACT_WORKER', 'inline')  # 'process' assigns and delivers contracts in a worker process
+PROGRESS_EVERY = 25  # contracts sent between progress reports
+POLL_INTERVAL = 1  # seconds between checks that the worker is still alive
+
+
+@dataclass
+class TargetCard:
+    """What the worker needs to render a target's contract card."""
+    name: str
+    mention: str
+    photo_url: Optional[str] = None
+    photo_path: Optional[str] = None  # cached photo on the shared filesystem
+
+
+@dataclass
+class DistributionJob:
+    """Snapshot of the player pool to distribute contracts to."""
+    job_id: int
+    active_ids: List[int]
+    new_ids: List[int]
+    cards: Dict[int, TargetCard]  # Maps target IDs to their card
+    issued_at: datetime.datetime
+    history: ContractHistory  # copy of the broker's contract history, so repeats are avoided across cycles
+    exclude_new_player_targets: bool = False
+    dry_run: bool = False
+
+
+@dataclass
+class JobResult:
+    job_id: int
+    contracts: Dict[int, int] = field(default_factory=dict)  # Maps hunter IDs to target IDs
+    repeats: int = 0
+    unassigned: List[int] = field(default_factory=list)
+    sent: int = 0
+    failed: List[int] = field(default_factory=list)  # hunters whose DM could not be delivered
+
+
+def _worker_main(token: str, jobs, results) -> None:
+    """Entry point of the worker process."""
+    try:
+        asyncio.run(_serve(token, jobs, results))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve(token: str, jobs, results) -> None:
+    client = discord.Client(intents=discord.Intents.none())
+    await client.login(token)  # REST only, the worker never connects to the gateway
+    dm_channels: Dict[int, int] = {}  # Maps member IDs to their DM channel ID
+    loop = asyncio.get_running_loop()
+    print("Contract worker ready")
+    try:
+        while True:
+            job = await loop.run_in_executor(None, jobs.get)
+            if job is None:
+                break
+            try:
+                results.put(('result', job.job_id, await _run_job(client, dm_channels, job, results)))
+            except Exception as e:
+                results.put(('error', job.job_id, f"{type(e).__name__}: {e}"))
+    finally:
+        await client.close()
+
+
+async def _run_job(client: discord.Client, dm_channels: Dict[int, int], job: DistributionJob,
+                   results) -> JobResult:
+    assignment = assign_contracts(job.history, job.active_ids, job.new_ids, job.exclude_new_player_targets)
+    result = JobResult(job.job_id, assignment.contracts, assignment.repeats, assignment.unassigned)
+    results.put(('assigned', job.job_id, assignment.contracts))
+
+    embeds: Dict[int, discord.Embed] = {}  # one card per target, shared by its hunters
+    for hunter_id, target_id in assignment.contracts.items():
+        card = job.cards[target_id]
+        embed = embeds.get(target_id)
+        if embed is None:
+            embed = embeds[target_id] = build_contract_embed(card.name, card.mention, job.issued_at, card.photo_url,
+                                                             card.photo_path is not None)
+        if job.dry_run:
+            print(f"[dry run] Contract for {hunter_id} targeting {card.name}")
+        else:
+            try:
+                channel_id = dm_channels.get(hunter_id)
+                if channel_id is None:
+                    data = await rest_scheduler.submit(Priority.DM, 'dm', partial(client.http.start_private_message, hunter_id))
+                    channel_id = dm_channels[hunter_id] = int(data['id'])
+                channel = client.get_partial_messageable(channel_id, type=discord.ChannelType.private)
+                if card.photo_path:
+                    send = partial(channel.send, embed=embed, file=discord.File(card.photo_path, filename=CONTRACT_PHOTO_FILENAME))
+                else:
+                    send = partial(channel.send, embed=embed)
+                await rest_scheduler.submit(Priority.DM, 'dm', send)
+            except (discord.HTTPException, OSError) as e:
+                print(f"Could not send contract to {hunter_id}: {e}")
+                result.failed.append(hunter_id)
+        result.sent += 1
+        if result.sent % PROGRESS_EVERY == 0:
+            results.put(('progress', job.job_id, result.sent))
+    return result
+
+
+class _PendingJob:
+    def __init__(self, future: asyncio.Future, on_assigned: Callable[[Dict[int, int]], None],
+                 on_progress: Callable[[int], None]):
+        self.future = future
+        self.on_assigned = on_assigned
+        self.on_progress = on_progress
+
+
+class ContractWorker:
+    """
+    Handle on the contract worker process, used from the bot's event loop.
+
+    The process is started on first use and restarted if it dies; a thread blocks on the result queue
+    and hands each message to the event loop.
+    """
+
+    def __init__(self, token: str):
+        self.token = token
+        self._context = multiprocessing.get_context('spawn')  # never fork the bot's event loop and sockets
+        self.process: Optional[multiprocessing.Process] = None
+        self._jobs = None
+        self._results = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[int, _PendingJob] = {}
+        self._next_job_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def start(self) -> None:
+        if self.alive:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._jobs = self._context.Queue()
+        self._results = self._context.Queue()
+        self.process = self._context.Process(target=_worker_main, name='contract-worker', daemon=True,
+                                             args=(self.token, self._jobs, self._results))
+        self.process.start()
+        threading.Thread(target=self._read_results, args=(self.process, self._results),
+                         name='contract-worker-results', daemon=True).start()
+        print(f"Started contract worker process {self.process.pid}")
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self._jobs.put(None)
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        self._results.put(None)
+        self.process = None
+
+    def _read_results(self, process: multiprocessing.Process, results) -> None:
+        while True:
+            try:
+                message = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if not process.is_alive():
+                    self._loop.call_soon_threadsafe(self._fail_pending, f"worker exited with code {process.exitcode}")
+                    return
+                continue
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._handle, message)
+
+    def _handle(self, message) -> None:
+        kind, job_id, payload = message
+        pending = self._pending.get(job_id)
+        if pending is None or pending.future.done():
+            return
+        if kind == 'assigned':
+            pending.on_assigned(payload)
+        elif kind == 'progress':
+            pending.on_progress(payload)
+        elif kind == 'result':
+            del self._pending[job_id]
+            pending.future.set_result(payload)
+        elif kind == 'error':
+            del self._pending[job_id]
+            pending.future.set_exception(RuntimeError(f"contract worker failed: {payload}"))
+
+    def _fail_pending(self, reason: str) -> None:
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError(f"contract worker failed: {reason}"))
+        self._pending.clear()
+
+    async def distribute(self, active_ids: List[int], new_ids: List[int], cards: Dict[int, TargetCard],
+                         issued_at: datetime.datetime, history: ContractHistory,
+                         exclude_new_player_targets: bool = False, dry_run: bool = False,
+                         on_assigned: Callable[[Dict[int, int]], None] = lambda contracts: None,
+                         on_progress: Callable[[int], None] = lambda sent: None) -> JobResult:
+        """
+        Have the worker assign and deliver contracts.
+
+        Args:
+            active_ids: Member IDs of active players
+            new_ids: Member IDs of new players
+            cards: Card of every active player, any of them can be a target
+            issued_at: Issue time shown on the contracts
+            history: The broker's contract history, copied into the job; record the assigned contracts
+                in it from ``on_assigned``
+            exclude_new_player_targets: Keep active players off the targets given to new players
+            dry_run: Assign contracts without sending any DMs
+            on_assigned: Called with the contracts once they are assigned, before delivery starts
+            on_progress: Called with the number of contracts sent so far
+
+        Returns:
+            The assigned contracts and the delivery outcome
+
+        Raises:
+            RuntimeError: If the worker reported an error or exited
+        """
+        self.start()
+        self._next_job_id += 1
+        job = DistributionJob(self._next_job_id, list(active_ids), list(new_ids), cards, issued_at, history.copy(),
+                              exclude_new_player_targets, dry_run)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[job.job_id] = _PendingJob(future, on_assigned, on_progress)
+        # pickling the snapshot happens on the queue's feeder thread, not on the event loop
+        self._jobs.put(job)
+        return await future
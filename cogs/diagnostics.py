@@ -0,0 +1,187 @@
+import asyncio
+import os
+import threading
+from functools import partial
+from typing import Dict, Tuple
+
+import discord
+from discord.ext import commands, tasks
+
+from .telemetry.profiler import SamplingProfiler, write_collapsed, MAX_PROFILE_SECONDS
+from .telemetry.memory import approx_sizeof, rss_bytes, discord_cache_sizes, TracemallocTracker, format_bytes
+from .rest.scheduler import scheduler as rest_scheduler
+
+
+MEMORY_REPORT_INTERVAL = int(os.getenv('MEMORY_REPORT_INTERVAL', 60))  # minutes
+MEMORY_TRACEMALLOC = os.getenv('MEMORY_TRACEMALLOC', '0') == '1'  # tracemalloc slows allocations, keep opt-in
+
+
+class Diagnostics(commands.Cog):
+    """Administrator commands for inspecting the live bot process."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._profile_lock = asyncio.Lock()
+        self.tracemalloc = TracemallocTracker()
+        # entry counts at the previous periodic report and at the previous !memreport, each diffs against its own
+        self._report_counts: Dict[str, int] = {}
+        self._command_counts: Dict[str, int] = {}
+        if MEMORY_TRACEMALLOC:
+            self.tracemalloc.start()
+        self.memory_report.start()
+
+    def cog_unload(self):
+        """Clean up when the cog is unloaded."""
+        self.memory_report.cancel()
+
+    def metrics(self):
+        """Counters reported by the !metrics command."""
+        return {f'rest.{name}': value for name, value in rest_scheduler.stats().items()}
+
+    def _structure_sizes(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Collect entry counts and approximate sizes of the in-memory structures of every loaded cog.
+
+        Cogs opt in by defining ``tracked_structures()`` returning a mapping of names to containers.
+        """
+        sizes = {}
+        for cog_name, cog in self.bot.cogs.items():
+            tracked = getattr(cog, 'tracked_structures', None)
+            if tracked is None:
+                continue
+            for name, structure in tracked().items():
+                sizes[f'{cog_name}.{name}'] = (len(structure), approx_sizeof(structure))
+        return sizes
+
+    @staticmethod
+    def _growth(sizes: Dict[str, Tuple[int, int]], previous_counts: Dict[str, int]) -> Dict[str, int]:
+        """Entry count growth since the previous report, making the current counts the new baseline."""
+        growth = {name: count - previous_counts.get(name, count) for name, (count, _) in sizes.items()}
+        previous_counts.clear()
+        previous_counts.update((name, count) for name, (count, _) in sizes.items())
+        return growth
+
+    @commands.command(name='profile', help='Sample the live process for N seconds and report the hottest functions')
+    @commands.has_permissions(administrator=True)
+    async def profile(self, ctx, seconds: int = 10):
+        """Run the sampling profiler over the live process and reply with the top hot functions."""
+        if seconds <= 0 or seconds > MAX_PROFILE_SECONDS:
+            await ctx.send(f"Please choose a duration between 1 and {MAX_PROFILE_SECONDS} seconds.")
+            return
+        if self._profile_lock.locked():
+            await ctx.send("A profile is already running, please wait for it to finish.")
+            return
+
+        async with self._profile_lock:
+            await ctx.send(f"Profiling for {seconds}s...")
+            loop = asyncio.get_running_loop()
+            profiler = SamplingProfiler(loop, threading.get_ident())
+            # the sampler blocks, so it runs in a worker thread while the loop keeps serving events
+            result = await loop.run_in_executor(None, profiler.run, seconds)
+            path = await loop.run_in_executor(None, write_collapsed, result)
+
+        busy = result.samples - result.idle_samples
+        embed = discord.Embed(
+            title="Profile Results",
+            description=f"{result.samples} loop samples over {seconds}s, "
+                        f"{busy / max(result.samples, 1):.0%} busy\nCollapsed stacks written to `{path}`",
+            color=discord.Color.orange()
+        )
+
+        hot = [f"`{self_count / max(busy, 1):6.1%}` self, `{total / max(busy, 1):6.1%}` total  {name[:80]}"
+               for name, self_count, total in result.top_functions(10)]
+        embed.add_field(name="Hot functions (event loop)", value='\n'.join(hot)[:1024] or "Loop was idle", inline=False)
+
+        busiest = [f"`{count / max(busy, 1):6.1%}` {name[:80]}" for name, count in result.task_counts.most_common(5)]
+        embed.add_field(name="Busiest tasks", value='\n'.join(busiest)[:1024] or "None", inline=False)
+
+        await ctx.send(embed=embed)
+
+    @tasks.loop(minutes=MEMORY_REPORT_INTERVAL)
+    async def memory_report(self):
+        """Periodically log the memory footprint so growth can be tracked across weeks of uptime."""
+        sizes = self._structure_sizes()
+        growth = self._growth(sizes, self._report_counts)
+        print(f"[memory] RSS {_format_rss()}")
+        for name, (count, size) in sorted(sizes.items(), key=lambda item: -item[1][1]):
+            print(f"[memory] {name}: {count} entries (+{growth[name]}), ~{format_bytes(size)}")
+        print(f"[memory] discord.py caches: {discord_cache_sizes(self.bot)}")
+        if self.tracemalloc.enabled:
+            diff = await asyncio.get_running_loop().run_in_executor(
+                None, partial(self.tracemalloc.diff, baseline='report'))
+            for site, size_diff, size in diff:
+                print(f"[memory] {site}: {format_bytes(size_diff)} since last report, {format_bytes(size)} total")
+
+    @memory_report.before_loop
+    async def before_memory_report(self):
+        """Wait until the bot is ready before starting the task."""
+        await self.bot.wait_until_ready()
+
+    @commands.command(name='memreport', help='Report the memory footprint of the bot\'s in-memory structures')
+    @commands.has_permissions(administrator=True)
+    async def memreport_command(self, ctx):
+        """Report entry counts and approximate sizes of in-memory structures and discord.py caches."""
+        sizes = self._structure_sizes()
+        growth = self._growth(sizes, self._command_counts)
+
+        embed = discord.Embed(
+            title="Memory Report",
+            description=f"Resident set size: {_format_rss()}",
+            color=discord.Color.orange()
+        )
+
+        structures = [f"{name}: {count} entries (+{growth[name]}), ~{format_bytes(size)}"
+                      for name, (count, size) in sorted(sizes.items(), key=lambda item: -item[1][1])]
+        embed.add_field(name="Bot structures", value='\n'.join(structures)[:1024] or "None", inline=False)
+
+        caches = [f"{name}: {count}" for name, count in discord_cache_sizes(self.bot).items()]
+        embed.add_field(name="discord.py caches", value='\n'.join(caches), inline=False)
+
+        if self.tracemalloc.enabled:
+            diff = await asyncio.get_running_loop().run_in_executor(
+                None, partial(self.tracemalloc.diff, baseline='command'))
+            sites = [f"`{format_bytes(size_diff):>9}` {site[-70:]}" for site, size_diff, _ in diff[:8]]
+            embed.add_field(name="Top allocation growth since last !memreport",
+                            value='\n'.join(sites)[:1024] or "No change", inline=False)
+        else:
+            embed.add_field(name="Allocation tracking", value="Set MEMORY_TRACEMALLOC=1 to enable", inline=False)
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name='metrics', help='Report the counters of every loaded cog')
+    @commands.has_permissions(administrator=True)
+    async def metrics_command(self, ctx):
+        """
+        Report the counters of every loaded cog.
+
+        Cogs opt in by defining ``metrics()`` returning a mapping of counter names to numbers.
+        """
+        embed = discord.Embed(title="Metrics", color=discord.Color.orange())
+        for cog_name, cog in self.bot.cogs.items():
+            metrics = getattr(cog, 'metrics', None)
+            if metrics is None:
+                continue
+            lines = [f"{name}: {_format_metric(name, value)}" for name, value in metrics().items()]
+            embed.add_field(name=cog_name, value='\n'.join(lines)[:1024] or "None", inline=False)
+        if not embed.fields:
+            embed.description = "No cog reports metrics."
+        await ctx.send(embed=embed)
+
+
+def _format_rss() -> str:
+    rss = rss_bytes()
+    return format_bytes(rss) if rss is not None else "unavailable"
+
+
+def _format_metric(name: str, value) -> str:
+    if name.endswith('bytes') or name.endswith('bytes_saved'):
+        return format_bytes(value)
+    if name.endswith('rate'):
+        return f"{value:.1%}"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+async def setup(bot):
+    await bot.add_cog(Diagnostics(bot))
@@ -0,0 +1,3 @@
+# Dice package for the bot
+# This package contains the dice notation parser and the roll evaluator behind
+# the !roll command, including batched sampling for very large dice pools.
@@ -0,0 +1,281 @@
+"""
+Dice notation parser and evaluator.
+
+Supported notation, any number of terms joined with + or -:
+    NdM     N dice with M faces (N defaults to 1, d% is d100)
+    NdM!    exploding dice: every die showing M is rolled again and added
+    kh/kl   keep the highest/lowest K dice, e.g. 4d6kh3 (k alone keeps the highest)
+    dh/dl   drop the highest/lowest K dice, e.g. 4d6dl1 (d alone drops the lowest)
+    K       a constant, e.g. 2d8+1d6+3
+
+Benchmark with:
+    python -m cogs.dice.engine --bench
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+from .sampling import roll_histogram
+
+
+DICE_MAX_DICE = int(os.getenv('DICE_MAX_DICE', 1000000))  # dice in one expression, before explosions
+DICE_MAX_WORK = int(os.getenv('DICE_MAX_WORK', 100000000))  # sum of dice x faces over the terms of one expression
+DICE_COOLDOWN = float(os.getenv('DICE_COOLDOWN', 3))  # seconds between two rolls of the same user
+MAX_FACES = 1000000
+MAX_TERMS = 20
+MAX_EXPLOSIONS = 100  # rounds of re-rolls of exploding dice
+DETAIL_DICE = 50  # pools up to this size are rolled die by die and every die is shown
+MESSAGE_LIMIT = 2000  # Discord's message length limit
+
+_TERM = re.compile(r'(?P<count>\d*)d(?P<faces>\d+|%)(?P<explode>!)?(?:(?P<keep>kh|kl|dh|dl|k|d)(?P<keep_count>\d*))?'
+                   r'|(?P<constant>\d+)')
+_KEEP_ALIASES = {'k': 'kh', 'd': 'dl'}
+
+
+class DiceError(ValueError):
+    """Raised for expressions that cannot be parsed or are too large to roll."""
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    sign: int
+    count: int
+    faces: int
+    explode: bool = False
+    keep: Optional[str] = None  # 'kh', 'kl', 'dh' or 'dl'
+    keep_count: int = 0
+    text: str = ''
+
+    def kept(self) -> Tuple[int, bool]:
+        """Number of dice kept, and whether they are the highest ones."""
+        if self.keep is None:
+            return self.count, True
+        n = min(self.keep_count, self.count)
+        return {'kh': (n, True), 'kl': (n, False), 'dh': (self.count - n, False), 'dl': (self.count - n, True)}[self.keep]
+
+
+@dataclass(frozen=True)
+class Constant:
+    sign: int
+    value: int
+
+
+Term = Union[DiceTerm, Constant]
+
+
+def parse(expression: str) -> List[Term]:
+    """
+    Parse a dice expression.
+
+    Raises:
+        DiceError: If the expression is malformed or exceeds the limits
+    """
+    text = ''.join(expression.lower().split())
+    if not text:
+        raise DiceError("Empty dice expression")
+    terms: List[Term] = []
+    position = 0
+    sign = 1
+    if text[0] in '+-':
+        sign = -1 if text[0] == '-' else 1
+        position = 1
+    while True:
+        match = _TERM.match(text, position)
+        if match is None or match.end() == position:
+            raise DiceError(f"Could not parse '{text[position:] or text}'")
+        if match.group('constant') is not None:
+            terms.append(Constant(sign, int(match.group('constant'))))
+        else:
+            count = int(match.group('count') or 1)
+            faces = 100 if match.group('faces') == '%' else int(match.group('faces'))
+            if count < 1 or faces < 1:
+                raise DiceError("Dice need at least one die and one face")
+            if faces > MAX_FACES:
+                raise DiceError(f"Dice can have at most {MAX_FACES} faces")
+            explode = match.group('explode') is not None
+            if explode and faces == 1:
+                raise DiceError("One-faced dice would explode forever")
+            keep = match.group('keep')
+            keep = _KEEP_ALIASES.get(keep, keep)
+            keep_count = int(match.group('keep_count') or 1) if keep else 0
+            terms.append(DiceTerm(sign, count, faces, explode, keep, keep_count, match.group(0)))
+        position = match.end()
+        if position == len(text):
+            break
+        if text[position] not in '+-':
+            raise DiceError(f"Expected + or - before '{text[position:]}'")
+        sign = -1 if text[position] == '-' else 1
+        position += 1
+
+    if len(terms) > MAX_TERMS:
+        raise DiceError(f"At most {MAX_TERMS} terms per roll")
+    dice = sum(term.count for term in terms if isinstance(term, DiceTerm))
+    if dice > DICE_MAX_DICE:
+        raise DiceError(f"At most {DICE_MAX_DICE} dice per roll")
+    # sampling costs grow with the number of faces as well as the number of dice
+    work = sum(term.count * term.faces for term in terms if isinstance(term, DiceTerm))
+    if work > DICE_MAX_WORK:
+        raise DiceError(f"Roll too large, dice x faces may add up to at most {DICE_MAX_WORK:,}")
+    return terms
+
+
+def rolls_in_bulk(terms: List[Term]) -> bool:
+    """Whether rolling the terms samples a large pool, which should not run on the event loop."""
+    return any(isinstance(term, DiceTerm) and term.count > DETAIL_DICE for term in terms)
+
+
+@dataclass
+class TermResult:
+    term: DiceTerm
+    total: int = 0
+    kept: Counter = field(default_factory=Counter)  # Maps die values to the number of kept dice showing them
+    rolls: Optional[List[int]] = None  # every die in roll order, only for small pools
+    dropped: Optional[List[bool]] = None  # whether each of ``rolls`` was dropped
+    explosions: int = 0  # extra dice rolled by exploding dice
+
+
+@dataclass
+class RollResult:
+    expression: str
+    terms: List[TermResult]
+    constant: int
+    total: int
+
+
+def _roll_small(term: DiceTerm, rng) -> TermResult:
+    result = TermResult(term, rolls=[])
+    for _ in range(term.count):
+        value = rng.randint(1, term.faces)
+        die = value
+        rounds = 0
+        while term.explode and value == term.faces and rounds < MAX_EXPLOSIONS:
+            value = rng.randint(1, term.faces)
+            die += value
+            rounds += 1
+        result.explosions += rounds
+        result.rolls.append(die)
+
+    keep, highest = term.kept()
+    order = sorted(range(len(result.rolls)), key=result.rolls.__getitem__, reverse=highest)
+    kept = set(order[:keep])
+    result.dropped = [i not in kept for i in range(len(result.rolls))]
+    result.kept = Counter(result.rolls[i] for i in kept)
+    return result
+
+
+def _roll_pool(term: DiceTerm, rng) -> TermResult:
+    result = TermResult(term)
+    histogram = roll_histogram(term.count, term.faces, rng)
+    if term.explode:
+        # a die that showed the top face ``depth`` times and then ``value`` totals faces * depth + value
+        chained = histogram.pop(term.faces, 0)
+        depth = 1
+        while chained and depth <= MAX_EXPLOSIONS:
+            result.explosions += chained
+            rerolls = roll_histogram(chained, term.faces, rng)
+            chained = rerolls.pop(term.faces, 0)
+            for value, dice in rerolls.items():
+                histogram[term.faces * depth + value] += dice
+            depth += 1
+        if chained:
+            histogram[term.faces * depth] += chained
+
+    keep, highest = term.kept()
+    if keep == term.count:
+        result.kept = histogram
+    else:
+        for value in sorted(histogram, reverse=highest):
+            taken = min(histogram[value], keep)
+            result.kept[value] = taken
+            keep -= taken
+            if not keep:
+                break
+    return result
+
+
+def roll(expression: str, rng=random) -> RollResult:
+    """
+    Parse and roll a dice expression.
+
+    Raises:
+        DiceError: If the expression is malformed or exceeds the limits
+    """
+    return roll_terms(expression, parse(expression), rng)
+
+
+def roll_terms(expression: str, terms: List[Term], rng=random) -> RollResult:
+    """Roll the already parsed terms of ``expression``."""
+    results = []
+    constant = 0
+    for term in terms:
+        if isinstance(term, Constant):
+            constant += term.sign * term.value
+            continue
+        result = _roll_small(term, rng) if term.count <= DETAIL_DICE else _roll_pool(term, rng)
+        result.total = term.sign * sum(value * dice for value, dice in result.kept.items())
+        results.append(result)
+    return RollResult(expression, results, constant, sum(r.total for r in results) + constant)
+
+
+def _describe_term(result: TermResult, detailed: bool) -> str:
+    term = result.term
+    label = f"{'-' if term.sign < 0 else ''}{term.text}"
+    explosions = f", {result.explosions} explosion{'s' if result.explosions > 1 else ''}" if result.explosions else ""
+    if detailed and result.rolls is not None:
+        dice = ', '.join(f"~~{value}~~" if dropped else str(value) for value, dropped in zip(result.rolls, result.dropped))
+        return f"{label}: [{dice}] = {result.total}{explosions}"
+
+    kept = sum(result.kept.values())
+    text = f"{label}: {result.total:,} from {kept:,} dice (mean {abs(result.total) / max(kept, 1):.2f}{explosions})"
+    if detailed and len(result.kept) <= 20:
+        text += '\n  ' + ' · '.join(f"{value}: {dice:,}" for value, dice in sorted(result.kept.items()))
+    elif result.kept:
+        text += f", lowest {min(result.kept)}, highest {max(result.kept)}"
+    return text
+
+
+def format_result(result: RollResult, limit: int = MESSAGE_LIMIT) -> str:
+    """Render a roll, summarizing large pools so the text fits in ``limit`` characters."""
+    for detailed in (True, False):
+        lines = [_describe_term(term, detailed) for term in result.terms]
+        if result.constant:
+            lines.append(f"{'+' if result.constant > 0 else '-'} {abs(result.constant)}")
+        lines.append(f"**Total: {result.total:,}**")
+        text = '\n'.join(lines)
+        if len(text) <= limit:
+            return text
+    return f"**Total: {result.total:,}** (breakdown too long to show)"
+
+
+def _benchmark(repeats: int) -> None:
+    expressions = ['1000000d6', '1000000d20', '1000000d6!', '1000000d6kh100', '1000000d100dl1000', '100d1000000',
+                   '4d6kh3+2d8+5']
+    for expression in expressions:
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = roll(expression)
+            times.append(time.perf_counter() - start)
+        print(f"{expression:<20} {statistics.median(times) * 1000:9.2f} ms median  (total {result.total:,})")
+
+    start = time.perf_counter()
+    sum(random.randint(1, 6) for _ in range(1000000))
+    print(f"{'baseline randint 1e6':<20} {(time.perf_counter() - start) * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Roll dice expressions, or benchmark the dice engine.")
+    parser.add_argument('expression', nargs='?')
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    if args.bench:
+        _benchmark(args.repeats)
+    else:
+        print(format_result(roll(args.expression or '1d6')))
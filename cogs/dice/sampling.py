@@ -0,0 +1,90 @@
+import random
+from collections import Counter
+from typing import Dict
+
+MAX_BYTE_FACES = 256  # dice with more faces than values of a byte are sampled one by one
+CHUNK = 1 << 22  # random bytes drawn at once, bounds the memory of a huge roll
+MAX_COUNT_PASSES = 32  # dice with more faces are tallied in a single pass instead of one bytes.count per face
+TALLY_SLICE = 1 << 16  # bytes tallied per Counter.update, lets other threads take the GIL in between
+
+
+def _byte_table(faces: int) -> bytes:
+    """
+    Translation table mapping a random byte to a face index, or to ``faces`` when it must be rejected.
+
+    Bytes at or above the largest multiple of ``faces`` that fits in a byte are rejected so every face
+    stays exactly equally likely.
+    """
+    limit = MAX_BYTE_FACES - MAX_BYTE_FACES % faces
+    return bytes(value % faces if value < limit else faces for value in range(MAX_BYTE_FACES))
+
+
+_tables: Dict[int, bytes] = {}
+
+
+def roll_histogram(count: int, faces: int, rng: random.Random = random) -> Counter:
+    """
+    Roll ``count`` dice with ``faces`` faces and return how many dice landed on each face.
+
+    Large pools are never rolled die by die:
+
+    - when the generator has ``binomialvariate`` (Python 3.12+), the face counts are drawn directly from
+      their multinomial distribution as a chain of binomials, in O(faces) whatever the number of dice
+    - otherwise dice with up to 256 faces are sampled in bulk: random bytes are mapped to face indices with
+      ``bytes.translate`` and tallied with ``bytes.count`` for up to 32 faces (one memchr-speed pass per
+      face), or in a single ``Counter`` pass for more faces
+    - larger dice fall back to ``random.choices``
+    """
+    histogram = Counter()
+    if count <= 0:
+        return histogram
+    if faces == 1:
+        histogram[1] = count
+        return histogram
+
+    binomial = getattr(rng, 'binomialvariate', None)
+    if binomial is not None and count >= faces:
+        remaining = count
+        for face in range(1, faces):
+            # of the dice not yet placed, each lands on this face with probability 1 / (faces left)
+            hits = binomial(remaining, 1 / (faces - face + 1))
+            if hits:
+                histogram[face] = hits
+                remaining -= hits
+            if not remaining:
+                return histogram
+        histogram[faces] = remaining
+        return histogram
+
+    if faces > MAX_BYTE_FACES or count < 64:
+        histogram.update(rng.choices(range(1, faces + 1), k=count))
+        return histogram
+
+    table = _tables.get(faces)
+    if table is None:
+        table = _tables[faces] = _byte_table(faces)
+    rejected = bytes([faces]) if MAX_BYTE_FACES % faces else None
+    remaining = count
+    while remaining:
+        # draw exactly what is missing and redraw for the rejected bytes, so no face is favoured
+        draw = min(remaining, CHUNK)
+        faces_drawn = rng.getrandbits(8 * draw).to_bytes(draw, 'little').translate(table)
+        if rejected is not None:
+            faces_drawn = faces_drawn.replace(rejected, b'')
+        remaining -= len(faces_drawn)
+        if faces > MAX_COUNT_PASSES:
+            tally = Counter()
+            for start in range(0, len(faces_drawn), TALLY_SLICE):
+                tally.update(faces_drawn[start:start + TALLY_SLICE])
+            for face, hits in tally.items():
+                histogram[face + 1] += hits
+            continue
+        placed = 0
+        for face in range(faces - 1):
+            hits = faces_drawn.count(face)
+            if hits:
+                histogram[face + 1] += hits
+                placed += hits
+        if len(faces_drawn) > placed:
+            histogram[faces] += len(faces_drawn) - placed
+    return histogram
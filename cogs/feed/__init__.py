@@ -0,0 +1,3 @@
+# Feed package for the bot
+# This package contains the discord independent parts of the kill feed:
+# buffering state changes per channel and rendering them as size-bounded digests.
@@ -0,0 +1,106 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+MESSAGE_LIMIT = 2000  # Discord's message length limit
+
+# Line format and plural noun of every kind of feed entry
+ENTRY_FORMATS = {
+    'eliminated': ("💀 {member} was eliminated", "eliminations"),
+    'returned': ("🔄 {member} is back in the game", "returns"),
+    'promoted': ("⬆️ {member} is now an active player", "promotions"),
+}
+
+
+@dataclass
+class FeedEntry:
+    kind: str  # one of ENTRY_FORMATS
+    member_id: int
+    member: str  # how the member is shown, e.g. a mention
+    killer: Optional[str] = None  # who made the kill, for eliminations
+
+    def render(self) -> str:
+        line = ENTRY_FORMATS[self.kind][0].format(member=self.member)
+        return f"{line} by {self.killer}" if self.killer else line
+
+
+def render_digest(entries: List[FeedEntry], title: str, limit: int = MESSAGE_LIMIT) -> Tuple[str, int]:
+    """
+    Render buffered entries as one message of at most ``limit`` characters.
+
+    Entries are listed in order while they fit; the rest are summarized by kind on a final line, so a
+    burst of any size still costs a single message.
+
+    Returns:
+        The message text, and the number of entries that were only summarized
+    """
+    lines = [title]
+    length = len(title)
+    for shown, entry in enumerate(entries):
+        line = entry.render()
+        # keep room for the summary line as long as there may be entries left to summarize
+        reserve = _summary_length(len(entries) - shown - 1) if shown + 1 < len(entries) else 0
+        if length + 1 + len(line) + reserve > limit:
+            lines.append(_summary(entries[shown:]))
+            return '\n'.join(lines), len(entries) - shown
+        lines.append(line)
+        length += 1 + len(line)
+    return '\n'.join(lines), 0
+
+
+def _summary(entries: List[FeedEntry]) -> str:
+    counts = Counter(entry.kind for entry in entries)
+    parts = ', '.join(f"{count} {ENTRY_FORMATS[kind][1]}" for kind, count in counts.items())
+    return f"…and {len(entries)} more: {parts}"
+
+
+def _summary_length(remaining: int) -> int:
+    """Upper bound of the length of the summary of ``remaining`` entries."""
+    digits = len(str(remaining))
+    return 1 + len(f"…and {remaining} more: ") + sum(digits + 2 + len(noun) + 1 for _, noun in ENTRY_FORMATS.values())
+
+
+class FeedBuffer:
+    """
+    Feed entries waiting for the next digest, per channel.
+
+    Eliminations stay indexed by victim until the flush, so the kill credit, which is dispatched right
+    after the transition, can be added to the entry.
+    """
+
+    def __init__(self):
+        self.entries: Dict[int, List[FeedEntry]] = {}  # Maps channel IDs to their pending entries
+        self._eliminations: Dict[int, Dict[int, FeedEntry]] = {}  # Maps channel IDs to pending eliminations by victim ID
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
+
+    def add(self, channel_id: int, entry: FeedEntry) -> bool:
+        """
+        Buffer an entry.
+
+        Returns:
+            True if it is the first pending entry of the channel, i.e. a flush must be scheduled
+        """
+        first = channel_id not in self.entries
+        self.entries.setdefault(channel_id, []).append(entry)
+        if entry.kind == 'eliminated':
+            self._eliminations.setdefault(channel_id, {})[entry.member_id] = entry
+        return first
+
+    def credit_kill(self, channel_id: int, victim_id: int, killer: str) -> bool:
+        """Name the killer on the victim's pending elimination, returns False if there is none."""
+        entry = self._eliminations.get(channel_id, {}).get(victim_id)
+        if entry is None:
+            return False
+        entry.killer = killer
+        return True
+
+    def drain(self, channel_id: int) -> List[FeedEntry]:
+        """Take every pending entry of a channel."""
+        self._eliminations.pop(channel_id, None)
+        return self.entries.pop(channel_id, [])
+
+    def channels(self) -> List[int]:
+        return list(self.entries)
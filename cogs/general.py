@@ -1,12 +1,48 @@
 import discord
 from discord.ext import commands
 
+from .caching.embeds import GuildEmbedCache, INFO_COOLDOWN_SECONDS
+
 
 class General(commands.Cog):
     """General commands for the bot."""
 
     def __init__(self, bot):
         self.bot = bot
+        # serverinfo embeds, rebuilt only after an event that changes what they show
+        self.server_info_cache = GuildEmbedCache()
+
+    def metrics(self):
+        """Counters reported by the !metrics command."""
+        return {f'serverinfo_cache.{name}': value for name, value in self.server_info_cache.stats().items()}
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        self.server_info_cache.invalidate(after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.server_info_cache.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.server_info_cache.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.server_info_cache.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.server_info_cache.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.server_info_cache.invalidate(member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.server_info_cache.invalidate(member.guild.id)
 
     @commands.command(name='info', help='Shows information about the bot')
     async def info(self, ctx):
@@ -26,10 +62,14 @@ class General(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.command(name='serverinfo', help='Shows information about the server')
+    @commands.cooldown(1, INFO_COOLDOWN_SECONDS, commands.BucketType.user)
     async def server_info(self, ctx):
         """Displays information about the current server."""
-        guild = ctx.guild
+        await ctx.send(embed=self.server_info_cache.get(ctx.guild.id, lambda: self._build_server_info(ctx.guild)))
 
+    @staticmethod
+    def _build_server_info(guild: discord.Guild) -> discord.Embed:
+        """Render the serverinfo embed of a guild."""
         embed = discord.Embed(
             title=f"{guild.name} Server Information",
             description=guild.description if guild.description else "No description",
@@ -48,7 +88,7 @@ class General(commands.Cog):
         embed.add_field(name="Channels", value=len(guild.channels), inline=True)
         embed.add_field(name="Roles", value=len(guild.roles), inline=True)
 
-        await ctx.send(embed=embed)
+        return embed
 
 
 async def setup(bot):
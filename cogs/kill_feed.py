@@ -0,0 +1,107 @@
+import asyncio
+import os
+from functools import partial
+from typing import Dict
+
+import discord
+from discord.ext import commands
+
+from .feed.digest import FeedBuffer, FeedEntry, render_digest
+from .state_machine.states import PlayerState
+from .rest.scheduler import scheduler as rest_scheduler, Priority
+
+
+KILL_FEED_CHANNEL = os.getenv('KILL_FEED_CHANNEL', 'kill-feed')
+KILL_FEED_WINDOW = float(os.getenv('KILL_FEED_WINDOW', 10))  # seconds transitions are collected before a digest is posted
+
+
+class KillFeed(commands.Cog):
+    """
+    Cog announcing eliminations, returns and promotions in the kill feed channel.
+
+    Transitions are buffered per channel and posted as one digest per window, so a burst of any size
+    costs one message per channel per window.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.buffer = FeedBuffer()
+        self._flushes: Dict[int, asyncio.Task] = {}  # Maps channel IDs to their scheduled flush
+        self.buffered = 0
+        self.digests = 0
+        self.summarized = 0
+
+    async def cog_unload(self):
+        """Post what is still buffered when the cog is unloaded."""
+        for task in self._flushes.values():
+            task.cancel()
+        self._flushes.clear()
+        for channel_id in self.buffer.channels():
+            await self._flush(channel_id)
+
+    def tracked_structures(self):
+        """In-memory structures reported by the memory diagnostics."""
+        return {'entries': self.buffer.entries}
+
+    def metrics(self):
+        """Counters reported by the !metrics command."""
+        return {
+            'kill_feed.buffered': self.buffered,
+            'kill_feed.digests': self.digests,
+            'kill_feed.summarized': self.summarized,
+            'kill_feed.pending': len(self.buffer),
+        }
+
+    @commands.Cog.listener()
+    async def on_member_state_change(self, member, before, after):
+        """Buffer the transitions worth announcing."""
+        if before is None:
+            # members without a previous state are being loaded at startup
+            return
+        if after == PlayerState.ELIMINATED and before != PlayerState.ELIMINATED:
+            kind = 'eliminated'
+        elif before == PlayerState.ELIMINATED and after == PlayerState.ACTIVE_MEMBER:
+            kind = 'returned'
+        elif before == PlayerState.NEW_MEMBER and after == PlayerState.ACTIVE_MEMBER:
+            kind = 'promoted'
+        else:
+            return
+
+        channel = discord.utils.get(member.guild.text_channels, name=KILL_FEED_CHANNEL)
+        if channel is None:
+            return
+        self.buffered += 1
+        if self.buffer.add(channel.id, FeedEntry(kind, member.id, member.mention)):
+            self._flushes[channel.id] = asyncio.create_task(self._flush_later(channel.id))
+
+    @commands.Cog.listener()
+    async def on_hit_confirmed(self, killer_id: int, victim):
+        """Name the killer on the victim's pending elimination."""
+        channel = discord.utils.get(victim.guild.text_channels, name=KILL_FEED_CHANNEL)
+        if channel is not None:
+            self.buffer.credit_kill(channel.id, victim.id, f"<@{killer_id}>")
+
+    async def _flush_later(self, channel_id: int) -> None:
+        await asyncio.sleep(KILL_FEED_WINDOW)
+        self._flushes.pop(channel_id, None)
+        await self._flush(channel_id)
+
+    async def _flush(self, channel_id: int) -> None:
+        entries = self.buffer.drain(channel_id)
+        channel = self.bot.get_channel(channel_id)
+        if not entries or channel is None:
+            return
+
+        text, summarized = render_digest(entries, f"**Kill feed** ({len(entries)} update{'s' if len(entries) > 1 else ''})")
+        self.digests += 1
+        self.summarized += summarized
+        try:
+            # mentions are shown as names without pinging anyone
+            await rest_scheduler.submit(Priority.DM, f'channel:{channel_id}',
+                                        partial(channel.send, text, allowed_mentions=discord.AllowedMentions.none()))
+        except discord.HTTPException as e:
+            print(f"Could not post kill feed digest: {e}")
+
+
+async def setup(bot):
+    await bot.add_cog(KillFeed(bot))
@@ -0,0 +1,105 @@
+import datetime
+from typing import Optional
+
+import discord
+from discord.ext import commands, tasks
+
+from .state_machine.states import PlayerState
+from .stats.store import StatsStore, LEADERBOARDS
+
+
+LEADERBOARD_SIZE = 10
+ALIVE_INTERVAL = 60  # seconds between records that the bot is running, the most downtime counted as active time
+
+
+def _format_duration(seconds: float) -> str:
+    return str(datetime.timedelta(seconds=int(seconds)))
+
+
+class Leaderboard(commands.Cog):
+    """Cog tracking kills, deaths, streaks and time active for every player."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = StatsStore()
+        self.mark_alive.start()
+
+    async def cog_unload(self):
+        """Commit the queued updates when the cog is unloaded."""
+        self.mark_alive.cancel()
+        await self.store.close()
+
+    def metrics(self):
+        """Counters reported by the !metrics command."""
+        return {'players': len(self.store), 'stats.commits': self.store.commits}
+
+    @tasks.loop(seconds=ALIVE_INTERVAL)
+    async def mark_alive(self):
+        """Bound the active time counted for stretches left open when the bot stops without warning."""
+        self.store.mark_alive()
+
+    @commands.Cog.listener()
+    async def on_member_state_change(self, member, before, after):
+        """Track time spent as an active player, and count eliminations as deaths."""
+        if after == PlayerState.ACTIVE_MEMBER:
+            self.store.start_active(member.id)
+        elif before == PlayerState.ACTIVE_MEMBER or before is None:
+            # members without a previous state are being loaded at startup, close any stretch left open
+            self.store.stop_active(member.id)
+        if after == PlayerState.ELIMINATED and before is not None and before != PlayerState.ELIMINATED:
+            self.store.record_death(member.id)
+
+    @commands.Cog.listener()
+    async def on_hit_confirmed(self, killer_id: int, victim):
+        """Credit the author of a confirmed kill post with the kill."""
+        self.store.record_kill(killer_id)
+
+    @commands.command(name='leaderboard', help=f'Show the top players by {", ".join(LEADERBOARDS)}')
+    async def leaderboard(self, ctx, board: str = 'kills'):
+        """Show the top players of a leaderboard."""
+        if board not in LEADERBOARDS:
+            await ctx.send(f"Unknown leaderboard '{board}', choose one of: {', '.join(LEADERBOARDS)}")
+            return
+
+        embed = discord.Embed(
+            title=f"🏆 Leaderboard: {board}",
+            color=discord.Color.gold()
+        )
+        lines = []
+        for position, stats in enumerate(await self.store.top(board, LEADERBOARD_SIZE), start=1):
+            member = ctx.guild.get_member(stats.member_id)
+            name = member.display_name if member else f"Former player ({stats.member_id})"
+            if board == 'kills':
+                value = f"{stats.kills} kills, {stats.deaths} deaths"
+            elif board == 'streak':
+                value = f"best streak {stats.best_streak}, {stats.kills} kills"
+            else:
+                value = f"{_format_duration(stats.active_time())} active"
+            lines.append(f"`{position:>2}.` {name}: {value}")
+        embed.description = '\n'.join(lines) or "No games played yet"
+        await ctx.send(embed=embed)
+
+    @commands.command(name='stats', help='Show a player\'s kills, deaths, streaks and time active')
+    async def stats(self, ctx, member: Optional[discord.Member] = None):
+        """Show the stats of a player, yourself by default."""
+        member = member or ctx.author
+        stats = await self.store.get(member.id)
+        if stats is None:
+            await ctx.send(f"No stats recorded for {member.display_name} yet.")
+            return
+
+        embed = discord.Embed(
+            title=f"Stats for {member.display_name}",
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="Kills", value=str(stats.kills), inline=True)
+        embed.add_field(name="Deaths", value=str(stats.deaths), inline=True)
+        embed.add_field(name="Rank", value=f"#{self.store.rank(stats)}", inline=True)
+        embed.add_field(name="Current Streak", value=str(stats.streak), inline=True)
+        embed.add_field(name="Best Streak", value=str(stats.best_streak), inline=True)
+        embed.add_field(name="Time Active", value=_format_duration(stats.active_time()), inline=True)
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Leaderboard(bot))
@@ -0,0 +1,3 @@
+# Media package for the bot
+# This package contains image processing helpers used by the cogs, such as
+# perceptual hashing of pledge photos.
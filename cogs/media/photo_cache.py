@@ -0,0 +1,286 @@
+"""
+Disk-backed cache of target photos, downscaled to the size they are shown at on a contract card.
+
+Photos are downloaded once when they are indexed and attached to contracts from disk, so contracts no
+longer depend on attachment URLs that expire, and every hunter of a target gets the same small file.
+"""
+import asyncio
+import io
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+from PIL import Image
+
+from .workers import get_executor
+
+
+PHOTO_CACHE_DIR = os.getenv('PHOTO_CACHE_DIR', 'photo_cache')
+PHOTO_CACHE_MAX_MB = int(os.getenv('PHOTO_CACHE_MAX_MB', 200))
+PHOTO_CARD_SIZE = int(os.getenv('PHOTO_CARD_SIZE', 512))  # longest side in pixels of a cached photo
+MAX_DOWNLOAD_BYTES = 25 * 1024 * 1024  # Discord's attachment limit, anything bigger is not a pledge photo
+INDEX_FILE = 'index.json'
+INDEX_SAVE_DELAY = 5  # seconds changes to the index are collected before it is written
+
+
+def downscale_bytes(data: bytes, size: int = PHOTO_CARD_SIZE) -> bytes:
+    """
+    Downscale an encoded image to fit in a ``size`` square and re-encode it as JPEG.
+
+    Runs in a worker process; never call it on the event loop.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft('RGB', (size, size))  # let JPEG decoding downscale cheaply
+        image = image.convert('RGB')
+        image.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, 'JPEG', quality=85, optimize=True)
+    return out.getvalue()
+
+
+def source_key(url: str) -> str:
+    """Identify a photo by its URL without the query string, Discord re-signs attachment URLs over time."""
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+class PhotoDownloader:
+    """
+    Downloads photos over HTTP.
+
+    The session and base URL can be injected so the downloader runs against a local HTTP server in tests:
+    the scheme and host of ``base_url`` (and its path, as a prefix) replace those of every photo URL.
+    """
+
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, base_url: str = '',
+                 max_bytes: int = MAX_DOWNLOAD_BYTES, timeout: float = 30):
+        self._session = session
+        self._owns_session = session is None
+        self.base_url = base_url
+        self.max_bytes = max_bytes
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def resolve(self, url: str) -> str:
+        if not self.base_url:
+            return url
+        base = urlsplit(self.base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, base.path.rstrip('/') + parts.path, parts.query, ''))
+
+    async def fetch(self, url: str) -> bytes:
+        """
+        Download a photo.
+
+        Raises:
+            aiohttp.ClientError: If the request fails or the response is not a successful one
+            ValueError: If the photo is larger than ``max_bytes``
+        """
+        async with self.session.get(self.resolve(url)) as response:
+            response.raise_for_status()
+            if response.content_length is not None and response.content_length > self.max_bytes:
+                raise ValueError(f"photo is {response.content_length} bytes, limit is {self.max_bytes}")
+            data = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                data += chunk
+                if len(data) > self.max_bytes:
+                    raise ValueError(f"photo is larger than {self.max_bytes} bytes")
+        return bytes(data)
+
+
+@dataclass
+class CachedPhoto:
+    source: str  # source_key() of the photo the file was made from
+    source_size: int  # bytes of the original photo
+    size: int  # bytes of the cached file
+
+
+class PhotoCache:
+    """
+    Size-bounded LRU of downscaled photos on disk, one per target.
+
+    The LRU order and the photo each file was made from are kept in an index file, so the cache survives
+    restarts. Photos are downscaled in the media process pool and written from worker threads.
+    """
+
+    def __init__(self, directory: str = PHOTO_CACHE_DIR, max_bytes: int = PHOTO_CACHE_MAX_MB * 1024 * 1024,
+                 downloader: Optional[PhotoDownloader] = None, card_size: int = PHOTO_CARD_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.downloader = downloader or PhotoDownloader()
+        self.card_size = card_size
+        self.entries: OrderedDict = OrderedDict()  # Maps target IDs to CachedPhoto, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0  # original photo bytes that did not have to be sent because the cached file was
+        self._pending: Dict[int, Tuple[str, asyncio.Task]] = {}  # (source, task) of stores in progress, per target ID
+        self._index_lock = asyncio.Lock()  # one index write at a time, they share the temporary file
+        self._save_task: Optional[asyncio.Task] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def path(self, target_id: int) -> str:
+        return os.path.join(self.directory, f'{target_id}.jpg')
+
+    def _load(self) -> None:
+        """Rebuild the cache from disk, dropping index entries without a file and files without an entry."""
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = []
+        for target_id, source, source_size in index:
+            try:
+                size = os.path.getsize(self.path(target_id))
+            except OSError:
+                continue
+            self.entries[target_id] = CachedPhoto(source, source_size, size)
+            self.total_bytes += size
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext == '.jpg' and not (stem.isdigit() and int(stem) in self.entries):
+                os.remove(os.path.join(self.directory, name))
+        self._evict()
+        print(f"Photo cache: {len(self.entries)} photos, {self.total_bytes / 1e6:.1f} MB")
+
+    async def save_index(self) -> None:
+        """Persist the LRU order, e.g. after a distribution touched many entries."""
+        async with self._index_lock:
+            index = [[target_id, entry.source, entry.source_size] for target_id, entry in self.entries.items()]
+            await asyncio.get_running_loop().run_in_executor(None, self._write_index, index)
+
+    def _schedule_save(self) -> None:
+        """Save the index once in a while instead of after every photo, so a backfill writes it a few times."""
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self) -> None:
+        await asyncio.sleep(INDEX_SAVE_DELAY)
+        self._save_task = None  # changes made while writing schedule the next save
+        try:
+            await self.save_index()
+        except OSError as e:
+            print(f"Could not save photo cache index: {e}")
+
+    def _write_index(self, index: list) -> None:
+        tmp = os.path.join(self.directory, INDEX_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp, os.path.join(self.directory, INDEX_FILE))
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self.entries:
+            target_id, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            try:
+                os.remove(self.path(target_id))
+            except OSError:
+                pass
+
+    def has(self, target_id: int, url: str) -> bool:
+        """Whether the target's cached photo was made from the photo at ``url``."""
+        entry = self.entries.get(target_id)
+        return entry is not None and entry.source == source_key(url)
+
+    def get(self, target_id: int, url: str) -> Optional[str]:
+        """
+        Look up the cached file for a target's current photo, counting a hit or miss.
+
+        Returns:
+            Path of the cached file, or None if the photo is not cached
+        """
+        if not self.has(target_id, url):
+            self.misses += 1
+            return None
+        entry = self.entries[target_id]
+        self.entries.move_to_end(target_id)
+        self.hits += 1
+        self.bytes_saved += max(entry.source_size - entry.size, 0)
+        return self.path(target_id)
+
+    def store(self, target_id: int, url: str, data: Optional[bytes] = None) -> asyncio.Task:
+        """
+        Cache a target's photo, downloading it unless its bytes are given.
+
+        Concurrent stores for the same target share one task, a store for a newer photo replaces it.
+
+        Returns:
+            The task storing the photo
+        """
+        source = source_key(url)
+        pending = self._pending.get(target_id)
+        if pending is not None:
+            if pending[0] == source:
+                return pending[1]
+            pending[1].cancel()
+        task = asyncio.create_task(self._store(target_id, url, data))
+        self._pending[target_id] = (source, task)
+        task.add_done_callback(lambda done: self._forget_pending(target_id, done))
+        return task
+
+    def _forget_pending(self, target_id: int, task: asyncio.Task) -> None:
+        pending = self._pending.get(target_id)
+        if pending is not None and pending[1] is task:
+            del self._pending[target_id]
+
+    async def _store(self, target_id: int, url: str, data: Optional[bytes]) -> None:
+        if self.has(target_id, url):
+            return
+        if data is None:
+            data = await self.downloader.fetch(url)
+        loop = asyncio.get_running_loop()
+        card = await loop.run_in_executor(get_executor(), downscale_bytes, data, self.card_size)
+        await loop.run_in_executor(None, self._write, target_id, card)
+
+        previous = self.entries.pop(target_id, None)
+        if previous is not None:
+            self.total_bytes -= previous.size
+        self.entries[target_id] = CachedPhoto(source_key(url), len(data), len(card))
+        self.total_bytes += len(card)
+        self._evict()
+        self._schedule_save()
+
+    def _write(self, target_id: int, card: bytes) -> None:
+        tmp = self.path(target_id) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(card)
+        os.replace(tmp, self.path(target_id))
+
+    async def close(self) -> None:
+        for _, task in list(self._pending.values()):
+            task.cancel()
+        if self._save_task is not None:
+            self._save_task.cancel()
+            self._save_task = None
+            await self.save_index()
+        await self.downloader.close()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'photos': len(self.entries),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'bytes_saved': self.bytes_saved,
+        }
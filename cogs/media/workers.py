@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+
+MEDIA_WORKERS = int(os.getenv('MEDIA_WORKERS', 2))  # processes decoding and encoding images
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Process pool shared by all image processing, so decoding never runs on the event loop."""
+    global _executor
+    if _executor is None:
+        # never fork: the bot runs tracing, loop monitor and profiler threads whose locks a fork could copy held
+        _executor = ProcessPoolExecutor(max_workers=MEDIA_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,3 @@
+# REST package for the bot
+# This package contains the outbound request scheduler shared by the cogs, which
+# orders Discord API calls by priority and paces them per rate limit bucket.
@@ -0,0 +1,212 @@
+import asyncio
+import os
+import statistics
+import time
+from collections import OrderedDict, deque
+from enum import IntEnum
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set, Tuple, TypeVar
+
+
+REST_GLOBAL_RATE = float(os.getenv('REST_GLOBAL_RATE', 40))  # requests per second over all buckets, below Discord's global 50
+REST_CONCURRENCY = int(os.getenv('REST_CONCURRENCY', 4))  # requests in flight at once
+WAIT_HISTORY = 1000  # queue wait samples kept per priority class
+
+# Requests per second and burst size, per bucket kind (the part of a bucket key before ':'). discord.py still
+# handles any 429 it gets; pacing here keeps requests queued where they can be reordered by priority.
+BUCKET_LIMITS: Dict[str, Tuple[float, int]] = {
+    'role': (5.0, 10),  # role edits, per guild
+    'message': (5.0, 5),  # message fetches, per channel
+    'channel': (1.0, 5),  # messages posted, per channel
+    'history': (2.0, 2),  # history pages, per channel
+    'dm': (10.0, 10),  # direct messages, over all members
+}
+DEFAULT_LIMIT = (5.0, 5)
+
+T = TypeVar('T')
+
+
+class Priority(IntEnum):
+    """Priority classes of outbound requests, lower values are served first."""
+    ROLE_CHANGE = 0  # game-critical role changes, e.g. eliminations
+    CONFIRMATION = 1  # resolving hit confirmations
+    DM = 2  # contract DMs and notifications
+    BACKFILL = 3  # history pagination and other catch-up work
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second on average, with bursts of up to ``capacity``."""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class _Request:
+    __slots__ = ('priority', 'bucket', 'call', 'future', 'enqueued_at')
+
+    def __init__(self, priority: Priority, bucket: str, call: Callable[[], Awaitable], future: asyncio.Future):
+        self.priority = priority
+        self.bucket = bucket
+        self.call = call
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class RestScheduler:
+    """
+    Central scheduler for outbound Discord API requests.
+
+    Requests are queued per priority class and per rate limit bucket. The dispatcher always serves the
+    highest priority class that has a request whose bucket has a token, and serves the buckets of a class
+    round robin, so a burst on one bucket (e.g. thousands of contract DMs) neither delays a more important
+    request nor starves other buckets of its class. A global token bucket and a concurrency limit keep the
+    bot under Discord's global rate limit.
+    """
+
+    def __init__(self, global_rate: float = REST_GLOBAL_RATE, concurrency: int = REST_CONCURRENCY):
+        self.concurrency = concurrency
+        self._global = TokenBucket(global_rate, global_rate)
+        self._queues: Dict[Priority, OrderedDict] = {p: OrderedDict() for p in Priority}  # bucket -> deque of requests
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._depth: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._waits: Dict[Priority, Deque[float]] = {p: deque(maxlen=WAIT_HISTORY) for p in Priority}
+        self._completed: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._in_flight = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()  # strong references to requests in flight
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch(), name='rest-scheduler')
+
+    async def submit(self, priority: Priority, bucket: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Queue a request and wait for its result.
+
+        Args:
+            priority: Priority class of the request
+            bucket: Rate limit bucket, '<kind>:<scope>' such as 'role:<guild id>', see BUCKET_LIMITS
+            call: Makes the request when called, e.g. ``functools.partial(member.add_roles, role)``
+
+        Returns:
+            The result of the request; its exceptions are raised to the caller
+        """
+        self._ensure_running()
+        request = _Request(priority, bucket, call, asyncio.get_running_loop().create_future())
+        self._queues[priority].setdefault(bucket, deque()).append(request)
+        self._depth[priority] += 1
+        self._wakeup.set()
+        return await request.future
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._wakeup.clear()
+            delay = self._start_ready()
+            if delay is None:
+                await self._wakeup.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _start_ready(self) -> Optional[float]:
+        """
+        Start queued requests while there is capacity.
+
+        Returns:
+            Seconds until a queued request may be startable, or None to wait for the next submit or completion
+        """
+        while self._in_flight < self.concurrency:
+            request, delay = self._next(time.monotonic())
+            if request is None:
+                return delay
+            self._in_flight += 1
+            self._waits[request.priority].append(time.monotonic() - request.enqueued_at)
+            task = asyncio.create_task(self._run(request))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        return None
+
+    def _next(self, now: float) -> Tuple[Optional[_Request], Optional[float]]:
+        delay = self._global.wait_time(now)
+        if delay > 0:
+            return None, delay
+        soonest = None
+        for priority in Priority:
+            queues = self._queues[priority]
+            for bucket in list(queues):
+                pending = queues[bucket]
+                while pending and pending[0].future.done():  # the caller gave up waiting
+                    pending.popleft()
+                    self._depth[priority] -= 1
+                if not pending:
+                    del queues[bucket]
+                    continue
+                limiter = self._bucket(bucket)
+                wait = limiter.wait_time(now)
+                if wait > 0:
+                    soonest = wait if soonest is None else min(soonest, wait)
+                    continue
+                request = pending.popleft()
+                self._depth[priority] -= 1
+                if pending:
+                    queues.move_to_end(bucket)  # round robin between the buckets of a class
+                else:
+                    del queues[bucket]
+                limiter.take()
+                self._global.take()
+                return request, None
+        return None, soonest
+
+    def _bucket(self, bucket: str) -> TokenBucket:
+        limiter = self._buckets.get(bucket)
+        if limiter is None:
+            rate, burst = BUCKET_LIMITS.get(bucket.split(':', 1)[0], DEFAULT_LIMIT)
+            limiter = self._buckets[bucket] = TokenBucket(rate, burst)
+        return limiter
+
+    async def _run(self, request: _Request) -> None:
+        try:
+            result = await request.call()
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            self._completed[request.priority] += 1
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, completed requests and queue wait percentiles (seconds) per priority class."""
+        stats = {'in_flight': self._in_flight}
+        for priority in Priority:
+            name = priority.name.lower()
+            waits = sorted(self._waits[priority])
+            stats[f'{name}.depth'] = self._depth[priority]
+            stats[f'{name}.completed'] = self._completed[priority]
+            stats[f'{name}.wait_p50'] = statistics.median(waits) if waits else 0.0
+            stats[f'{name}.wait_p95'] = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+            stats[f'{name}.wait_max'] = waits[-1] if waits else 0.0
+        return stats
+
+
+# Shared by every cog so all outbound requests are ordered against each other
+scheduler = RestScheduler()
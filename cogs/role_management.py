@@ -1,13 +1,22 @@
+import asyncio
 import discord
 from discord.ext import commands, tasks
 import time
-from typing import Dict
+from functools import partial
 
 # Import from state_machine package
-from .state_machine.events import Event, EventType
+from .state_machine.events import (
+    EventType, MemberJoinEvent, ReactionAddEvent, ManualUpdateEvent, InactivityEvent, TimeElapsedEvent,
+    MessageEventPool
+)
 from .state_machine.manager import RoleManager
-from .state_machine.config import AVAILABLE_STATES
-from .state_machine.states import _ElapsedTimeState, RoleTypes, PlayerState, ROLES_TYPE_NAMES
+from .state_machine.activity import ActivityTracker
+from .state_machine.confirmations import HitConfirmationIndex, HIT_CONFIRMED_CHANNEL, CONFIRMATION_EMOJI
+from .state_machine.config import AVAILABLE_STATES, STATES_CONFIG, load_states, inactivity_days
+from .state_machine.states import _ElapsedTimeState, PlayerState, ROLES_TYPE_NAMES
+from .telemetry import tracing
+from .rest.scheduler import scheduler as rest_scheduler, Priority
+from .caching.embeds import GuildEmbedCache, INFO_COOLDOWN_SECONDS
 
 
 class RoleManagement(commands.Cog):
@@ -20,41 +29,111 @@ class RoleManagement(commands.Cog):
         for state in AVAILABLE_STATES:
             self.role_manager.add_state(state)
 
+        # Publish transitions as a bot event so other cogs can react to them
+        self.role_manager.add_listener(self._dispatch_state_change)
+
         # Track message counts for context
         self.message_counts = {}
 
+        # Message events are reused rather than allocated for every message
+        self.message_events = MessageEventPool()
+
+        # Track last activity for inactivity checks, saved regularly so restarts don't reset it
+        self.activity = ActivityTracker()
+        self.activity.load()
+
+        # Index kill posts so hit confirmations resolve without fetching the message
+        self.confirmations = HitConfirmationIndex()
+
+        # liststates embeds, rebuilt only after the states or the roles they name change
+        self.states_embed_cache = GuildEmbedCache()
+
         # Schedule inactivity check task
-        # self.inactivity_check.start()  # Uncomment to enable inactivity checks
+        if not self.inactivity_check.is_running():
+            self.inactivity_check.start()
 
         # Schedule time elapsed check task
-        self.time_elapsed_check.start()  # Start the time elapsed check task
-    
-    async def cog_load(self):
-        """Initialize member states based on current roles."""
+        if not self.time_elapsed_check.is_running():
+            self.time_elapsed_check.start()
+
+        if not self.save_activity.is_running():
+            self.save_activity.start()
+
+    async def cog_unload(self):
+        """Clean up when the cog is unloaded."""
+        self.inactivity_check.cancel()
+        self.time_elapsed_check.cancel()
+        self.save_activity.cancel()
+        await self._save_activity()
+
+    def _state_from_roles(self, member: discord.Member):
+        """The state that best matches a member's current roles."""
+        roles = [role for role in member.roles if role.name in ROLES_TYPE_NAMES]
+        if not len(roles):
+            print(f"No roles found for member {member.display_name}, using default state")
+            return self.role_manager.states.get(PlayerState.DEFAULT)
+        return self.role_manager.find_best_matching_state(roles)
+
+    async def reconcile(self):
+        """
+        Initialize member states based on current roles. Called once by the boot sequence, after every
+        cog is loaded, so loading the cog stays cheap.
+        """
         for guild in self.bot.guilds:
             for member in guild.members:
                 if member.bot:
                     continue
-                state = None
-                # use members current roles to match a state.
-                roles = [role for role in member.roles if role.name in ROLES_TYPE_NAMES]
-                if not len(roles):
-                    state = self.states.get("@everyone")
-                    print(f"No roles found for member {member.display_name}, using default state")
-                else:
-                    state = self.role_manager.find_best_matching_state(roles)
-                # Determine initial state based on roles
-                # if any(role.name == RoleTypes.ELIMINATED.value for role in member.roles):
-                #     await self.role_manager.set_member_state(member, "eliminated")
-                # elif any(role.name == RoleTypes.ACTIVE_MEMBER.value for role in member.roles):
-                #     await self.role_manager.set_member_state(member, "active_member")
-                # elif any(role.name == RoleTypes.NEW_MEMBER.value for role in member.roles):
-                #     await self.role_manager.set_member_state(member, PlayerState.NEW_MEMBER)
-                # else:
+                # members without saved activity count as active from the moment the bot starts watching them
+                self.activity.seed(member.id)
+                state = self._state_from_roles(member)
                 if state is None:
                     print(f"Could not resolve a state for player {member.display_name}")
+                    continue
                 await self.role_manager.set_member_state(member, state.name)
 
+    async def resync(self):
+        """
+        Catch up after a reconnect: only members who joined, or whose roles no longer match their
+        recorded state (e.g. roles edited while the bot was disconnected), are updated.
+        """
+        for guild in self.bot.guilds:
+            for member in guild.members:
+                if member.bot:
+                    continue
+                self.activity.seed(member.id)
+                state = self._state_from_roles(member)
+                if state is None or self.role_manager.member_states.get(member.id) == state.name:
+                    continue
+                await self.role_manager.set_member_state(member, state.name)
+
+    def _dispatch_state_change(self, member, before, after):
+        """Dispatch a ``member_state_change`` event, handled by ``on_member_state_change`` listeners."""
+        if self._expires(after):
+            self.activity.resume(member.id)
+        self.bot.dispatch('member_state_change', member, before, after)
+
+    def tracked_structures(self):
+        """In-memory structures reported by the memory diagnostics."""
+        structures = {
+            'message_counts': self.message_counts,
+            'member_states': self.role_manager.member_states,
+            'activity': self.activity.last_seen,
+            'activity_suspended': self.activity.suspended,
+            'confirmations': self.confirmations.posts,
+            'states_embed_cache': self.states_embed_cache.embeds,
+        }
+        for state in self.role_manager.states.values():
+            if isinstance(state, _ElapsedTimeState):
+                structures[f'{state.name.value}.start_times'] = state.start_times
+        return structures
+
+    def metrics(self):
+        """Counters reported by the !metrics command."""
+        metrics = {f'liststates_cache.{name}': value for name, value in self.states_embed_cache.stats().items()}
+        metrics['message_events.allocated'] = self.message_events.allocated
+        metrics['message_events.reused'] = self.message_events.reused
+        return metrics
+
     @commands.Cog.listener()
     async def on_message(self, message):
         """Listen for messages and create MESSAGE events."""
@@ -71,37 +150,36 @@ class RoleManagement(commands.Cog):
         if not message.guild:
             return
 
-        # Create event data
-        event_data = {
-            "message_count": self.message_counts[message.author.id],
-            "channel_id": message.channel.id,
-            "channel_name": message.channel.name,
-            "has_attachments": bool(message.attachments),
-            "content": message.content,
-            "guild_id": message.guild.id,
-            # Add more context data as needed
-        }
+        self.activity.touch(message.author.id)
 
-        # Create and process the message event
-        message_event = Event(
-            type=EventType.MESSAGE,
-            member=message.author,
-            data=event_data
-        )
+        if message.channel.name == HIT_CONFIRMED_CHANNEL and message.attachments and message.mentions:
+            self._index_confirmation(message)
 
-        await self.role_manager.process_event(message_event)
+        with tracing.start_trace('on_message', member_id=message.author.id, channel=message.channel.name):
+            # Create and process the message event
+            message_event = self.message_events.acquire(
+                member=message.author,
+                message_count=self.message_counts[message.author.id],
+                channel_id=message.channel.id,
+                channel_name=message.channel.name,
+                has_attachments=bool(message.attachments),
+                guild_id=message.guild.id,
+            )
+            try:
+                await self.role_manager.process_event(message_event)
+            finally:
+                self.message_events.release(message_event)
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Create MEMBER_JOIN events when new members join."""
-        # Create and process the member join event
-        join_event = Event(
-            type=EventType.MEMBER_JOIN,
-            member=member,
-            data={}
-        )
+        self.activity.touch(member.id)
+
+        with tracing.start_trace('on_member_join', member_id=member.id):
+            # Create and process the member join event
+            join_event = MemberJoinEvent(member)
 
-        await self.role_manager.process_event(join_event)
+            await self.role_manager.process_event(join_event)
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
@@ -110,79 +188,169 @@ class RoleManagement(commands.Cog):
         if payload.member.bot:
             return
 
+        self.activity.touch(payload.member.id)
+
         # Get the channel and message
         channel = self.bot.get_channel(payload.channel_id)
         if not channel:
             return
 
+        emoji = str(payload.emoji)
+        claimed = None  # kill post whose confirmation by this member was claimed
+        with tracing.start_trace('on_raw_reaction_add', member_id=payload.member.id, channel=channel.name, emoji=emoji):
+            if emoji == CONFIRMATION_EMOJI and channel.name == HIT_CONFIRMED_CHANNEL:
+                post = self.confirmations.get(payload.message_id)
+                if post is None:
+                    # posted before the bot was watching, fetch it once and index it for later reactions
+                    message = await self._fetch_message(channel, payload.message_id)
+                    if message is None:
+                        return
+                    post = self._index_confirmation(message)
+                if not self.confirmations.claim(post, payload.member.id):
+                    # not a confirmation by a mentioned player, or one that was already processed
+                    return
+                claimed = post
+                has_attachments = post.has_attachments
+                mentions = list(post.mentions)
+            else:
+                message = await self._fetch_message(channel, payload.message_id)
+                if message is None:
+                    return
+                has_attachments = bool(message.attachments)
+                mentions = [user.id for user in message.mentions]
+
+            # Create and process the reaction event
+            reaction_event = ReactionAddEvent(
+                member=payload.member,
+                emoji=emoji,
+                message_id=payload.message_id,
+                channel_id=payload.channel_id,
+                channel_name=channel.name,  # channel name for hit confirmation check
+                guild_id=payload.guild_id,
+                has_attachments=has_attachments,  # whether the message has attachments
+                mentions=mentions,  # IDs of the mentioned users
+            )
+
+            before = self.role_manager.member_states.get(payload.member.id)
+            eliminated = False
+            try:
+                await self.role_manager.process_event(reaction_event)
+                after = self.role_manager.member_states.get(payload.member.id)
+                eliminated = after == PlayerState.ELIMINATED and before != PlayerState.ELIMINATED
+            finally:
+                if claimed is not None and not eliminated:
+                    # the confirmation did not count (wrong state or a failed transition), it may be retried
+                    self.confirmations.release(claimed, payload.member.id)
+            if claimed is not None and eliminated:
+                # handled by ``on_hit_confirmed(killer_id, victim)`` listeners
+                self.bot.dispatch('hit_confirmed', claimed.author_id, payload.member)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.states_embed_cache.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.states_embed_cache.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            self.states_embed_cache.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_state_reconfigured(self):
+        """Role states were redefined, every guild's liststates embed is stale."""
+        self.states_embed_cache.invalidate()
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        """Forget deleted kill posts."""
+        self.confirmations.remove(payload.message_id)
+
+    @staticmethod
+    async def _fetch_message(channel, message_id):
         try:
-            message = await channel.fetch_message(payload.message_id)
+            with tracing.span('fetch_message', message_id=message_id):
+                return await rest_scheduler.submit(Priority.CONFIRMATION, f'message:{channel.id}',
+                                                   partial(channel.fetch_message, message_id))
         except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+            return None
+
+    def _index_confirmation(self, message):
+        return self.confirmations.add(message.id, message.channel.id, message.author.id,
+                                      [user.id for user in message.mentions], bool(message.attachments))
+
+    @tasks.loop(hours=24)
+    async def inactivity_check(self):
+        """Create INACTIVITY events for members that have not been active within the threshold."""
+        now = time.time()
+        # the shortest threshold of any state, each member is then checked against its own state's thresholds
+        expired = self.activity.pop_expired(now - inactivity_days(self.role_manager.states.values()) * 86400)
+        if not expired:
             return
+        print(f"{len(expired)} members passed the inactivity threshold")
+
+        waiting = []  # members whose state can still expire, a longer threshold may apply to them later
+        with tracing.start_trace('inactivity_check', members=len(expired)):
+            for member_id, last_seen in expired:
+                members = [member for member in (guild.get_member(member_id) for guild in self.bot.guilds)
+                           if member is not None and not member.bot]
+                if not members:
+                    continue  # left every guild, stop tracking them
+                if self._expires(self.role_manager.member_states.get(member_id)):
+                    for member in members:
+                        inactivity_event = InactivityEvent(
+                            member=member,
+                            days_since_last_message=(now - last_seen) / 86400,
+                            guild_id=member.guild.id,
+                        )
+
+                        await self.role_manager.process_event(inactivity_event)
+                if self._expires(self.role_manager.member_states.get(member_id)):
+                    waiting.append((member_id, last_seen))
+                else:
+                    # e.g. eliminated, swept again once active or back in a state that expires
+                    self.activity.suspend(member_id, last_seen)
+        self.activity.restore(waiting)
 
-        # Create event data
-        event_data = {
-            "emoji": str(payload.emoji),
-            "message_id": payload.message_id,
-            "channel_id": payload.channel_id,
-            "guild_id": payload.guild_id,
-            "channel_name": channel.name,  # Add channel name for hit confirmation check
-            "has_attachments": bool(message.attachments),  # Check if message has attachments
-            "mentions": [user.id for user in message.mentions],  # List of mentioned user IDs
-        }
+    def _expires(self, state_name) -> bool:
+        """Whether members in the state are moved on by inactivity."""
+        state = self.role_manager.states.get(state_name)
+        return state is not None and bool(state.transitions.get(EventType.INACTIVITY))
 
-        # Create and process the reaction event
-        reaction_event = Event(
-            type=EventType.REACTION_ADD,
-            member=payload.member,
-            data=event_data
-        )
+    @inactivity_check.before_loop
+    async def before_inactivity_check(self):
+        """Wait until the bot is ready before starting the task."""
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(minutes=5)
+    async def save_activity(self):
+        """Save the last activity of every member, at most five minutes of activity are lost on a crash."""
+        await self._save_activity()
 
-        await self.role_manager.process_event(reaction_event)
-
-    # Example of how to implement an inactivity check
-    # @tasks.loop(hours=24)
-    # async def inactivity_check(self):
-    #     """Check for inactive members and create INACTIVITY events."""
-    #     for guild in self.bot.guilds:
-    #         for member in guild.members:
-    #             if member.bot:
-    #                 continue
-    #                 
-    #             # Calculate days since last message
-    #             # This is just an example - you'd need to track last message timestamps
-    #             days_inactive = 0  # Replace with actual calculation
-    #             
-    #             event_data = {
-    #                 "days_since_last_message": days_inactive,
-    #                 "guild_id": guild.id,
-    #             }
-    #             
-    #             inactivity_event = Event(
-    #                 type=EventType.INACTIVITY,
-    #                 member=member,
-    #                 data=event_data
-    #             )
-    #             
-    #             await self.role_manager.process_event(inactivity_event)
+    async def _save_activity(self):
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, ActivityTracker.save, self.activity.snapshot())
+        except OSError as e:
+            print(f"Could not save member activity: {e}")
 
     @tasks.loop(minutes=1)  # Check every 5 minutes
     async def time_elapsed_check(self):
         """Check for eliminated members who should return to active state."""
 
-        for member_id, stateId in self.role_manager.member_states.items():
-            # Create and process the time elapsed event
-            state = self.role_manager.states[stateId]
-            member = discord.utils.get(self.bot.get_all_members(), id=member_id)
-            if member is None:
-               continue
-            time_event = Event(
-                type=EventType.TIME_ELAPSED,
-                member=member,
-                data=state.get_ctx(member_id),
-            )
+        with tracing.start_trace('time_elapsed_check', members=len(self.role_manager.member_states)):
+            for member_id, stateId in self.role_manager.member_states.items():
+                # Create and process the time elapsed event, for states that react to it
+                state = self.role_manager.states[stateId]
+                if not state.transitions.get(EventType.TIME_ELAPSED):
+                    continue
+                member = discord.utils.get(self.bot.get_all_members(), id=member_id)
+                if member is None:
+                   continue
+                time_event = TimeElapsedEvent(member, start_time=state.start_time(member_id))
 
-            await self.role_manager.process_event(time_event)
+                await self.role_manager.process_event(time_event)
 
     @time_elapsed_check.before_loop
     async def before_time_elapsed_check(self):
@@ -199,33 +367,57 @@ class RoleManagement(commands.Cog):
             return
 
         # Create a manual update event
-        manual_event = Event(
-            type=EventType.MANUAL_UPDATE,
-            member=member,
-            data={"target_state": state_name}
-        )
-
+        manual_event = ManualUpdateEvent(member, target_state=state_name)
+
+        with tracing.start_trace('set_role_state', member_id=member.id, target_state=state_name):
+            try:
+                # Process the event
+                await self.role_manager.process_event(manual_event)
+
+                # If the event didn't result in a transition, force the state change
+                # This is a fallback in case the member doesn't have a current state or
+                # the current state doesn't have a transition for MANUAL_UPDATE
+                if self.role_manager.member_states.get(member.id) != state_name:
+                    await self.role_manager.set_member_state(member, state_name)
+
+                await ctx.send(f"Set {member.display_name} to {state_name} state")
+            except ValueError as e:
+                await ctx.send(f"Error: {str(e)}")
+
+    @commands.command(name='reloadstates', help=f'Reload the role state configuration from {STATES_CONFIG}')
+    @commands.has_permissions(administrator=True)
+    async def reload_states(self, ctx):
+        """
+        Recompile the state machine from its configuration file and swap it in.
+
+        Members keep their states and the timers of elapsed-time states keep running, so no restart
+        or role rescan is needed.
+        """
         try:
-            # Process the event
-            await self.role_manager.process_event(manual_event)
-
-            # If the event didn't result in a transition, force the state change
-            # This is a fallback in case the member doesn't have a current state or
-            # the current state doesn't have a transition for MANUAL_UPDATE
-            if self.role_manager.member_states.get(member.id) != state_name:
-                await self.role_manager.set_member_state(member, state_name)
+            states = load_states(ctx.guild)
+            self.role_manager.replace_states(states)
+        except ValueError as e:  # StateConfigError, or members in states the configuration no longer has
+            await ctx.send(f"Configuration not reloaded: {str(e)}")
+            return
 
-            await ctx.send(f"Set {member.display_name} to {state_name} state")
-        except ValueError as e:
-            await ctx.send(f"Error: {str(e)}")
+        # handled by ``on_state_reconfigured`` listeners
+        self.bot.dispatch('state_reconfigured')
+        transitions = sum(len(handlers) for state in states for handlers in state.transitions.values())
+        await ctx.send(f"Reloaded {len(states)} states with {transitions} transitions, "
+                       f"{len(self.role_manager.member_states)} members kept their state.")
 
     @commands.command(name='liststates', help='List all available role states')
+    @commands.cooldown(1, INFO_COOLDOWN_SECONDS, commands.BucketType.user)
     async def list_states(self, ctx):
         """List all available role states."""
         if not self.role_manager.states:
             await ctx.send("No role states defined")
             return
 
+        await ctx.send(embed=self.states_embed_cache.get(ctx.guild.id, lambda: self._build_states_embed(ctx.guild)))
+
+    def _build_states_embed(self, guild: discord.Guild) -> discord.Embed:
+        """Render the liststates embed, resolving role names in the given guild."""
         embed = discord.Embed(
             title="Available Role States",
             description="List of all role states managed by the bot",
@@ -235,7 +427,7 @@ class RoleManagement(commands.Cog):
         for name, state in self.role_manager.states.items():
             role_names = []
             for role_id in state.roles:
-                role = ctx.guild.get_role(role_id)
+                role = guild.get_role(role_id)
                 role_names.append(role.name if role else f"Unknown Role ({role_id})")
 
             # Get available transitions
@@ -250,8 +442,7 @@ class RoleManagement(commands.Cog):
                 inline=False
             )
 
-        await ctx.send(embed=embed)
-
+        return embed
 
 async def setup(bot):
     await bot.add_cog(RoleManagement(bot))
@@ -0,0 +1,33 @@
+from discord.ext import commands
+
+from .api.server import StateAPI, STATE_API_HOST, STATE_API_PORT
+
+
+class StateApi(commands.Cog):
+    """Serves the in-memory game state over a local read-only HTTP/JSON API, when STATE_API_PORT is set."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # cogs are looked up per request, they may be loaded after this one or reloaded
+        self.api = StateAPI(
+            role_manager=lambda: getattr(self.bot.get_cog('RoleManagement'), 'role_manager', None),
+            broker=lambda: self.bot.get_cog('ContractBroker'),
+        )
+
+    async def cog_load(self):
+        await self.api.start(STATE_API_HOST, STATE_API_PORT)
+
+    async def cog_unload(self):
+        """Clean up when the cog is unloaded."""
+        await self.api.stop()
+
+    def metrics(self):
+        """Counters reported by the !metrics command."""
+        return {f'state_api.{name}': value for name, value in self.api.stats().items()}
+
+
+async def setup(bot):
+    if not STATE_API_PORT:
+        print('State API disabled, set STATE_API_PORT to serve game state over HTTP')
+        return
+    await bot.add_cog(StateApi(bot))
@@ -0,0 +1,133 @@
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+ACTIVITY_FILE = os.getenv('ACTIVITY_FILE', 'activity.json')  # last activity of every member, kept across restarts
+
+
+class ActivityTracker:
+    """
+    Tracks the last activity time of members, ordered from least to most recently active.
+
+    The ordered dict doubles as the time index: touching a member moves it to the end in O(1) without
+    allocating, so the members that have been inactive the longest are always at the front and a sweep
+    only visits the members that are actually past the cutoff.
+
+    Members whose state ignores inactivity are suspended: kept out of the index, so sweeps don't visit
+    them again, until they are active or resumed by a state change. A resumed member keeps its old
+    timestamp, which can't be placed in order in O(1), so it is also pushed on a heap the sweep merges in.
+    """
+
+    def __init__(self):
+        self.last_seen: OrderedDict = OrderedDict()  # Maps member IDs to last activity timestamps, oldest first
+        self.suspended: Dict[int, float] = {}  # Maps member IDs to last activity timestamps, not swept
+        self._resumed: List[Tuple[float, int]] = []  # heap of (timestamp, member ID) indexed out of order
+
+    def __len__(self) -> int:
+        return len(self.last_seen) + len(self.suspended)
+
+    def load(self, path: str = ACTIVITY_FILE) -> None:
+        """Restore the activity saved by a previous run, so restarts don't reset the inactivity clock."""
+        try:
+            with open(path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for member_id, timestamp in sorted(entries, key=lambda entry: entry[1]):
+            self.last_seen[member_id] = timestamp
+        print(f"Activity: restored the last activity of {len(self.last_seen)} members")
+
+    def snapshot(self) -> List[Tuple[int, float]]:
+        """Copy of the tracked activity to save with ``save``, taken on the event loop."""
+        return list(self.last_seen.items()) + list(self.suspended.items())
+
+    @staticmethod
+    def save(snapshot: List[Tuple[int, float]], path: str = ACTIVITY_FILE) -> None:
+        """Write a snapshot to disk, from a worker thread."""
+        tmp = f'{path}.{threading.get_ident()}.tmp'  # one per thread, a periodic and a final save may overlap
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+
+    def touch(self, member_id: int, timestamp: Optional[float] = None) -> None:
+        """Record activity for a member."""
+        self.suspended.pop(member_id, None)
+        last_seen = self.last_seen
+        if member_id in last_seen:
+            last_seen.move_to_end(member_id)
+        last_seen[member_id] = time.time() if timestamp is None else timestamp
+
+    def seed(self, member_id: int, timestamp: Optional[float] = None) -> None:
+        """Start tracking a member without overriding activity that was already recorded."""
+        if member_id not in self.last_seen and member_id not in self.suspended:
+            self.last_seen[member_id] = time.time() if timestamp is None else timestamp
+
+    def forget(self, member_id: int) -> None:
+        self.last_seen.pop(member_id, None)
+        self.suspended.pop(member_id, None)
+
+    def get(self, member_id: int) -> Optional[float]:
+        timestamp = self.last_seen.get(member_id)
+        return self.suspended.get(member_id) if timestamp is None else timestamp
+
+    def suspend(self, member_id: int, timestamp: float) -> None:
+        """Keep a member returned by ``pop_expired`` out of future sweeps, until it is active or resumed."""
+        if member_id not in self.last_seen:
+            self.suspended[member_id] = timestamp
+
+    def resume(self, member_id: int) -> None:
+        """Put a suspended member back in the sweeps, e.g. after it moved to a state that expires."""
+        timestamp = self.suspended.pop(member_id, None)
+        if timestamp is not None:
+            self.last_seen[member_id] = timestamp
+            heapq.heappush(self._resumed, (timestamp, member_id))
+
+    def pop_expired(self, cutoff: float) -> List[Tuple[int, float]]:
+        """
+        Remove and return the members whose last activity is older than the cutoff.
+
+        Runs in time proportional to the number of expired members. Members that are still waiting for a
+        longer threshold must be put back with ``restore``, those that can't expire with ``suspend``.
+
+        Args:
+            cutoff: Timestamp before which members count as inactive
+
+        Returns:
+            List of (member ID, last activity timestamp), least recently active first
+        """
+        expired = []
+        last_seen = self.last_seen
+        while last_seen:
+            member_id, timestamp = next(iter(last_seen.items()))
+            if timestamp >= cutoff:
+                break
+            last_seen.popitem(last=False)
+            expired.append((member_id, timestamp))
+        resumed = self._resumed
+        if resumed and resumed[0][0] < cutoff:
+            while resumed and resumed[0][0] < cutoff:
+                timestamp, member_id = heapq.heappop(resumed)
+                # entries of members that were active or swept since are stale
+                if last_seen.get(member_id) == timestamp:
+                    del last_seen[member_id]
+                    expired.append((member_id, timestamp))
+            expired.sort(key=lambda entry: entry[1])
+        return expired
+
+    def restore(self, expired: List[Tuple[int, float]]) -> None:
+        """
+        Put members returned by ``pop_expired`` back at the front, unless they were active since.
+
+        Args:
+            expired: (member ID, last activity timestamp), least recently active first
+        """
+        last_seen = self.last_seen
+        for member_id, timestamp in reversed(expired):
+            if member_id not in last_seen:
+                last_seen[member_id] = timestamp
+                last_seen.move_to_end(member_id, last=False)
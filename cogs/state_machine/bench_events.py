@@ -0,0 +1,163 @@
+"""
+Benchmark of event allocation and transition dispatch.
+
+Compares the previous dict-carrying Event dataclass and its dict-probing predicates with the typed,
+slotted events (allocated, or reused through MessageEventPool) and the attribute-based predicates of
+the transitions module, on the hot MESSAGE path and on hit confirmation reactions.
+
+Usage:
+    python -m cogs.state_machine.bench_events --iterations 200000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+
+from .events import EventType, MessageEvent, MessageEventPool, ReactionAddEvent
+from .transitions import message_count_at_least, check_pledge, check_hit_confirmation
+
+
+@dataclass
+class DictEvent:
+    """The previous Event: a non-slotted dataclass with a free-form data dict."""
+    type: EventType
+    member: Any
+    data: Dict[str, Any] = None
+
+    def __post_init__(self):
+        if self.data is None:
+            self.data = {}
+
+
+def dict_check_message_count(event) -> bool:
+    if "message_count" in event.data and event.data["message_count"] >= 5:
+        return True
+    return False
+
+
+def dict_check_pledge(event) -> bool:
+    if event.type != EventType.MESSAGE:
+        return False
+    if "channel_name" not in event.data or event.data["channel_name"] != "pledge-and-surety":
+        return False
+    if "has_attachments" not in event.data or not event.data["has_attachments"]:
+        return False
+    return True
+
+
+def dict_check_hit_confirmation(event) -> bool:
+    if event.type != EventType.REACTION_ADD:
+        return False
+    if "emoji" not in event.data or event.data["emoji"] != "✅":
+        return False
+    if "channel_name" not in event.data or event.data["channel_name"] != "hit-confirmed":
+        return False
+    if "has_attachments" not in event.data or not event.data["has_attachments"]:
+        return False
+    if "mentions" not in event.data or event.member.id not in event.data["mentions"]:
+        return False
+    return True
+
+
+def _handle(transitions: Dict[EventType, List[Tuple[Callable, str]]], event):
+    """The dispatch loop of RoleState.handle_event."""
+    for handler, next_state in transitions[event.type]:
+        if handler(event):
+            return next_state
+    return None
+
+
+def _time(label: str, iterations: int, body: Callable[[int], None]) -> float:
+    started = time.perf_counter()
+    body(iterations)
+    per_event = (time.perf_counter() - started) / iterations * 1e9
+    print(f'{label:<48}{per_event:>9.0f} ns/event')
+    return per_event
+
+
+def _retained_bytes(make: Callable[[int], Any], count: int = 10000) -> float:
+    """Bytes retained per event while ``count`` events are alive."""
+    tracemalloc.start()
+    events = [make(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del events
+    return size / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark event allocation and transition dispatch.')
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    member = SimpleNamespace(id=42)
+    channel = SimpleNamespace(id=7, name='general')
+    content = 'hello there'
+    dict_transitions = {EventType.MESSAGE: [(dict_check_pledge, 'New Member'), (dict_check_message_count, 'Active Member')],
+                        EventType.REACTION_ADD: [(dict_check_hit_confirmation, 'Eliminated')]}
+    typed_transitions = {EventType.MESSAGE: [(check_pledge, 'New Member'), (message_count_at_least(5), 'Active Member')],
+                         EventType.REACTION_ADD: [(check_hit_confirmation, 'Eliminated')]}
+    pool = MessageEventPool()
+
+    def dict_message(i):
+        return DictEvent(type=EventType.MESSAGE, member=member, data={
+            "message_count": 3, "channel_id": channel.id, "channel_name": channel.name, "has_attachments": False,
+            "content": content, "guild_id": 1})
+
+    def typed_message(i):
+        return MessageEvent(member, 3, channel.id, channel.name, False, 1)
+
+    def dict_reaction(i):
+        return DictEvent(type=EventType.REACTION_ADD, member=member, data={
+            "emoji": "✅", "message_id": i, "channel_id": channel.id, "guild_id": 1, "channel_name": "hit-confirmed",
+            "has_attachments": True, "mentions": [42]})
+
+    def typed_reaction(i):
+        return ReactionAddEvent(member, "✅", i, channel.id, "hit-confirmed", 1, True, [42])
+
+    def run_allocate(make):
+        def body(iterations):
+            for i in range(iterations):
+                make(i)
+        return body
+
+    def run_dispatch(make, transitions):
+        def body(iterations):
+            for i in range(iterations):
+                _handle(transitions, make(i))
+        return body
+
+    def pooled_dispatch(iterations):
+        for i in range(iterations):
+            event = pool.acquire(member, 3, channel.id, channel.name, False, 1)
+            _handle(typed_transitions, event)
+            pool.release(event)
+
+    def pooled_allocate(iterations):
+        for i in range(iterations):
+            pool.release(pool.acquire(member, 3, channel.id, channel.name, False, 1))
+
+    print(f'Python {sys.version.split()[0]}, {n} events per run\n')
+    print('MESSAGE')
+    _time('  allocate: dict event (before)', n, run_allocate(dict_message))
+    _time('  allocate: slotted event', n, run_allocate(typed_message))
+    _time('  allocate: pooled slotted event', n, pooled_allocate)
+    _time('  allocate + dispatch: dict event (before)', n, run_dispatch(dict_message, dict_transitions))
+    _time('  allocate + dispatch: slotted event', n, run_dispatch(typed_message, typed_transitions))
+    _time('  allocate + dispatch: pooled slotted event', n, pooled_dispatch)
+    print(f'  retained: dict event {_retained_bytes(dict_message):.0f} B/event, '
+          f'slotted event {_retained_bytes(typed_message):.0f} B/event')
+
+    print('\nREACTION_ADD (hit confirmation)')
+    _time('  allocate + dispatch: dict event (before)', n, run_dispatch(dict_reaction, dict_transitions))
+    _time('  allocate + dispatch: slotted event', n, run_dispatch(typed_reaction, typed_transitions))
+    print(f'  retained: dict event {_retained_bytes(dict_reaction):.0f} B/event, '
+          f'slotted event {_retained_bytes(typed_reaction):.0f} B/event')
+
+
+if __name__ == '__main__':
+    main()
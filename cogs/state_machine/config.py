@@ -1,22 +1,56 @@
+import inspect
 import os
+from typing import Any, Callable, Dict, Iterable, List, Tuple
 
 import discord
 
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
 from .events import EventType
 from .transitions import (
-    check_message_count,
+    message_count_at_least,
     handle_manual_update,
-    check_inactivity,
-    handle_reaction,
+    inactive_for,
+    reaction_emoji,
     check_hit_confirmation,
-    check_pledge, time_elapsed
+    check_pledge, time_elapsed,
+    INACTIVITY_THRESHOLD_DAYS
+)
+from .states import (
+    NewMemberState, ActiveMemberState, EliminatedState, DefaultState, RoleState, RoleTypes, PlayerState,
+    _ElapsedTimeState
 )
-from .states import NewMemberState, ActiveMemberState, EliminatedState, DefaultState, RoleTypes, PlayerState
 
 
-NEWPLAYER_COOLDOWN = os.getenv('NEWPLAYER_COOLDOWN', 30)  # minutes
+STATES_CONFIG = os.getenv('STATES_CONFIG', 'states.toml')  # path of the state machine configuration
 AVAILABLE_STATES: list
 
+STATE_CLASSES = {
+    PlayerState.DEFAULT: DefaultState,
+    PlayerState.NEW_MEMBER: NewMemberState,
+    PlayerState.ACTIVE_MEMBER: ActiveMemberState,
+    PlayerState.ELIMINATED: EliminatedState,
+}
+
+# Maps the condition names of the configuration to the event type they react to and a factory taking
+# the condition's parameters
+CONDITIONS: Dict[str, Tuple[EventType, Callable[..., Callable]]] = {
+    'pledge': (EventType.MESSAGE, lambda: check_pledge),
+    'message_count': (EventType.MESSAGE, lambda at_least: message_count_at_least(at_least)),
+    'time_elapsed': (EventType.TIME_ELAPSED, lambda seconds: time_elapsed(seconds)),
+    'inactivity': (EventType.INACTIVITY, lambda days: inactive_for(days)),
+    'reaction': (EventType.REACTION_ADD, lambda emoji: reaction_emoji(emoji)),
+    'hit_confirmation': (EventType.REACTION_ADD, lambda: check_hit_confirmation),
+    'manual_update': (EventType.MANUAL_UPDATE, lambda: handle_manual_update),
+}
+
+
+class StateConfigError(ValueError):
+    """Raised for a state machine configuration that cannot be loaded or compiled."""
+
 
 def get_role_ids(guild, roles: RoleTypes):
     """
@@ -35,45 +69,112 @@ def get_role_ids(guild, roles: RoleTypes):
             for role in roles}
 
 
-def configure_states(roleIds: dict):
+def load_config(path: str = STATES_CONFIG) -> Dict[str, Any]:
+    """
+    Read a state machine configuration file.
+
+    Raises:
+        StateConfigError: If the file cannot be read or is not valid TOML
     """
-    Configure states with their transitions.
+    try:
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise StateConfigError(f"{path}: {e}")
+
+
+def _compile_transition(state: RoleState, where: str, spec: Any) -> None:
+    if not isinstance(spec, dict):
+        raise StateConfigError(f"{where}: expected a table like {{ when = \"...\", to = \"...\" }}")
+    params = dict(spec)
+    name = params.pop('when', None)
+    if name not in CONDITIONS:
+        raise StateConfigError(f"{where}: unknown condition {name!r}, expected one of {', '.join(CONDITIONS)}")
+    event_type, factory = CONDITIONS[name]
+
+    target = params.pop('to', None)
+    if event_type == EventType.MANUAL_UPDATE:
+        if target is not None:
+            raise StateConfigError(f"{where}: manual_update takes its target state from the command, remove 'to'")
+        next_state = None
+    else:
+        try:
+            next_state = PlayerState(target)
+        except ValueError:
+            raise StateConfigError(f"{where}: 'to' must be one of {', '.join(s.value for s in PlayerState)}")
+
+    if event_type == EventType.TIME_ELAPSED and not isinstance(state, _ElapsedTimeState):
+        raise StateConfigError(f"{where}: {state.name.value} does not track how long members have been in it")
+
+    try:
+        inspect.signature(factory).bind(**params)
+    except TypeError:
+        expected = ', '.join(inspect.signature(factory).parameters) or 'no parameters'
+        raise StateConfigError(f"{where}: {name} takes {expected}, got {', '.join(params) or 'none'}")
+    try:
+        handler = factory(**params)
+    except (TypeError, ValueError) as e:
+        raise StateConfigError(f"{where}: {e}")
+    state.add_transition(event_type, handler, next_state)
+
+
+def compile_states(config: Dict[str, Any], role_ids: Dict[RoleTypes, int]) -> List[RoleState]:
+    """
+    Validate a state machine configuration and build its states.
 
     Args:
-        new_member_role_id: Role ID for new members
-        active_member_role_id: Role ID for active members
-        eliminated_role_id: Role ID for eliminated players (optional)
+        config: Parsed configuration, see states.toml
+        role_ids: Role IDs of the guild, by role type
 
-    Returns:
-        List of configured states
+    Raises:
+        StateConfigError: Naming the first invalid entry
     """
-    # Create states
-    new_member_state = NewMemberState(roleIds)
-    active_member_state = ActiveMemberState(roleIds)
-    eliminated_state = EliminatedState(roleIds)
-    default_state = DefaultState(roleIds)
-
-    # Configure transitions for default state
-    default_state.add_transition(EventType.MESSAGE, check_pledge, PlayerState.NEW_MEMBER)
-
-    # Configure transitions for new member state
-    new_member_state.add_transition(EventType.MESSAGE, check_message_count, PlayerState.ACTIVE_MEMBER)
-    new_member_state.add_transition(EventType.TIME_ELAPSED, time_elapsed(NEWPLAYER_COOLDOWN), PlayerState.ACTIVE_MEMBER)
-    new_member_state.add_transition(EventType.MANUAL_UPDATE, handle_manual_update)
-
-    # Configure transitions for active member state
-    active_member_state.add_transition(EventType.INACTIVITY, check_inactivity, PlayerState.NEW_MEMBER)
-    active_member_state.add_transition(EventType.MANUAL_UPDATE, handle_manual_update)
-    active_member_state.add_transition(EventType.REACTION_ADD, handle_reaction, PlayerState.NEW_MEMBER)
-    active_member_state.add_transition(EventType.REACTION_ADD, check_hit_confirmation, PlayerState.ELIMINATED)
-
-    # Configure transitions for eliminated state
-    eliminated_state.add_transition(EventType.TIME_ELAPSED, time_elapsed(1700), PlayerState.ACTIVE_MEMBER)
-    eliminated_state.add_transition(EventType.MANUAL_UPDATE, handle_manual_update)
+    states_config = config.get('states')
+    if not isinstance(states_config, dict):
+        raise StateConfigError("missing [states] table")
+    unknown = set(states_config) - {state.value for state in PlayerState}
+    if unknown:
+        raise StateConfigError(f"unknown states {', '.join(sorted(unknown))}, expected {', '.join(s.value for s in PlayerState)}")
+
+    states = []
+    for player_state, state_class in STATE_CLASSES.items():
+        state = state_class(role_ids)
+        state_config = states_config.get(player_state.value)
+        if state_config is None:
+            raise StateConfigError(f"missing [states.\"{player_state.value}\"]")
+        if not isinstance(state_config, dict):
+            raise StateConfigError(f"states.\"{player_state.value}\" must be a table")
+        transitions = state_config.get('transitions', [])
+        if not isinstance(transitions, list):
+            raise StateConfigError(f"states.\"{player_state.value}\".transitions must be an array")
+        for i, spec in enumerate(transitions):
+            _compile_transition(state, f"states.\"{player_state.value}\".transitions[{i}]", spec)
+        states.append(state)
+    return states
+
+
+def load_states(guild: discord.Guild, path: str = STATES_CONFIG) -> List[RoleState]:
+    """
+    Load, validate and compile the state machine configuration for a guild.
+
+    Raises:
+        StateConfigError: If the configuration cannot be read or is invalid
+    """
+    config = load_config(path)
+    try:
+        return compile_states(config, get_role_ids(guild, RoleTypes))
+    except StateConfigError as e:
+        raise StateConfigError(f"{path}: {e}")
 
-    global AVAILABLE_STATES
-    AVAILABLE_STATES = [default_state, new_member_state, active_member_state, eliminated_state]
+
+def inactivity_days(states: Iterable[RoleState]) -> float:
+    """Shortest inactivity threshold of the given states, where the inactivity sweep starts looking at members."""
+    days = [getattr(handler, 'days', None)
+            for state in states for handler, _ in state.transitions.get(EventType.INACTIVITY, ())]
+    days = [d for d in days if d is not None]
+    return min(days) if days else INACTIVITY_THRESHOLD_DAYS
 
 
 def init(guild: discord.Guild):
-    configure_states(get_role_ids(guild, RoleTypes))
+    global AVAILABLE_STATES
+    AVAILABLE_STATES = load_states(guild)
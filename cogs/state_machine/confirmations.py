@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, Optional
+
+
+HIT_CONFIRMED_CHANNEL = "hit-confirmed"
+CONFIRMATION_EMOJI = "✅"
+MAX_PENDING_CONFIRMATIONS = 5000  # oldest kill posts are forgotten first, they fall back to a fetch
+
+
+class PendingConfirmation:
+    """What a reaction needs to know about a kill post, captured when the post is made."""
+    __slots__ = ('message_id', 'channel_id', 'author_id', 'mentions', 'has_attachments', 'confirmed')
+
+    def __init__(self, message_id: int, channel_id: int, author_id: int, mentions: Iterable[int], has_attachments: bool):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.mentions: FrozenSet[int] = frozenset(mentions)
+        self.has_attachments = has_attachments
+        self.confirmed = set()  # IDs of mentioned members whose confirmation was already processed
+
+    @property
+    def is_kill_post(self) -> bool:
+        return self.has_attachments and bool(self.mentions)
+
+
+class HitConfirmationIndex:
+    """
+    Index of posts in the hit-confirmed channel, by message ID.
+
+    Reactions resolve against the index in O(1) instead of fetching the message, and each mentioned
+    member's confirmation is claimed once so duplicate reactions are dropped. The index is bounded;
+    the least recently used posts are evicted first.
+    """
+
+    def __init__(self, max_size: int = MAX_PENDING_CONFIRMATIONS):
+        self.max_size = max_size
+        self.posts: OrderedDict = OrderedDict()  # Maps message IDs to PendingConfirmation
+
+    def __len__(self) -> int:
+        return len(self.posts)
+
+    def add(self, message_id: int, channel_id: int, author_id: int, mentions: Iterable[int],
+            has_attachments: bool) -> PendingConfirmation:
+        post = PendingConfirmation(message_id, channel_id, author_id, mentions, has_attachments)
+        self.posts[message_id] = post
+        self.posts.move_to_end(message_id)
+        while len(self.posts) > self.max_size:
+            self.posts.popitem(last=False)
+        return post
+
+    def get(self, message_id: int) -> Optional[PendingConfirmation]:
+        post = self.posts.get(message_id)
+        if post is not None:
+            self.posts.move_to_end(message_id)
+        return post
+
+    def remove(self, message_id: int) -> None:
+        self.posts.pop(message_id, None)
+
+    def claim(self, post: PendingConfirmation, member_id: int) -> bool:
+        """
+        Claim a member's confirmation of a kill post.
+
+        Returns:
+            True the first time the mentioned member confirms the post, False for anyone not mentioned
+            and for repeated confirmations
+        """
+        if not post.is_kill_post or member_id not in post.mentions or member_id in post.confirmed:
+            return False
+        post.confirmed.add(member_id)
+        return True
+
+    def release(self, post: PendingConfirmation, member_id: int) -> None:
+        """Give back a claim whose confirmation did not eliminate the member, so a later reaction can retry."""
+        post.confirmed.discard(member_id)
@@ -1,27 +1,139 @@
-import discord
-from enum import Enum, auto
-from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from enum import IntEnum
+from typing import TYPE_CHECKING, ClassVar, List, Optional, Sequence
 
+if TYPE_CHECKING:
+    import discord
 
-class EventType(Enum):
+
+class EventType(IntEnum):
     """Types of events that can trigger state transitions."""
-    MESSAGE = auto()
-    MEMBER_JOIN = auto()
-    REACTION_ADD = auto()
-    MANUAL_UPDATE = auto()
-    INACTIVITY = auto()
-    TIME_ELAPSED = auto()
-    # Add more event types as needed
+    MESSAGE = 1
+    MEMBER_JOIN = 2
+    REACTION_ADD = 3
+    MANUAL_UPDATE = 4
+    INACTIVITY = 5
+    TIME_ELAPSED = 6
+    # Add more event types as needed, with a matching Event subclass
 
 
-@dataclass
 class Event:
-    """Base class for events in the state machine."""
-    type: EventType
-    member: discord.Member
-    data: Dict[str, Any] = None
-
-    def __post_init__(self):
-        if self.data is None:
-            self.data = {}
+    """
+    Base class for events in the state machine.
+
+    Every event type has its own subclass with typed, slotted fields, so transition predicates read
+    attributes instead of probing a dict, and events carry no per-instance ``__dict__``.
+    """
+    __slots__ = ('member',)
+    type: ClassVar[EventType]
+
+    def __init__(self, member: 'discord.Member'):
+        self.member = member
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for cls in type(self).__mro__
+                           for name in getattr(cls, '__slots__', ()))
+        return f'{type(self).__name__}({fields})'
+
+
+class MessageEvent(Event):
+    """A member posted a message in a guild channel."""
+    __slots__ = ('message_count', 'channel_id', 'channel_name', 'has_attachments', 'guild_id')
+    type = EventType.MESSAGE
+
+    def __init__(self, member: 'discord.Member', message_count: int, channel_id: int, channel_name: str,
+                 has_attachments: bool, guild_id: int):
+        self.member = member
+        self.message_count = message_count
+        self.channel_id = channel_id
+        self.channel_name = channel_name
+        self.has_attachments = has_attachments
+        self.guild_id = guild_id
+
+
+class MemberJoinEvent(Event):
+    """A member joined the guild."""
+    __slots__ = ()
+    type = EventType.MEMBER_JOIN
+
+
+class ReactionAddEvent(Event):
+    """A member reacted to a message."""
+    __slots__ = ('emoji', 'message_id', 'channel_id', 'channel_name', 'guild_id', 'has_attachments', 'mentions')
+    type = EventType.REACTION_ADD
+
+    def __init__(self, member: 'discord.Member', emoji: str, message_id: int, channel_id: int, channel_name: str,
+                 guild_id: int, has_attachments: bool, mentions: Sequence[int]):
+        self.member = member
+        self.emoji = emoji
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.channel_name = channel_name
+        self.guild_id = guild_id
+        self.has_attachments = has_attachments
+        self.mentions = mentions  # IDs of the members mentioned in the message
+
+
+class ManualUpdateEvent(Event):
+    """An administrator set a member's state."""
+    __slots__ = ('target_state',)
+    type = EventType.MANUAL_UPDATE
+
+    def __init__(self, member: 'discord.Member', target_state: str):
+        self.member = member
+        self.target_state = target_state
+
+
+class InactivityEvent(Event):
+    """A member has not been active for a while."""
+    __slots__ = ('days_since_last_message', 'guild_id')
+    type = EventType.INACTIVITY
+
+    def __init__(self, member: 'discord.Member', days_since_last_message: float, guild_id: int):
+        self.member = member
+        self.days_since_last_message = days_since_last_message
+        self.guild_id = guild_id
+
+
+class TimeElapsedEvent(Event):
+    """Periodic check of how long a member has been in their current state."""
+    __slots__ = ('start_time',)
+    type = EventType.TIME_ELAPSED
+
+    def __init__(self, member: 'discord.Member', start_time: Optional[float]):
+        self.member = member
+        self.start_time = start_time  # when the member entered the state, None if the state does not track it
+
+
+class MessageEventPool:
+    """
+    Reuses MessageEvent objects on the hot message path.
+
+    ``acquire`` fills a free event (or allocates one when none is free) and ``release`` clears its
+    references and keeps it for the next message. Events must not be used after they are released.
+    """
+
+    def __init__(self, size: int = 64):
+        self.size = size  # free events kept at most, bounds the pool after a burst of concurrent messages
+        self._free: List[MessageEvent] = []
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, member: 'discord.Member', message_count: int, channel_id: int, channel_name: str,
+                has_attachments: bool, guild_id: int) -> MessageEvent:
+        if not self._free:
+            self.allocated += 1
+            return MessageEvent(member, message_count, channel_id, channel_name, has_attachments, guild_id)
+        self.reused += 1
+        event = self._free.pop()
+        event.member = member
+        event.message_count = message_count
+        event.channel_id = channel_id
+        event.channel_name = channel_name
+        event.has_attachments = has_attachments
+        event.guild_id = guild_id
+        return event
+
+    def release(self, event: MessageEvent) -> None:
+        if len(self._free) < self.size:
+            event.member = None  # don't keep the member alive while the event is idle
+            self._free.append(event)
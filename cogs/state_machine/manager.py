@@ -1,7 +1,8 @@
 import discord
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 from .states import RoleState, RoleTypes, ROLES_TYPE_NAMES as SUPPORTED_ROLES, DefaultState, PlayerState
 from .events import Event, EventType
+from ..telemetry import tracing
 
 
 class StateNotFoundError(BaseException):
@@ -18,11 +19,44 @@ class RoleManager:
     def __init__(self):
         self.states: Dict[PlayerState, RoleState] = {}
         self.member_states: Dict[int, str] = {}  # Maps member IDs to current state names
+        self.version = 0  # incremented on every transition, lets readers detect changes cheaply
+        self.listeners: List[Callable[[discord.Member, Optional[PlayerState], PlayerState], None]] = []
 
     def add_state(self, state: RoleState) -> None:
         """Add a state to the manager."""
         self.states[state.name] = state
 
+    def replace_states(self, states: List[RoleState]) -> None:
+        """
+        Swap in a new set of states, e.g. after the configuration was reloaded, without touching members.
+
+        Members keep their current state. The start times of elapsed-time states are carried over by sharing
+        the old state's dict, so running timers continue under the new thresholds, and events that are
+        still being processed by an old state object update the same timers.
+        """
+        missing = set(self.member_states.values()) - {state.name for state in states}
+        if missing:
+            raise ValueError(f"Members are in states missing from the new configuration: {missing}")
+        for state in states:
+            previous = self.states.get(state.name)
+            if hasattr(previous, 'start_times') and hasattr(state, 'start_times'):
+                state.start_times = previous.start_times
+        # update in place, the dict is shared with readers such as the state API
+        self.states.clear()
+        for state in states:
+            self.add_state(state)
+        self.version += 1
+
+    def add_listener(self, listener: Callable[[discord.Member, Optional[PlayerState], PlayerState], None]) -> None:
+        """
+        Subscribe to state transitions.
+
+        Args:
+            listener: Called with the member, its previous state (None if unknown) and its new state
+            after every transition
+        """
+        self.listeners.append(listener)
+
     def get_member_state(self, member_id: int) -> Optional[RoleState]:
         """Get the current state of a member."""
         state_name = self.member_states.get(member_id)
@@ -63,19 +97,27 @@ class RoleManager:
         if state not in self.states:
             raise ValueError(f"State {state.value} does not exist")
 
-        # Exit current state if exists
-        current_state = self.get_member_state(member.id)
-        if current_state:
-            await current_state.exit(member)
-
-        # Enter new state
-        new_state = self.states[state]
-        await new_state.enter(member)
-
-        # Update member state
-        self.member_states[member.id] = state
+        with tracing.span('set_member_state', member_id=member.id, state=str(state)):
+            # Exit current state if exists
+            current_state = self.get_member_state(member.id)
+            if current_state:
+                with tracing.span('exit', state=str(current_state.name)):
+                    await current_state.exit(member)
+
+            # Enter new state
+            new_state = self.states[state]
+            with tracing.span('enter', state=str(state)):
+                await new_state.enter(member)
+
+            # Update member state
+            previous_state = self.member_states.get(member.id)
+            self.member_states[member.id] = state
+            self.version += 1
         print(f"Member {member.display_name} transitioned to {state} state")
 
+        for listener in self.listeners:
+            listener(member, previous_state, state)
+
     async def process_event(self, event: Event) -> None:
         """
         Process an event and trigger state transitions if needed.
@@ -85,23 +127,25 @@ class RoleManager:
         """
         if event is None:
             return
-        # Get current state
-        current_state_name = self.member_states.get(event.member.id)
-
-        # If no current state try to resolve the state using event context or member context
-        if not current_state_name:
-            await self._resolve_unknown_state(event)
+        with tracing.span('process_event', event_type=event.type.name, member_id=event.member.id):
+            # Get current state
             current_state_name = self.member_states.get(event.member.id)
 
-        # Get current state object
-        current_state = self.states[current_state_name]
+            # If no current state try to resolve the state using event context or member context
+            if not current_state_name:
+                await self._resolve_unknown_state(event)
+                current_state_name = self.member_states.get(event.member.id)
+
+            # Get current state object
+            current_state = self.states[current_state_name]
 
-        # Handle event and check for transition
-        next_state = current_state.handle_event(event)
+            # Handle event and check for transition
+            with tracing.span('handle_event', state=str(current_state_name)):
+                next_state = current_state.handle_event(event)
 
-        # If transition is needed, change state
-        if next_state and next_state in self.states:
-            await self.set_member_state(event.member, next_state)
+            # If transition is needed, change state
+            if next_state and next_state in self.states:
+                await self.set_member_state(event.member, next_state)
 
     async def _resolve_unknown_state(self, event: Event) -> RoleState:
         """Attempts to find a state for the current member, given known context"""
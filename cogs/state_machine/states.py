@@ -1,10 +1,13 @@
 import discord
 import time
+from functools import partial
 from collections import defaultdict
 from enum import Enum
 from abc import ABC
 from typing import Dict, List, Optional, Any, Callable
 from .events import Event, EventType
+from ..telemetry import tracing
+from ..rest.scheduler import scheduler as rest_scheduler, Priority
 
 
 class RoleTypes(Enum):
@@ -39,7 +42,7 @@ class RoleState(ABC):
             event_type: The type of event that triggers this transition
             handler: Function that takes an Event and returns the next state name or None if no transition
             next_state: The state to transition to if the handler returns True, None if the transition handler supplies
-            the target_state in the event data
+            the target_state of the event
         """
         if next_state and not isinstance(next_state, PlayerState):
             raise ValueError("next_state must be of PlayerState type")
@@ -59,20 +62,21 @@ class RoleState(ABC):
 
         for handler, next_state in self.transitions[event.type]:
             if handler(event):
-                # For manual updates, use the target_state from the event data if available
-                if event.type == EventType.MANUAL_UPDATE and "target_state" in event.data:
+                # For manual updates, use the target_state of the event if available
+                if event.type == EventType.MANUAL_UPDATE and event.target_state:
                     # Find the PlayerState enum value that matches the target_state string
                     try:
-                        return PlayerState(event.data["target_state"])
+                        return PlayerState(event.target_state)
                     except ValueError:
-                        print(f"Invalid target_state {event.data['target_state']} for manual update")
+                        print(f"Invalid target_state {event.target_state} for manual update")
                         # If the target_state is not a valid PlayerState, use the configured next_state
                         return None
                 return next_state
         return None
 
-    def get_ctx(self, member_id: int) -> Dict[str, any]:
-        return {}
+    def start_time(self, member_id: int) -> Optional[float]:
+        """When the member entered this state, for states that track it."""
+        return None
 
     async def enter(self, member: discord.Member) -> None:
         """
@@ -85,7 +89,9 @@ class RoleState(ABC):
             role = member.guild.get_role(role_id)
             if role and role not in member.roles:
                 try:
-                    await member.add_roles(role, reason=f"Entering {self.name} state")
+                    with tracing.span('add_roles', role=role.name):
+                        await rest_scheduler.submit(Priority.ROLE_CHANGE, f'role:{member.guild.id}',
+                                                    partial(member.add_roles, role, reason=f"Entering {self.name} state"))
                     print(f"Added role {role.name} to {member.display_name}")
                 except discord.Forbidden:
                     print(f"Missing permissions to add role {role.name} to {member.display_name}")
@@ -103,7 +109,9 @@ class RoleState(ABC):
             role = member.guild.get_role(role_id)
             if role and role in member.roles:
                 try:
-                    await member.remove_roles(role, reason=f"Exiting {self.name} state")
+                    with tracing.span('remove_roles', role=role.name):
+                        await rest_scheduler.submit(Priority.ROLE_CHANGE, f'role:{member.guild.id}',
+                                                    partial(member.remove_roles, role, reason=f"Exiting {self.name} state"))
                     print(f"Removed role {role.name} from {member.display_name}")
                 except discord.Forbidden:
                     print(f"Missing permissions to remove role {role.name} from {member.display_name}")
@@ -120,8 +128,16 @@ class _ElapsedTimeState(RoleState):
         super().__init__(player_state, role_ids)
         self.start_times = {}  # Maps member IDs to elimination timestamps
 
-    def get_ctx(self, member_id: int) -> Dict[str, any]:
-        return {'start_time': self.start_times[member_id]}
+    def start_time(self, member_id: int) -> Optional[float]:
+        return self.start_times.get(member_id)
+
+    def duration(self) -> Optional[float]:
+        """Seconds after which the TIME_ELAPSED transition moves members on, None if the state has none."""
+        for handler, _ in self.transitions[EventType.TIME_ELAPSED]:
+            delta = getattr(handler, 'delta', None)
+            if delta is not None:
+                return float(delta)
+        return None
 
     async def exit(self, member: discord.Member) -> None:
         """
@@ -1,38 +1,50 @@
-from typing import Optional, Callable
+from typing import Callable
 import time
-from .events import Event, EventType
+from .events import (
+    Event, EventType, MessageEvent, ReactionAddEvent, ManualUpdateEvent, InactivityEvent, TimeElapsedEvent
+)
 
 
-def check_message_count(event: Event) -> bool:
+INACTIVITY_THRESHOLD_DAYS = 30  # used by the inactivity sweep when no state reacts to INACTIVITY events
+
+
+def message_count_at_least(count: int) -> Callable[[MessageEvent], bool]:
     """Check if member has sent enough messages to transition to active state."""
-    if "message_count" in event.data and event.data["message_count"] >= 5:
-        return True
-    return False
+    if count < 1:
+        raise ValueError("the message count threshold must be at least 1")
+
+    def func(event: MessageEvent) -> bool:
+        return event.message_count >= count
+
+    return func
 
 
-def handle_manual_update(event: Event) -> bool:
+def handle_manual_update(event: ManualUpdateEvent) -> bool:
     """Handle manual state update requests."""
-    if "target_state" in event.data:
-        return True
-    return False
+    return bool(event.target_state)
 
 
-def check_inactivity(event: Event) -> bool:
+def inactive_for(days: float) -> Callable[[InactivityEvent], bool]:
     """Check if member has been inactive for too long."""
-    if "days_since_last_message" in event.data and event.data["days_since_last_message"] > 30:
-        return True  # Demote to new member if inactive
-    return False
+    if days <= 0:
+        raise ValueError("days must be positive")
 
+    def func(event: InactivityEvent) -> bool:
+        return event.days_since_last_message > days  # Demote to new member if inactive
 
-def handle_reaction(event: Event) -> bool:
-    """Example of handling reaction events."""
-    # This is just an example - you would implement your own logic
-    # For example, transitioning based on reactions to specific messages
-    if "emoji" in event.data:
-        # Example: if user reacts with a specific emoji, change their state
-        if event.data["emoji"] == "📊":  # Example: chart emoji
-            return True  # Just an example transition
-    return False
+    func.days = days  # tells the inactivity sweep which members to report
+    return func
+
+
+def reaction_emoji(emoji: str) -> Callable[[ReactionAddEvent], bool]:
+    """Transition when the member reacts with a specific emoji."""
+    if not emoji:
+        raise ValueError("emoji must not be empty")
+
+    def func(event: ReactionAddEvent) -> bool:
+        return event.emoji == emoji
+
+    return func
 
 
 def check_pledge(event: Event) -> bool:
@@ -47,11 +59,11 @@ def check_pledge(event: Event) -> bool:
         return False
 
     # Check if the channel is "pledge-and-surety"
-    if "channel_name" not in event.data or event.data["channel_name"] != "pledge-and-surety":
+    if event.channel_name != "pledge-and-surety":
         return False
 
     # Check if the message has attachments (photos)
-    if "has_attachments" not in event.data or not event.data["has_attachments"]:
+    if not event.has_attachments:
         return False
 
     # All conditions met, transition to New Player state
@@ -72,41 +84,43 @@ def check_hit_confirmation(event: Event) -> bool:
         return False
 
     # Check if the emoji is a tick
-    if "emoji" not in event.data or event.data["emoji"] != "✅":
+    if event.emoji != "✅":
         return False
 
     # Check if the channel is "hit-confirmed"
-    if "channel_name" not in event.data or event.data["channel_name"] != "hit-confirmed":
+    if event.channel_name != "hit-confirmed":
         return False
 
     # Check if the message has attachments (photos)
-    if "has_attachments" not in event.data or not event.data["has_attachments"]:
+    if not event.has_attachments:
         return False
 
     # Check if the player is mentioned in the message
-    if "mentions" not in event.data or event.member.id not in event.data["mentions"]:
+    if event.member.id not in event.mentions:
         return False
 
     # All conditions met, transition to Eliminated state
     return True
 
 
-def time_elapsed(delta: int) -> Callable[[Event], bool]:
+def time_elapsed(delta: float) -> Callable[[Event], bool]:
     """
-    Check if a certain delta of time has elapsed.
+    Check if a certain delta of time, in seconds, has elapsed.
     """
+    if delta < 0:
+        raise ValueError("seconds must not be negative")
 
-    def func(event: Event) -> bool:
+    def func(event: TimeElapsedEvent) -> bool:
         if event.type != EventType.TIME_ELAPSED:
             return False
 
         # Check if the elimination time is available
-        if "start_time" not in event.data:
-            print('[time_elapsed] start_time attribute could not be found in event.data')
+        start_time = event.start_time
+        if start_time is None:
+            print('[time_elapsed] start_time is not tracked for the state of this member')
             return False
 
         # Check if 2 hours have passed since elimination
-        start_time = event.data["start_time"]
         current_time = time.time()
 
         # has the elapsed time exceeded the delta?
@@ -115,4 +129,5 @@ def time_elapsed(delta: int) -> Callable[[Event], bool]:
             return True
         return False
 
+    func.delta = delta  # lets readers such as the state API tell when the transition fires
     return func
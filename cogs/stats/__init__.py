@@ -0,0 +1,3 @@
+# Stats package for the bot
+# This package contains the persistent per-player game statistics behind the
+# leaderboard, updated incrementally from state transitions and hit confirmations.
@@ -0,0 +1,76 @@
+from typing import Dict, List
+
+
+class FenwickTree:
+    """
+    Counts over the non-negative integers with O(log n) updates and prefix sums.
+
+    The capacity is a power of two and doubles when a larger index is added. Doubling only needs the new
+    root to hold the old total, every other new node covers indices that are all still zero.
+    """
+
+    def __init__(self, capacity: int = 16):
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.tree: List[int] = [0] * (size + 1)  # 1-based, node i covers indices (i - lowbit(i), i]
+
+    @property
+    def capacity(self) -> int:
+        return len(self.tree) - 1
+
+    def add(self, index: int, delta: int) -> None:
+        while index >= self.capacity:
+            total = self.prefix(self.capacity - 1)
+            self.tree.extend([0] * self.capacity)
+            self.tree[-1] = total
+        i = index + 1
+        tree = self.tree
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> int:
+        """Sum of the counts at indices 0 to ``index``, inclusive."""
+        i = min(index + 1, self.capacity)
+        tree = self.tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+
+class KillRanks:
+    """
+    Order statistics of (kills, deaths) scores, more kills first and fewer deaths breaking ties.
+
+    Players are counted per kill count, and per death count within each kill count, so adding, removing
+    and ranking a score are each a few O(log n) Fenwick tree walks.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.by_kills = FenwickTree()
+        self.by_deaths: Dict[int, FenwickTree] = {}  # Maps kill counts to the death counts of those players
+
+    def __len__(self) -> int:
+        return self.total
+
+    def add(self, kills: int, deaths: int, count: int = 1) -> None:
+        self.total += count
+        self.by_kills.add(kills, count)
+        deaths_tree = self.by_deaths.get(kills)
+        if deaths_tree is None:
+            deaths_tree = self.by_deaths[kills] = FenwickTree()
+        deaths_tree.add(deaths, count)
+
+    def remove(self, kills: int, deaths: int) -> None:
+        self.add(kills, deaths, -1)
+
+    def better_than(self, kills: int, deaths: int) -> int:
+        """Number of scores strictly better than (kills, deaths)."""
+        more_kills = self.total - self.by_kills.prefix(kills)
+        deaths_tree = self.by_deaths.get(kills)
+        fewer_deaths = deaths_tree.prefix(deaths - 1) if deaths_tree is not None and deaths > 0 else 0
+        return more_kills + fewer_deaths
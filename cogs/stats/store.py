@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .ranking import KillRanks
+
+
+STATS_DB = os.getenv('STATS_DB', 'stats.db')
+STATS_FLUSH_INTERVAL = float(os.getenv('STATS_FLUSH_INTERVAL', 2))  # seconds updates are batched before they are committed
+
+# Leaderboard orderings, each backed by an index so top-N queries never scan the table. The active board
+# merges the closed stretches with the open ones, see StatsStore._top_active
+LEADERBOARDS = {
+    'kills': 'kills DESC, deaths ASC',
+    'streak': 'best_streak DESC, kills DESC',
+    'active': None,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    member_id INTEGER PRIMARY KEY,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    active_seconds REAL NOT NULL DEFAULT 0,  -- completed time as an active player
+    active_since REAL,  -- start of the current active stretch, NULL when not active
+    streak INTEGER NOT NULL DEFAULT 0,  -- kills since the last death
+    best_streak INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE INDEX IF NOT EXISTS players_by_kills ON players (kills DESC, deaths ASC);
+CREATE INDEX IF NOT EXISTS players_by_streak ON players (best_streak DESC, kills DESC);
+DROP INDEX IF EXISTS players_by_active;
+CREATE INDEX IF NOT EXISTS players_by_closed_active ON players (active_seconds DESC) WHERE active_since IS NULL;
+-- the active time of an open stretch is now + active_seconds - active_since, so its order does not depend on now
+CREATE INDEX IF NOT EXISTS players_by_open_active ON players ((active_seconds - active_since) DESC)
+    WHERE active_since IS NOT NULL;
+"""
+
+ALIVE_SQL = "INSERT OR REPLACE INTO meta (key, value) VALUES ('alive_at', ?)"
+
+
+@dataclass
+class PlayerStats:
+    member_id: int
+    kills: int = 0
+    deaths: int = 0
+    active_seconds: float = 0.0
+    active_since: Optional[float] = None
+    streak: int = 0
+    best_streak: int = 0
+
+    def active_time(self, now: Optional[float] = None) -> float:
+        """Seconds spent as an active player, including the current stretch."""
+        if self.active_since is None:
+            return self.active_seconds
+        return self.active_seconds + (time.time() if now is None else now) - self.active_since
+
+
+class StatsStore:
+    """
+    Per-player game statistics in SQLite, maintained incrementally.
+
+    Every update touches a single row by primary key. Updates are queued and committed in batches on a
+    dedicated thread, which also runs every query in order, so the event loop never waits on SQLite.
+    Leaderboards read the first rows of an index and a player's stats are a primary key lookup, so no
+    query scans the table or the game's message history.
+
+    Kill ranks come from order statistics of every player's (kills, deaths) kept in memory, see KillRanks,
+    so recording a kill or death and looking up a rank are both O(log n).
+    """
+
+    def __init__(self, path: str = STATS_DB):
+        # only ever used from the executor's single thread after this constructor
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        # WAL with normal sync keeps each small write transaction cheap
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._close_open_stretches()
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stats-db')
+        self._pending: List[Tuple[str, tuple]] = []  # statements waiting for the next commit
+        self._flush_task: Optional[asyncio.Task] = None
+        self.commits = 0
+
+        self._scores: Dict[int, Tuple[int, int]] = {}  # Maps member IDs to (kills, deaths)
+        self._ranks = KillRanks()
+        for member_id, kills, deaths in self.connection.execute('SELECT member_id, kills, deaths FROM players'):
+            self._scores[member_id] = (kills, deaths)
+            self._ranks.add(kills, deaths)
+
+    def _close_open_stretches(self) -> None:
+        """
+        End the stretches left open by the previous run when it was last known to be running, so the
+        time the bot was down is not counted as active time.
+        """
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'alive_at'").fetchone()
+        alive_at = row[0] if row else None
+        with self.connection:
+            self.connection.execute(
+                'UPDATE players SET active_seconds = active_seconds + MAX(COALESCE(?, active_since) - active_since, 0), '
+                'active_since = NULL WHERE active_since IS NOT NULL', (alive_at,))
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.connection.close)
+        self._executor.shutdown(wait=False)
+
+    def _queue(self, sql: str, params: tuple) -> None:
+        self._pending.append((sql, params))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(STATS_FLUSH_INTERVAL)
+        self._flush_task = None  # updates queued while committing schedule the next flush
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Commit the queued updates, with the time the bot was last known to be running."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        batch.append((ALIVE_SQL, (time.time(),)))
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._commit, batch)
+        except sqlite3.Error as e:
+            print(f"Could not save {len(batch)} stats updates: {e}")
+
+    def _commit(self, batch: List[Tuple[str, tuple]]) -> None:
+        with self.connection:
+            for sql, params in batch:
+                self.connection.execute(sql, params)
+        self.commits += 1
+
+    async def _query(self, sql: str, params: tuple) -> List[sqlite3.Row]:
+        # queued updates are committed first, they run on the same thread in order
+        await self.flush()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: self.connection.execute(sql, params).fetchall())
+
+    def _update(self, member_id: int, assignments: str, *params, create: bool = True) -> None:
+        if create:
+            self._queue('INSERT OR IGNORE INTO players (member_id) VALUES (?)', (member_id,))
+            if member_id not in self._scores:
+                self._scores[member_id] = (0, 0)
+                self._ranks.add(0, 0)
+        self._queue(f'UPDATE players SET {assignments} WHERE member_id = ?', (*params, member_id))
+
+    def _rescore(self, member_id: int, kills: int, deaths: int) -> None:
+        old_kills, old_deaths = self._scores[member_id]
+        self._ranks.remove(old_kills, old_deaths)
+        self._ranks.add(old_kills + kills, old_deaths + deaths)
+        self._scores[member_id] = (old_kills + kills, old_deaths + deaths)
+
+    def record_kill(self, killer_id: int) -> None:
+        self._update(killer_id, 'kills = kills + 1, streak = streak + 1, best_streak = MAX(best_streak, streak + 1)')
+        self._rescore(killer_id, 1, 0)
+
+    def record_death(self, member_id: int) -> None:
+        self._update(member_id, 'deaths = deaths + 1, streak = 0')
+        self._rescore(member_id, 0, 1)
+
+    def start_active(self, member_id: int, at: Optional[float] = None) -> None:
+        """Start an active stretch, unless one is already running."""
+        self._update(member_id, 'active_since = COALESCE(active_since, ?)', time.time() if at is None else at)
+
+    def stop_active(self, member_id: int, at: Optional[float] = None) -> None:
+        """End the current active stretch, if any, and add it to the member's active time."""
+        self._update(member_id, 'active_seconds = active_seconds + COALESCE(? - active_since, 0), active_since = NULL',
+                     time.time() if at is None else at, create=False)
+
+    def mark_alive(self) -> None:
+        """Record that the bot is running, bounding the active time counted if it stops without warning."""
+        self._queue(ALIVE_SQL, (time.time(),))
+
+    async def get(self, member_id: int) -> Optional[PlayerStats]:
+        rows = await self._query('SELECT * FROM players WHERE member_id = ?', (member_id,))
+        return PlayerStats(**rows[0]) if rows else None
+
+    async def top(self, board: str = 'kills', limit: int = 10) -> List[PlayerStats]:
+        """
+        The first players of a leaderboard.
+
+        Args:
+            board: One of LEADERBOARDS
+            limit: Number of players to return
+        """
+        if board == 'active':
+            return await self._top_active(limit)
+        rows = await self._query(f'SELECT * FROM players ORDER BY {LEADERBOARDS[board]} LIMIT ?', (limit,))
+        return [PlayerStats(**row) for row in rows]
+
+    async def _top_active(self, limit: int) -> List[PlayerStats]:
+        """Merge the leaders of the closed and of the open stretches, each read from its own index."""
+        closed = await self._query('SELECT * FROM players WHERE active_since IS NULL '
+                                   'ORDER BY active_seconds DESC LIMIT ?', (limit,))
+        running = await self._query('SELECT * FROM players WHERE active_since IS NOT NULL '
+                                    'ORDER BY active_seconds - active_since DESC LIMIT ?', (limit,))
+        now = time.time()
+        players = [PlayerStats(**row) for row in closed + running]
+        return heapq.nlargest(limit, players, key=lambda stats: stats.active_time(now))
+
+    def rank(self, stats: PlayerStats) -> int:
+        """Rank of a player on the kills leaderboard: one more than the players with a better score."""
+        return self._ranks.better_than(stats.kills, stats.deaths) + 1
+
+    def __len__(self) -> int:
+        return len(self._scores)
@@ -0,0 +1,3 @@
+# Telemetry package for the bot
+# This package contains lightweight, dependency-free instrumentation
+# (tracing, profiling, etc.) shared by the cogs.
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', 0.25))  # seconds between loop lag samples
+SLOW_CALLBACK_THRESHOLD = float(os.getenv('SLOW_CALLBACK_THRESHOLD', 0.5))  # seconds the loop may block before its stack is captured
+LAG_HISTORY = 2400  # samples kept for percentiles (10 minutes at the default interval)
+SLOW_CALLBACK_HISTORY = 20
+
+
+@dataclass
+class SlowCallback:
+    """A stretch of time during which the event loop did not get to run its sampler."""
+    detected_at: float  # wall clock time the stall was detected
+    duration: float  # seconds the loop was blocked, filled in once the loop recovers
+    task: Optional[str]  # name of the asyncio task that was running, if any
+    stack: List[str]  # formatted stack of the event loop thread while it was blocked
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and captures the stack of callbacks that block the loop.
+
+    A sampler task sleeps for a fixed interval and records how late it wakes up. A watchdog thread
+    checks the sampler's heartbeat and, when the loop has not ticked for longer than the threshold,
+    captures the loop thread's current stack, i.e. the code that is blocking it.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = SLOW_CALLBACK_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag_samples = deque(maxlen=LAG_HISTORY)
+        self.slow_callbacks = deque(maxlen=SLOW_CALLBACK_HISTORY)
+        self.max_lag = 0.0
+        self._last_tick = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start sampling the running loop. Must be called from a coroutine running on that loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = self._loop.create_task(self._sample(), name='loop-lag-sampler')
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+        print(f'[loop_monitor] Sampling loop lag every {self.interval * 1000:.0f}ms, '
+              f'capturing stacks of callbacks blocking longer than {self.threshold * 1000:.0f}ms')
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.lag_samples.append(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            self._last_tick = now
+
+    def _watch(self) -> None:
+        """Watchdog thread body: detect stalls and capture the blocking stack once per stall."""
+        stalled_tick = None
+        record: Optional[SlowCallback] = None
+        while not self._stopped.wait(self.threshold / 4):
+            last_tick = self._last_tick
+            if record is not None and last_tick != stalled_tick:
+                # the loop recovered, the sampler's wake-up marks the end of the stall
+                record.duration = last_tick - stalled_tick - self.interval
+                self._report(record)
+                record = None
+            if record is None and time.monotonic() - last_tick > self.interval + self.threshold:
+                stalled_tick = last_tick
+                record = self._capture()
+
+    def _capture(self) -> SlowCallback:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame) if frame else []
+        task = None
+        try:
+            current = asyncio.current_task(self._loop)
+            if current is not None:
+                task = current.get_name()
+        except RuntimeError:
+            pass
+        return SlowCallback(detected_at=time.time(), duration=0.0, task=task, stack=stack)
+
+    def _report(self, record: SlowCallback) -> None:
+        self.slow_callbacks.append(record)
+        print(f'[loop_monitor] Event loop blocked for {record.duration * 1000:.0f}ms '
+              f'(task: {record.task or "none"}). Stack while blocked:\n{"".join(record.stack)}')
+
+    def stats(self) -> Dict[str, float]:
+        """Return loop lag percentiles (in milliseconds) over the recent sample window."""
+        samples = sorted(self.lag_samples)
+        if not samples:
+            return {'p50': 0.0, 'p99': 0.0, 'max': self.max_lag * 1000, 'slow_callbacks': len(self.slow_callbacks)}
+        return {
+            'p50': samples[len(samples) // 2] * 1000,
+            'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+            'max': self.max_lag * 1000,
+            'slow_callbacks': len(self.slow_callbacks),
+        }
+
+
+# Shared monitor for the bot process
+monitor = LoopMonitor()
@@ -0,0 +1,136 @@
+import os
+import random
+import sys
+import tracemalloc
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+SAMPLE_THRESHOLD = 2000  # containers larger than this are sized from a random sample of their items
+SAMPLE_SIZE = 500
+
+
+def approx_sizeof(obj, _seen: Optional[set] = None) -> int:
+    """
+    Approximate the deep size of a structure in bytes.
+
+    Walks dicts, lists, tuples, sets and deques recursively. Large containers are estimated by sizing a
+    random sample of their items and extrapolating, so reporting stays cheap on structures that have grown big.
+    Shared objects (interned strings, cached small ints) are counted once.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        count = len(obj)
+        if count > SAMPLE_THRESHOLD:
+            sample = random.sample(list(obj.items()), SAMPLE_SIZE)
+            return size + sum(approx_sizeof(k, _seen) + approx_sizeof(v, _seen) for k, v in sample) * count // SAMPLE_SIZE
+        return size + sum(approx_sizeof(k, _seen) + approx_sizeof(v, _seen) for k, v in obj.items())
+
+    if isinstance(obj, (list, tuple, set, frozenset, deque)):
+        count = len(obj)
+        if count > SAMPLE_THRESHOLD:
+            sample = random.sample(list(obj), SAMPLE_SIZE)
+            return size + sum(approx_sizeof(item, _seen) for item in sample) * count // SAMPLE_SIZE
+        return size + sum(approx_sizeof(item, _seen) for item in obj)
+
+    return size
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Current resident set size of the process, falling back to the peak RSS where /proc is unavailable.
+
+    Returns:
+        The size in bytes, or None where neither is available (Windows)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def discord_cache_sizes(bot) -> Dict[str, int]:
+    """Entry counts of discord.py's internal caches."""
+    return {
+        'guilds': len(bot.guilds),
+        'members': sum(len(guild.members) for guild in bot.guilds),
+        'users': len(bot.users),
+        'channels': sum(len(guild.channels) for guild in bot.guilds),
+        'roles': sum(len(guild.roles) for guild in bot.guilds),
+        'emojis': len(bot.emojis),
+        'cached_messages': len(bot.cached_messages),
+        'private_channels': len(bot.private_channels),
+    }
+
+
+class TracemallocTracker:
+    """
+    Diffs consecutive tracemalloc snapshots to show which allocation sites are growing.
+
+    Each consumer diffs against its own previous snapshot, named by a baseline key, so one report
+    doesn't hide the growth another one has not shown yet.
+    """
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self._start: Optional[tracemalloc.Snapshot] = None  # baseline of every key's first diff
+        self._previous: Dict[str, tracemalloc.Snapshot] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._start = self._snapshot()
+        self._previous.clear()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    def diff(self, top: int = 10, baseline: str = 'default') -> List[Tuple[str, int, int]]:
+        """
+        Compare against the previous snapshot of a baseline and make the new snapshot its baseline.
+
+        Args:
+            top: Number of allocation sites to return
+            baseline: Key of the consumer's baseline
+
+        Returns:
+            List of (allocation site, size difference in bytes, current size in bytes), largest growth first
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = self._snapshot()
+        previous = self._previous.get(baseline, self._start)
+        self._previous[baseline] = snapshot
+        if previous is None:
+            return []
+        stats = snapshot.compare_to(previous, 'lineno')
+        return [(str(stat.traceback), stat.size_diff, stat.size) for stat in stats[:top]]
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f'{size:.0f}{unit}' if unit == 'B' else f'{size:.1f}{unit}'
+        size /= 1024
+    return f'{size:.1f}GiB'
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))  # seconds between stack samples
+MAX_PROFILE_SECONDS = 120
+
+
+def _is_idle(leaf: str) -> bool:
+    """The event loop is waiting for IO rather than running code when its innermost frame is the selector."""
+    return leaf.startswith('select (') and 'selectors' in leaf
+
+
+@dataclass
+class ProfileResult:
+    """Aggregated samples of one profiling run."""
+    duration: float
+    samples: int = 0
+    idle_samples: int = 0
+    stacks: Counter = field(default_factory=Counter)  # collapsed stack -> sample count
+    self_counts: Counter = field(default_factory=Counter)  # function -> samples where it was the leaf (loop thread)
+    total_counts: Counter = field(default_factory=Counter)  # function -> samples where it was on the stack (loop thread)
+    task_counts: Counter = field(default_factory=Counter)  # asyncio task -> busy samples
+    path: Optional[str] = None
+
+    def top_functions(self, n: int = 10) -> List[Tuple[str, int, int]]:
+        """Return the n hottest functions on the loop thread as (function, self samples, total samples)."""
+        return [(name, count, self.total_counts[name]) for name, count in self.self_counts.most_common(n)]
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that periodically samples the stacks of all threads of the live process.
+
+    Samples of the event loop thread are attributed to the asyncio task that was running at the time,
+    so coroutines like on_message or process_event can be told apart even though they share the thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self._labels: Dict[object, str] = {}  # code object -> frame label
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            cwd = os.getcwd()
+            if filename.startswith(cwd):
+                filename = filename[len(cwd) + 1:]
+            label = f'{code.co_name} ({filename}:{code.co_firstlineno})'
+            self._labels[code] = label
+        return label
+
+    def _current_task(self) -> Optional[str]:
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            return None
+        if task is None:
+            return None
+        coro = task.get_coro()
+        return f'{task.get_name()}:{getattr(coro, "__qualname__", type(coro).__name__)}'
+
+    def run(self, duration: float) -> ProfileResult:
+        """Sample for ``duration`` seconds. Blocks the calling thread, so run it off the event loop."""
+        result = ProfileResult(duration=duration)
+        own_id = threading.get_ident()
+        thread_names = {t.ident: t.name for t in threading.enumerate()}
+        deadline = time.monotonic() + duration
+
+        while time.monotonic() < deadline:
+            task = self._current_task()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                is_loop = thread_id == self.loop_thread_id
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                stack.reverse()
+
+                root = 'event-loop' if is_loop else thread_names.get(thread_id, f'thread-{thread_id}')
+                if is_loop:
+                    result.samples += 1
+                    if _is_idle(stack[-1]):
+                        result.idle_samples += 1
+                    else:
+                        result.self_counts[stack[-1]] += 1
+                        for name in set(stack):
+                            result.total_counts[name] += 1
+                        result.task_counts[task or '<no task>'] += 1
+                prefix = [root, f'task:{task}'] if is_loop and task else [root]
+                result.stacks[';'.join(prefix + stack)] += 1
+            time.sleep(self.interval)
+        return result
+
+
+def write_collapsed(result: ProfileResult, directory: str = PROFILE_DIR) -> str:
+    """Write the samples in collapsed-stack format (flamegraph.pl / speedscope compatible)."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'profile-{time.strftime("%Y%m%d-%H%M%S")}.collapsed')
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in result.stacks.most_common():
+            f.write(f'{stack} {count}\n')
+    result.path = path
+    return path
@@ -0,0 +1,233 @@
+import json
+import os
+import random
+import time
+import urllib.request
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Any
+
+
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.0))  # fraction of traces recorded (head sampling)
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'file')  # 'file' or 'otlp'
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+SERVICE_NAME = 'assassins-guild-bot'
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class FileSpanExporter:
+    """Appends finished spans to a local file, one OTLP/JSON span per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List['Span']) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_otlp()) + '\n')
+
+
+class OTLPHttpSpanExporter:
+    """Posts finished spans to an OTLP/HTTP (JSON encoding) collector endpoint."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+
+    def export(self, spans: List['Span']) -> None:
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', SERVICE_NAME)]},
+                'scopeSpans': [{
+                    'scope': {'name': __name__},
+                    'spans': [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5):
+                pass
+        except OSError as e:
+            print(f'[tracing] Failed to export {len(spans)} spans to {self.endpoint}: {e}')
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class _Trace:
+    """Collects the spans that share one correlation id."""
+    __slots__ = ('trace_id', 'finished', 'closed')
+
+    def __init__(self):
+        self.trace_id = '%032x' % random.getrandbits(128)
+        self.finished: List[Span] = []
+        self.closed = False
+
+
+class Span:
+    """A timed unit of work. Use as a context manager; the span becomes the current span while open."""
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'attributes',
+                 'start_ns', 'end_ns', 'error', '_perf_start', '_token')
+
+    def __init__(self, trace: _Trace, name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._perf_start = 0
+        self._token = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> 'Span':
+        self.start_ns = time.time_ns()
+        self._perf_start = time.perf_counter_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # derive the end time from the monotonic clock so wall clock jumps don't skew durations
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._perf_start)
+        if exc_type is not None:
+            self.error = f'{exc_type.__name__}: {exc}'
+        _current_span.reset(self._token)
+        self._token = None
+
+        trace = self.trace
+        if trace.closed:
+            # span outlived its root (e.g. a task spawned from the traced listener)
+            _export([self])
+            return
+        trace.finished.append(self)
+        if self.parent_id is None:
+            trace.closed = True
+            _export(trace.finished)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stand-in returned when a trace is not sampled, so instrumented code pays almost nothing."""
+    __slots__ = ()
+    trace_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_exporter = None
+_export_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_exporter():
+    global _exporter
+    if _exporter is None:
+        if TRACE_EXPORTER == 'otlp':
+            _exporter = OTLPHttpSpanExporter(TRACE_OTLP_ENDPOINT)
+        else:
+            _exporter = FileSpanExporter(TRACE_FILE)
+    return _exporter
+
+
+def set_exporter(exporter) -> None:
+    """Replace the span exporter. Any object with an ``export(spans)`` method is accepted."""
+    global _exporter
+    _exporter = exporter
+
+
+def _export(spans: List[Span]) -> None:
+    """Hand spans to the exporter on a single background thread so file/network IO stays off the event loop."""
+    global _export_executor
+    exporter = _get_exporter()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        exporter.export(spans)
+        return
+    if _export_executor is None:
+        _export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trace-export')
+    loop.run_in_executor(_export_executor, exporter.export, spans)
+
+
+def start_trace(name: str, **attributes):
+    """
+    Start a new trace with a fresh correlation id, subject to head sampling.
+
+    Args:
+        name: Name of the root span (usually the listener or task name)
+        attributes: Attributes recorded on the root span
+
+    Returns:
+        A span context manager; a no-op span when the trace is not sampled
+    """
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        return _NOOP_SPAN
+    return Span(_Trace(), name, None, attributes)
+
+
+def span(name: str, **attributes):
+    """
+    Start a child span of the current span. Outside of a sampled trace this is a no-op.
+
+    Args:
+        name: Name of the span
+        attributes: Attributes recorded on the span
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP_SPAN
+    return Span(parent.trace, name, parent, attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    """Return the correlation id of the current trace, if one is being recorded."""
+    current = _current_span.get()
+    return current.trace_id if current else None
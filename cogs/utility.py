@@ -1,8 +1,11 @@
+import asyncio
 import discord
 from discord.ext import commands
 import random
 import datetime
 
+from .dice.engine import DICE_COOLDOWN, DiceError, MESSAGE_LIMIT, format_result, parse, roll_terms, rolls_in_bulk
+
 
 class Utility(commands.Cog):
     """Utility commands for the bot."""
@@ -10,36 +13,28 @@ class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    @commands.command(name='roll', help='Rolls a dice (e.g., !roll 2d6)')
-    async def roll(self, ctx, dice: str = '1d6'):
+    @commands.command(name='roll', help='Rolls dice (e.g., !roll 2d6, !roll 4d6kh3+2, !roll 100000d6)')
+    @commands.cooldown(1, DICE_COOLDOWN, commands.BucketType.user)
+    async def roll(self, ctx, *, expression: str = '1d6'):
         """
-        Rolls dice in NdN format.
-        Example: !roll 2d6 rolls 2 six-sided dice
+        Rolls dice in standard notation.
+        Example: !roll 2d6 rolls 2 six-sided dice, !roll 4d6kh3 keeps the highest 3 of 4,
+        !roll 3d10! rolls exploding dice, !roll 2d8+1d6+3 adds several groups
         """
         try:
-            # Parse the dice string (e.g., "2d6")
-            rolls, limit = map(int, dice.split('d'))
-
-            # Validate input
-            if rolls <= 0 or limit <= 0:
-                await ctx.send("Please use positive numbers for the dice roll.")
-                return
-
-            if rolls > 100:
-                await ctx.send("You can't roll more than 100 dice at once.")
-                return
-
-            # Roll the dice
-            results = [random.randint(1, limit) for _ in range(rolls)]
-
-            # Format the response
-            result_str = ', '.join(str(r) for r in results)
-            total = sum(results)
+            terms = parse(expression)
+        except DiceError as e:
+            await ctx.send(f"Error: {str(e)}\nPlease use dice notation like 2d6, 4d6kh3 or 3d10!+2.")
+            return
 
-            await ctx.send(f"🎲 Rolling {dice}...\nResults: {result_str}\nTotal: {total}")
+        if rolls_in_bulk(terms):
+            # large pools take tens of milliseconds to sample, keep them off the event loop
+            result = await asyncio.get_running_loop().run_in_executor(None, roll_terms, expression, terms)
+        else:
+            result = roll_terms(expression, terms)
 
-        except Exception as e:
-            await ctx.send(f"Error: {str(e)}\nPlease use the format NdN (e.g., 2d6).")
+        header = f"🎲 Rolling {expression}...\n"
+        await ctx.send(header + format_result(result, MESSAGE_LIMIT - len(header)))
 
     @commands.command(name='choose', help='Chooses between multiple options')
     async def choose(self, ctx, *options):